@@ -0,0 +1,236 @@
+import asyncio
+import math
+import os
+from collections import deque, Counter
+from time import perf_counter
+from fastapi import Depends, HTTPException, Request
+from shared.group_finder import grouping_cost
+from .executors import GROUPING_WORKERS
+from .repository import AsyncRepository, get_repository
+
+# Загальний бюджет ваги одночасно виконуваних запитів групування (порожнє значення - 4 на процес)
+ADMISSION_BUDGET = int(os.getenv("ADMISSION_BUDGET") or GROUPING_WORKERS * 4)
+# Вартість (grouping_cost), що відповідає одиниці ваги
+ADMISSION_UNIT_COST = float(os.getenv("ADMISSION_UNIT_COST", 2e7))
+# Максимальна кількість запитів у черзі та максимальне очікування в ній (с)
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 32))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", 10))
+# Одночасних (виконуваних і тих, що чекають) запитів від одного клієнта
+ADMISSION_PER_CLIENT = int(os.getenv("ADMISSION_PER_CLIENT", 2))
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Зважений бюджет паралельності для CPU-важких запитів
+
+    Кожен запит займає вагу, пропорційну оцінці вартості, але не більше за
+    весь бюджет. Запити, що не вміщуються, чекають у черзі FIFO (важкий запит
+    не голодує через потік легких) не довше max_wait; переповнена черга,
+    перевищення ліміту клієнта чи таймаут дають відмову з Retry-After.
+    Використовується з одного циклу подій, тому синхронізація не потрібна.
+    """
+    def __init__(self, budget, unit_cost, max_queue, max_wait, per_client):
+        self.budget = max(1, budget)
+        self.unit_cost = unit_cost
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.per_client = per_client
+        self.in_use = 0
+        self._queue = deque()
+        self._clients = Counter()
+        # Середній час утримання ваги (с), для оцінки Retry-After
+        self._hold_avg = 1.0
+        self.admitted = 0
+        self.rejected = 0
+
+    def weight(self, cost):
+        return max(1, min(self.budget, math.ceil(cost / self.unit_cost)))
+
+    def retry_after(self, weight):
+        # Скільки часу звільнятиметься бюджет для черги попереду та цього запиту
+        pending = sum(entry[0] for entry in self._queue) + weight
+        return max(1, math.ceil(self._hold_avg * pending / self.budget))
+
+    def _reject(self, reason, weight):
+        self.rejected += 1
+        raise AdmissionRejected(reason, self.retry_after(weight))
+
+    async def acquire(self, client, weight):
+        """
+        Займає вагу в бюджеті або чекає на неї в черзі
+
+        Returns:
+            float: Момент надання ваги (передається в release)
+
+        Raises:
+            AdmissionRejected: Якщо запит не може бути прийнятий
+        """
+        if self._clients[client] >= self.per_client:
+            self._reject("Забагато одночасних запитів від клієнта", weight)
+
+        self._clients[client] += 1
+        try:
+            if self._queue or self.in_use + weight > self.budget:
+                await self._wait_turn(weight)
+            else:
+                self.in_use += weight
+        except BaseException:
+            self._forget(client)
+            raise
+
+        self.admitted += 1
+        return perf_counter()
+
+    async def resize(self, client, weight, new_weight):
+        """
+        Змінює вагу, яку вже займає запит (попередня вага до оцінки вартості)
+
+        Більша вага, що не вміщується одразу, очікується в черзі без утримання
+        попередньої, тож запити з попередньою вагою не блокують один одного.
+        Якщо запит відхилено, його вага вже звільнена.
+
+        Returns:
+            float: Момент надання нової ваги (передається в release)
+
+        Raises:
+            AdmissionRejected: Якщо нова вага не може бути надана
+        """
+        if new_weight <= weight:
+            self.in_use -= weight - new_weight
+            self._grant()
+        elif not self._queue and self.in_use + new_weight - weight <= self.budget:
+            self.in_use += new_weight - weight
+        else:
+            self.in_use -= weight
+            self._grant()
+            try:
+                await self._wait_turn(new_weight)
+            except BaseException:
+                self._forget(client)
+                raise
+        return perf_counter()
+
+    async def _wait_turn(self, weight):
+        if len(self._queue) >= self.max_queue:
+            self._reject("Черга запитів переповнена", weight)
+
+        entry = (weight, asyncio.get_running_loop().create_future())
+        self._queue.append(entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(entry[1]), self.max_wait)
+        except BaseException as e:
+            if entry[1].done():
+                # Вагу надано одночасно з таймаутом чи скасуванням - повертаємо її
+                self.in_use -= weight
+            else:
+                self._queue.remove(entry)
+            self._grant()
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject("Сервер перевантажений, спробуйте пізніше", weight)
+            raise
+
+    def release(self, client, weight, acquired_at):
+        self.in_use -= weight
+        self._forget(client)
+        self._hold_avg = 0.9 * self._hold_avg + 0.1 * (perf_counter() - acquired_at)
+        self._grant()
+
+    def _forget(self, client):
+        self._clients[client] -= 1
+        if self._clients[client] <= 0:
+            del self._clients[client]
+
+    def _grant(self):
+        # Черга обслуговується по порядку: наступний запит чекає, доки не вміститься
+        while self._queue and self.in_use + self._queue[0][0] <= self.budget:
+            weight, future = self._queue.popleft()
+            self.in_use += weight
+            future.set_result(None)
+
+    def stats(self):
+        return {
+            "budget": self.budget,
+            "in_use": self.in_use,
+            "queued": len(self._queue),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "hold_avg_s": round(self._hold_avg, 3),
+        }
+
+
+controller = AdmissionController(
+    ADMISSION_BUDGET, ADMISSION_UNIT_COST, ADMISSION_MAX_QUEUE, ADMISSION_MAX_WAIT, ADMISSION_PER_CLIENT
+)
+
+
+async def _grouping_params(request):
+    params = dict(request.query_params)
+    if request.method == "POST":
+        try:
+            body = await request.json()
+        except ValueError:
+            body = None
+        if isinstance(body, dict):
+            params.update(body)
+    return params
+
+
+async def _grouping_cost(repository, params):
+    try:
+        n, slots = await repository.get_window_shape(params["metric_type"], params["date"], params["time"])
+        # Перебір налаштувань оцінюється за найбільшим розміром групи
+        sizes = params.get("max_group_sizes") or [params.get("max_group_size", 4)]
+        return grouping_cost(n, max(int(size) for size in sizes), slots)
+    except (KeyError, TypeError, ValueError):
+        # Некоректні параметри відхилить валідація самого ендпоінта
+        return 0
+
+
+def _too_many_requests(e):
+    return HTTPException(status_code=429, detail=e.reason, headers={"Retry-After": str(e.retry_after)})
+
+
+async def admit_grouping(request: Request, repository: AsyncRepository = Depends(get_repository)):
+    """
+    Залежність ендпоінтів, що запускають групування: оцінює вартість запиту
+    за розміром вікна (n, T) і max_group_size (k) та займає вагу в бюджеті
+    на час виконання запиту
+
+    Оцінка розміру вікна - агрегатний запит до БД, тому він виконується вже
+    з попередньою одиничною вагою: потік запитів не обходить бюджет.
+    """
+    params = await _grouping_params(request)
+    client = request.client.host if request.client else "unknown"
+    weight = 1
+    try:
+        acquired_at = await controller.acquire(client, weight)
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
+
+    try:
+        cost = await _grouping_cost(repository, params)
+    except BaseException:
+        controller.release(client, weight, acquired_at)
+        raise
+
+    try:
+        acquired_at = await controller.resize(client, weight, controller.weight(cost))
+    except AdmissionRejected as e:
+        raise _too_many_requests(e)
+    weight = controller.weight(cost)
+
+    try:
+        yield
+    finally:
+        controller.release(client, weight, acquired_at)
+
+
+def admission_stats():
+    return controller.stats()
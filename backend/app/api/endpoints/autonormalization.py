@@ -1,16 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Dict, Any
 from pydantic import BaseModel
 import sys
 import os
 import json
-import numpy as np
 
 # Додавання шляху до shared модулів
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../..")))
-from shared.db_input import DBInput
-from shared.db_output import DBOutput
 from shared.constants import STANDARD_CONFIG
+from shared.normalization import normalize_to_percentage, peak_percentage
+from ...repository import AsyncRepository, get_repository
 
 router = APIRouter()
 
@@ -44,36 +43,21 @@ async def get_standard_config():
     )
 
 @router.post("/analyze-and-normalize", response_model=AutoNormalizationResult)
-async def analyze_and_normalize(request: AnalyzeRequest):
+async def analyze_and_normalize(
+    request: AnalyzeRequest,
+    repository: AsyncRepository = Depends(get_repository)
+):
     """
     Аналізує використання ресурсів, визначає ключовий ресурс та виконує нормалізацію
     """
     try:
-        db_input = DBInput()
-        db_output = DBOutput()
-
-        # Отримуємо дані для всіх типів метрик
-        metrics_data = {}
+        # Отримуємо дані для всіх типів метрик одним запитом
+        metrics_data = await repository.get_raw_windows(request.date, request.time)
         max_percentages = {"CPU": 0, "RAM": 0, "CHANNEL": 0}
         
-        for metric_type in ["CPU", "RAM", "CHANNEL"]:
-            raw_data, service_names = db_input.get_raw_data_for_algorithm(
-                metric_type, request.date, request.time
-            )
-            if not raw_data:
-                continue
-            
-            metrics_data[metric_type] = {
-                "data": raw_data,
-                "services": service_names
-            }
-            
-            # Для кожного сервісу рахуємо відсоток використання ресурсу
-            for values in raw_data:
-                max_value = np.max(values)  # Беремо максимальне значення для сервісу
-                standard_value = STANDARD_CONFIG[metric_type]["value"]
-                percentage = (max_value / standard_value) * 100
-                max_percentages[metric_type] = max(max_percentages[metric_type], percentage)
+        # Пікове використання кожного ресурсу - максимум по всій матриці вікна
+        for metric_type, window in metrics_data.items():
+            max_percentages[metric_type] = peak_percentage(window.values, metric_type)
 
         if not metrics_data:
             raise HTTPException(
@@ -83,31 +67,15 @@ async def analyze_and_normalize(request: AnalyzeRequest):
 
         # Визначаємо ключовий ресурс (з найбільшим відсотком використання)
         key_resource = max(max_percentages.items(), key=lambda x: x[1])[0]
-        max_percentage = max_percentages[key_resource]
-        scaling_factor = max_percentage / 100 if max_percentage > 0 else 1.0
-
-        # Нормалізуємо дані для всіх типів метрик з використанням одного scaling_factor
-        for metric_type in [key_resource]:
-            if metric_type not in metrics_data:
-                continue
-                
-            raw_data = metrics_data[metric_type]["data"]
-            service_names = metrics_data[metric_type]["services"]
-            
-            # Нормалізуємо значення для кожного сервісу
-            for i, values in enumerate(raw_data):
-                normalized_values = [round(v / STANDARD_CONFIG[metric_type]["value"] * 100, 2) for v in values]
-                db_output.save_processed_data(
-                    service_names[i],
-                    metric_type,
-                    request.date,
-                    request.time,
-                    normalized_values
-                )
 
-        # Закриваємо з'єднання
-        db_input.close()
-        db_output.close()
+        # Нормалізуємо всю матрицю ключового ресурсу і зберігаємо одним пакетом
+        if key_resource in metrics_data:
+            window = metrics_data[key_resource]
+            normalized = normalize_to_percentage(window.values, key_resource, clip=False)
+            await repository.batch_save_processed_data([
+                (service_name, key_resource, request.date, request.time, values)
+                for service_name, values in zip(window.service_names, normalized)
+            ])
 
         # Формуємо структуровану відповідь
         resource_names = {
@@ -139,6 +107,8 @@ async def analyze_and_normalize(request: AnalyzeRequest):
             key_resource=resource_names[key_resource]
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
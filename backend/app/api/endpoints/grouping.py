@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Depends
 from typing import List, Dict, Any, Optional
-from shared.db_input import DBInput
-from shared.db_output import DBOutput
-from shared.group_finder import form_multiple_knapsack_groups, split_microservice_load
-from pydantic import BaseModel
+from time import perf_counter
+from shared.db_input import format_db_time
+from shared.group_finder import (
+    has_stored_series, rebuild_saved_groups, choose_engine, GROUPING_TARGET_MS
+)
+from shared.grouping_strategies import get_strategy, describe_strategies
+from ...executors import group_in_pool, sweep_in_pool, run_blocking
+from ...repository import AsyncRepository, get_repository
+from ...admission import admit_grouping
+from pydantic import BaseModel, Field
 
 router = APIRouter()
 
@@ -14,6 +20,15 @@ class GroupingRequest(BaseModel):
     time: str
     max_group_size: int = 4
     stability_threshold: float = 20.0
+    strategy: Optional[str] = None
+
+class SweepRequest(BaseModel):
+    metric_type: str
+    date: str
+    time: str
+    max_group_sizes: List[int] = Field(default=[2, 3, 4], min_length=1)
+    stability_thresholds: List[float] = Field(default=[10.0, 15.0, 20.0, 25.0, 30.0], min_length=1)
+    pareto_only: bool = False
 
 class ServiceItem(BaseModel):
     service_name: str
@@ -30,52 +45,87 @@ class GroupingResponse(BaseModel):
     groups: List[GroupItem]
     metrics_info: Dict[str, Any]
 
-@router.post("/run", response_model=GroupingResponse)
-async def run_grouping(request: GroupingRequest):
+def _service_items(result, group_id, service_names):
+    """
+    Формує опис учасників групи з результату групування
+    """
+    return [
+        ServiceItem(service_name=service_names[service_idx], values=values.tolist(), component_type=component_type)
+        for service_idx, component_type, values in result.members(group_id)
+    ]
+
+def _check_strategy(strategy):
+    """
+    Перевіряє назву стратегії до запуску групування
+    """
+    try:
+        return get_strategy(strategy).name
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def _group_window(window, max_group_size, stability_threshold, strategy=None):
+    """
+    Формує групи в пулі процесів, не блокуючи цикл подій
+
+    Returns:
+        tuple: (GroupingResult, grouping_ms)
+    """
+    started = perf_counter()
+    result = await run_blocking(
+        group_in_pool, window, max_group_size=max_group_size, stability_threshold=stability_threshold,
+        strategy=strategy
+    )
+    return result, (perf_counter() - started) * 1000
+
+@router.get("/strategies")
+async def get_strategies():
+    """
+    Список зареєстрованих стратегій групування
+    """
+    return {"default": get_strategy().name, "strategies": describe_strategies()}
+
+@router.post("/run", response_model=GroupingResponse, dependencies=[Depends(admit_grouping)])
+async def run_grouping(request: GroupingRequest, repository: AsyncRepository = Depends(get_repository)):
     """
     Запуск алгоритму групування мікросервісів
     """
+    strategy = _check_strategy(request.strategy)
     try:
-        db_input = DBInput()
-        db_output = DBOutput()
-        
         # Отримання даних для алгоритму
-        microservices, service_names = db_input.get_data_for_algorithm(
+        window = await repository.get_window_matrix(
             request.metric_type, request.date, request.time
         )
         
-        if not microservices:
+        if not window:
             raise HTTPException(status_code=404, detail="Немає даних для вибраних параметрів")
         
         # Формування груп
-        groups, group_services, slot_sums = form_multiple_knapsack_groups(
-            microservices, 
-            max_group_size=request.max_group_size, 
-            stability_threshold=request.stability_threshold
+        result, grouping_ms = await _group_window(
+            window, request.max_group_size, request.stability_threshold, strategy
         )
         
         # Збереження результатів в базу даних
-        records_count = db_output.save_grouping_results(
-            groups, 
-            group_services, 
-            service_names, 
+        records_count, run_id = await repository.save_grouping_results(
+            result, 
+            window.service_names, 
             request.metric_type, 
             request.date, 
-            request.time
+            request.time,
+            max_group_size=request.max_group_size,
+            stability_threshold=request.stability_threshold,
+            grouping_ms=grouping_ms,
+            fingerprint=window.fingerprint
         )
         
         # Формування відповіді
-        from shared.group_finder import calculate_stability
-        
         result_groups = []
-        for i, (group, services) in enumerate(zip(groups, group_services)):
-            stability = calculate_stability(group)
+        for i in range(len(result)):
             result_groups.append(
                 GroupItem(
                     group_id=i + 1,
-                services=services,
-                total_load=slot_sums[i],
-                stability=stability
+                    services=_service_items(result, i, window.service_names),
+                    total_load=result.slot_sums[i].tolist(),
+                    stability=float(result.cvs[i])
                 )
             )
         
@@ -87,154 +137,158 @@ async def run_grouping(request: GroupingRequest):
                 "time": request.time,
                 "max_group_size": request.max_group_size,
                 "stability_threshold": request.stability_threshold,
-                "groups_count": len(groups),
-                "services_count": len(microservices),
-                "saved_records": records_count
+                "strategy": result.strategy,
+                "engine": result.engine,
+                "groups_count": len(result),
+                "services_count": len(window),
+                "saved_records": records_count,
+                "run_id": run_id,
+                "grouping_ms": round(grouping_ms, 2)
             }
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Помилка при групуванні мікросервісів: {str(e)}")
 
-@router.get("/saved", response_model=List[Dict[str, Any]])
-async def get_saved_groupings():
+@router.post("/sweep", dependencies=[Depends(admit_grouping)])
+async def sweep_grouping_settings(request: SweepRequest, repository: AsyncRepository = Depends(get_repository)):
     """
-    Отримання списку збережених варіантів групування
+    Порівняння налаштувань групування на сітці розмірів груп і порогів стабільності
+
+    Комбінації перебираються один раз для найбільших розміру та порогу, кожне
+    налаштування - лише повторний жадібний вибір з оцінених кандидатів.
+    Результати не зберігаються в базу даних.
     """
+    if any(size < 1 for size in request.max_group_sizes):
+        raise HTTPException(status_code=400, detail="Розмір групи має бути не менше 1")
     try:
-        db_output = DBOutput()
+        window = await repository.get_window_matrix(request.metric_type, request.date, request.time)
         
-        # Запит для отримання доступних варіантів групування
-        query = """
-        SELECT 
-            date, 
-            time, 
-            metric_type, 
-            COUNT(DISTINCT group_id) AS num_groups
-        FROM grouping_results
-        GROUP BY date, time, metric_type
-        ORDER BY date DESC, time DESC
-        """
+        if not window:
+            raise HTTPException(status_code=404, detail="Немає даних для вибраних параметрів")
         
-        db_output.cursor.execute(query)
-        results = db_output.cursor.fetchall()
+        started = perf_counter()
+        sweep = await run_blocking(sweep_in_pool, window, request.max_group_sizes, request.stability_thresholds)
+        rows = [row for row in sweep["rows"] if row["pareto"] or not request.pareto_only]
+        
+        return {
+            "rows": rows,
+            "metrics_info": {
+                "metric_type": request.metric_type,
+                "date": request.date,
+                "time": request.time,
+                "services_count": len(window),
+                "settings_count": len(sweep["rows"]),
+                "enumeration_ms": round(sweep["enumeration_ms"], 2),
+                "sweep_ms": round((perf_counter() - started) * 1000, 2)
+            }
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Помилка при порівнянні налаштувань групування: {str(e)}")
+
+@router.get("/estimate")
+async def estimate_grouping(
+    metric_type: str = Query(..., description="Тип метрики (CPU, RAM, CHANNEL)"),
+    date: str = Query(..., description="Дата у форматі YYYY-MM-DD"),
+    time: str = Query(..., description="Час у форматі HH:MM:SS"),
+    max_group_size: int = Query(4, ge=1, description="Максимальний розмір групи"),
+    stability_threshold: float = Query(20.0, description="Поріг стабільності (%)"),
+    repository: AsyncRepository = Depends(get_repository)
+):
+    """
+    Оцінка часу виконання та пам'яті групування до його запуску
+    """
+    try:
+        # Розмір вікна обчислюється на боці БД без читання рядів
+        services_count, time_slots = await repository.get_window_shape(metric_type, date, time)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Помилка при оцінці групування: {str(e)}")
+    
+    if not services_count:
+        raise HTTPException(status_code=404, detail="Немає даних для вибраних параметрів")
+    
+    engine, estimates = choose_engine(services_count, max_group_size, time_slots, stability_threshold)
+    
+    return {
+        "services_count": services_count,
+        "time_slots": time_slots,
+        "max_group_size": max_group_size,
+        "stability_threshold": stability_threshold,
+        "engine": engine,
+        "estimated_ms": estimates[engine]["runtime_ms"],
+        "estimated_memory_mb": estimates[engine]["memory_mb"],
+        "target_ms": GROUPING_TARGET_MS,
+        "exceeds_target": estimates[engine]["runtime_ms"] > GROUPING_TARGET_MS,
+        "engines": estimates
+    }
+
+@router.get("/saved", response_model=List[Dict[str, Any]])
+async def get_saved_groupings(
+    limit: int = Query(100, ge=1, le=1000, description="Кількість записів на сторінці"),
+    offset: int = Query(0, ge=0, description="Зсув від початку списку"),
+    repository: AsyncRepository = Depends(get_repository)
+):
+    """
+    Отримання списку збережених варіантів групування (сторінка заголовків запусків)
+    """
+    try:
+        # Заголовки запусків читаються з grouping_runs без агрегації по grouping_results
+        results = await repository.get_grouping_runs(limit=limit, offset=offset)
         
         # Форматування результатів
         groupings = []
         for row in results:
-            date_str = row["date"].strftime("%Y-%m-%d")
-            
-            # Форматування часу
-            if hasattr(row["time"], "strftime"):
-                time_str = row["time"].strftime("%H:%M:%S")
-            else:
-                # Якщо це timedelta або інший тип
-                total_seconds = int(row["time"].total_seconds())
-                hours, remainder = divmod(total_seconds, 3600)
-                minutes, seconds = divmod(remainder, 60)
-                time_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-            
             groupings.append({
-                "date": date_str,
-                "time": time_str,
+                "run_id": row["run_id"],
+                "version": row["version"],
+                "date": row["date"].strftime("%Y-%m-%d"),
+                "time": format_db_time(row["time"]),
                 "metric_type": row["metric_type"],
-                "num_groups": row["num_groups"]
+                "num_groups": row["num_groups"],
+                "max_group_size": row["max_group_size"],
+                "stability_threshold": row["stability_threshold"],
+                "grouping_ms": row["grouping_ms"]
             })
         
-        db_output.close()
         return groupings
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Помилка при отриманні збережених варіантів групування: {str(e)}")
 
+def _saved_group_items(rows, window):
+    """
+    Групи збереженого групування у форматі відповіді (див. rebuild_saved_groups)
+    """
+    return [
+        GroupItem(
+            group_id=group["group_id"],
+            services=[
+                ServiceItem(service_name=service_name, values=list(values), component_type=component_type)
+                for service_name, component_type, values in group["members"]
+            ],
+            total_load=group["total_load"],
+            stability=group["stability"]
+        )
+        for group in rebuild_saved_groups(rows, window)
+    ]
+
 @router.get("/saved/{date}/{time}/{metric_type}", response_model=GroupingResponse)
-async def get_saved_grouping(date: str, time: str, metric_type: str):
+async def get_saved_grouping(
+    date: str, time: str, metric_type: str,
+    repository: AsyncRepository = Depends(get_repository)
+):
     """
     Отримання збереженого варіанту групування
     """
     try:
-        db_input = DBInput()
-        db_output = DBOutput()
-        
-        # Отримання даних мікросервісів
-        microservices, service_names = db_input.get_data_for_algorithm(metric_type, date, time)
+        # Усі рядки збереженого групування одним запитом
+        rows = await repository.get_grouping_rows(metric_type, date, time)
         
-        # Отримання груп з бази даних
-        query = """
-        SELECT DISTINCT group_id
-        FROM grouping_results
-        WHERE date = %s AND time = %s AND metric_type = %s
-        ORDER BY group_id
-        """
+        # Дані мікросервісів потрібні лише для записів без збережених часових рядів
+        window = None if has_stored_series(rows) else await repository.get_window_matrix(metric_type, date, time)
         
-        db_output.cursor.execute(query, (date, time, metric_type))
-        group_ids = [row["group_id"] for row in db_output.cursor.fetchall()]
-        
-        result_groups = []
-        for group_id in group_ids:
-            # Отримання мікросервісів для поточної групи
-            query = """
-            SELECT service_name, component_type
-            FROM grouping_results
-            WHERE date = %s AND time = %s AND metric_type = %s AND group_id = %s
-            """
-            
-            db_output.cursor.execute(query, (date, time, metric_type, group_id))
-            services_in_group = db_output.cursor.fetchall()
-            
-            # Формування групи
-            group_services = []
-            group_values = []
-            
-            for service_row in services_in_group:
-                service_name = service_row["service_name"]
-                component_type = service_row["component_type"]
-                
-                # Знаходження індексу мікросервісу
-                if service_name in service_names:
-                    service_idx = service_names.index(service_name)
-                    
-                    # Отримання часового ряду в залежності від типу компоненту
-                    if component_type == "original":
-                        values = microservices[service_idx]
-                    elif component_type == "base":
-                        base, _ = split_microservice_load(microservices[service_idx])
-                        values = base
-                    elif component_type == "peak":
-                        _, peak = split_microservice_load(microservices[service_idx])
-                        values = peak
-                    else:
-                        continue
-                    
-                    group_services.append(ServiceItem(
-                        service_name=service_name,
-                        values=values,
-                        component_type=component_type
-                    ))
-                    
-                    group_values.append(values)
-            
-            # Обчислення загального навантаження групи
-            if group_values:
-                time_slots = len(group_values[0])
-                total_load = [0] * time_slots
-                
-                for service in group_values:
-                    for t in range(time_slots):
-                        total_load[t] += service[t]
-                
-                # Обчислення стабільності групи
-                from shared.group_finder import calculate_stability
-                stability = calculate_stability(group_values)
-                
-                result_groups.append(GroupItem(
-                    group_id=group_id,
-                    services=group_services,
-                    total_load=total_load,
-                    stability=stability
-                ))
-        
-        # Закриття з'єднань з базою даних
-        db_input.close()
-        db_output.close()
+        # Розбір збережених рядів займає O(G*T), тому виконується поза циклом подій
+        result_groups = await run_blocking(_saved_group_items, rows, window)
         
         return GroupingResponse(
             groups=result_groups,
@@ -243,60 +297,57 @@ async def get_saved_grouping(date: str, time: str, metric_type: str):
                 "date": date,
                 "time": time,
                 "groups_count": len(result_groups),
-                "services_count": len(microservices),
+                "services_count": len({row["service_name"] for row in rows}),
                 "loaded_from_db": True
             }
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Помилка при отриманні збереженого варіанту групування: {str(e)}") 
 
-@router.get("/form-groups")
+@router.get("/form-groups", dependencies=[Depends(admit_grouping)])
 async def form_groups(
     metric_type: str = Query(..., description="Тип метрики (CPU, RAM, CHANNEL)"),
     date: str = Query(..., description="Дата у форматі YYYY-MM-DD"),
     time: str = Query(..., description="Час у форматі HH:MM:SS"),
     max_group_size: int = Query(4, description="Максимальний розмір групи"),
-    stability_threshold: float = Query(20.0, description="Поріг стабільності (%)")
+    stability_threshold: float = Query(20.0, description="Поріг стабільності (%)"),
+    strategy: Optional[str] = Query(None, description="Стратегія групування (див. /strategies)"),
+    repository: AsyncRepository = Depends(get_repository)
 ):
     """
     Формування груп мікросервісів (GET версія)
     """
+    strategy = _check_strategy(strategy)
     try:
-        db_input = DBInput()
-        db_output = DBOutput()
-        
         # Отримання даних для алгоритму
-        microservices, service_names = db_input.get_data_for_algorithm(
-            metric_type, date, time
-        )
+        window = await repository.get_window_matrix(metric_type, date, time)
         
-        if not microservices:
+        if not window:
             raise HTTPException(status_code=404, detail="Немає даних для вибраних параметрів")
         
         # Формування груп
-        groups, group_services, slot_sums = form_multiple_knapsack_groups(
-            microservices, 
-            max_group_size=max_group_size, 
-            stability_threshold=stability_threshold
-        )
+        result, grouping_ms = await _group_window(window, max_group_size, stability_threshold, strategy)
         
         # Збереження результатів в базу даних
-        db_output.save_grouping_results(
-            groups, 
-            group_services, 
-            service_names, 
+        _, run_id = await repository.save_grouping_results(
+            result, 
+            window.service_names, 
             metric_type, 
             date, 
-            time
+            time,
+            max_group_size=max_group_size,
+            stability_threshold=stability_threshold,
+            grouping_ms=grouping_ms,
+            fingerprint=window.fingerprint
         )
         
         # Формування спрощеної відповіді для фронтенду
         result_groups = []
-        for i, (group, services) in enumerate(zip(groups, group_services)):
+        for i in range(len(result)):
             result_groups.append({
                 "group_number": i + 1,
-                "services": services,
-                "values": group
+                "services": result.member_labels(i, window.service_names),
+                "values": [service.tolist() for service in result.group_series(i)]
             })
         
         return {
@@ -306,57 +357,41 @@ async def form_groups(
                 "date": date,
                 "time": time,
                 "max_group_size": max_group_size,
-                "stability_threshold": stability_threshold
+                "stability_threshold": stability_threshold,
+                "strategy": result.strategy,
+                "engine": result.engine,
+                "run_id": run_id
             }
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Помилка при формуванні груп: {str(e)}")
 
-@router.get("/find-split-services")
+@router.get("/find-split-services", dependencies=[Depends(admit_grouping)])
 async def find_split_services(
     metric_type: str = Query(..., description="Тип метрики (CPU, RAM, CHANNEL)"),
     date: str = Query(..., description="Дата у форматі YYYY-MM-DD"),
     time: str = Query(..., description="Час у форматі HH:MM:SS"),
     max_group_size: int = Query(4, description="Максимальний розмір групи"),
-    stability_threshold: float = Query(20.0, description="Поріг стабільності (%)")
+    stability_threshold: float = Query(20.0, description="Поріг стабільності (%)"),
+    strategy: Optional[str] = Query(None, description="Стратегія групування (див. /strategies)"),
+    repository: AsyncRepository = Depends(get_repository)
 ):
     """
     Знаходження мікросервісів, які були розділені на базові та пікові компоненти
     """
+    strategy = _check_strategy(strategy)
     try:
-        db_input = DBInput()
-        
         # Отримання даних для алгоритму
-        microservices, service_names = db_input.get_data_for_algorithm(
-            metric_type, date, time
-        )
+        window = await repository.get_window_matrix(metric_type, date, time)
         
-        db_input.close()
-        
-        if not microservices:
+        if not window:
             raise HTTPException(status_code=404, detail="Немає даних для вибраних параметрів")
         
         # Формування груп для знаходження розділених мікросервісів
-        from shared.group_finder import form_multiple_knapsack_groups
-        groups, group_services, _ = form_multiple_knapsack_groups(
-            microservices, 
-            max_group_size=max_group_size, 
-            stability_threshold=stability_threshold
-        )
-        
-        # Знаходження мікросервісів, які розділені на базові та пікові компоненти
-        split_indices = set()
-        
-        for group in group_services:
-            for idx in group:
-                if idx >= 1000 or idx < 0:  # Базовий або піковий компонент
-                    # Визначаємо реальний індекс
-                    real_idx = idx - 1000 if idx >= 1000 else -idx
-                    if 0 <= real_idx < len(service_names):
-                        split_indices.add(real_idx)
+        result, _ = await _group_window(window, max_group_size, stability_threshold, strategy)
         
-        # Отримання назв розділених мікросервісів
-        split_services = [service_names[idx] for idx in split_indices]
+        # Мікросервіси, які розділені на базові та пікові компоненти
+        split_services = [window.service_names[idx] for idx in result.split_services()]
         
         return {"split_services": split_services}
     except Exception as e:
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, Depends
 from typing import List, Dict, Any, Optional
-from shared.db_input import DBInput
-from shared.db_output import DBOutput
+from shared.db_input import format_db_time
+from shared.window_catalog import cached_options, cache_options
+from shared.normalization import normalize_to_percentage
 from pydantic import BaseModel
+from ...repository import AsyncRepository, get_repository
 
 router = APIRouter()
 
@@ -40,21 +42,23 @@ async def get_metric_types():
     return ["CPU", "RAM", "CHANNEL"]
 
 @router.get("/dates", response_model=List[DateItem])
-async def get_available_dates(metric_type: str = Query(..., description="Тип метрики (CPU, RAM, CHANNEL)")):
+async def get_available_dates(
+    metric_type: str = Query(..., description="Тип метрики (CPU, RAM, CHANNEL)"),
+    repository: AsyncRepository = Depends(get_repository)
+):
     """
     Отримання доступних дат для вибраного типу метрики
     """
     try:
-        db_input = DBInput()
-        
-        # Отримання списку доступних дат
-        query = "SELECT DISTINCT date FROM processed_metrics WHERE metric_type = %s ORDER BY date"
-        db_input.cursor.execute(query, (metric_type,))
-        results = db_input.cursor.fetchall()
+        # Отримання списку доступних дат з каталогу вікон
+        results = [row for row in await repository.get_window_catalog(metric_type) if row["has_processed"]]
         
-        dates = [DateItem(date=row["date"].strftime("%Y-%m-%d")) for row in results]
+        dates = []
+        for row in results:
+            date_str = row["date"].strftime("%Y-%m-%d")
+            if not dates or dates[-1].date != date_str:
+                dates.append(DateItem(date=date_str))
         
-        db_input.close()
         return dates
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Помилка при отриманні дат: {str(e)}")
@@ -62,34 +66,17 @@ async def get_available_dates(metric_type: str = Query(..., description="Тип
 @router.get("/times", response_model=List[TimeItem])
 async def get_available_times(
     metric_type: str = Query(..., description="Тип метрики (CPU, RAM, CHANNEL)"),
-    date: str = Query(..., description="Дата у форматі YYYY-MM-DD")
+    date: str = Query(..., description="Дата у форматі YYYY-MM-DD"),
+    repository: AsyncRepository = Depends(get_repository)
 ):
     """
     Отримання доступних часів для вибраної дати та типу метрики
     """
     try:
-        db_input = DBInput()
-        
-        # Отримання списку доступних часів
-        query = "SELECT DISTINCT time FROM processed_metrics WHERE metric_type = %s AND date = %s ORDER BY time"
-        db_input.cursor.execute(query, (metric_type, date))
-        results = db_input.cursor.fetchall()
+        # Отримання списку доступних часів з каталогу вікон
+        results = await repository.get_window_catalog(metric_type, date)
+        times = [TimeItem(time=format_db_time(row["time"])) for row in results if row["has_processed"]]
         
-        times = []
-        for row in results:
-            # Конвертація time в рядок
-            if hasattr(row["time"], "strftime"):
-                time_str = row["time"].strftime("%H:%M:%S")
-            else:
-                # Якщо це timedelta або інший тип
-                total_seconds = int(row["time"].total_seconds())
-                hours, remainder = divmod(total_seconds, 3600)
-                minutes, seconds = divmod(remainder, 60)
-                time_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-            
-            times.append(TimeItem(time=time_str))
-        
-        db_input.close()
         return times
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Помилка при отриманні часів: {str(e)}")
@@ -98,107 +85,41 @@ async def get_available_times(
 async def get_metrics_data(
     metric_type: str = Query(..., description="Тип метрики (CPU, RAM, CHANNEL)"),
     date: str = Query(..., description="Дата у форматі YYYY-MM-DD"),
-    time: str = Query(..., description="Час у форматі HH:MM:SS")
+    time: str = Query(..., description="Час у форматі HH:MM:SS"),
+    repository: AsyncRepository = Depends(get_repository)
 ):
     """
     Отримання даних метрик для вибраних параметрів
     """
     try:
-        db_input = DBInput()
-        
         # Отримання даних для алгоритму
-        microservices, service_names = db_input.get_data_for_algorithm(
-            metric_type, date, time
-        )
+        window = await repository.get_window_matrix(metric_type, date, time)
         
         # Формування відповіді
         result = []
-        for i, (service, name) in enumerate(zip(microservices, service_names)):
+        for service, name in zip(window.values.tolist(), window.service_names):
             result.append(MetricValue(service_name=name, values=service))
         
-        db_input.close()
         return MetricsResponse(microservices=result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Помилка при отриманні даних метрик: {str(e)}") 
 
 @router.get("/available-options", response_model=AvailableOptions)
-async def get_available_options():
+async def get_available_options(repository: AsyncRepository = Depends(get_repository)):
     """
     Отримати доступні дати, часи та типи метрик для вибору
     """
     try:
-        db_input = DBInput()
-        metric_types = ["CPU", "RAM", "CHANNEL"]
-        
-        # Запит на отримання всіх унікальних дат з raw_metrics
-        query_dates = "SELECT DISTINCT date FROM raw_metrics ORDER BY date"
-        db_input.cursor.execute(query_dates)
-        raw_dates = [row["date"].strftime("%Y-%m-%d") for row in db_input.cursor.fetchall()]
-        
-        # Також отримуємо дати з processed_metrics для повного списку
-        query_dates = "SELECT DISTINCT date FROM processed_metrics ORDER BY date"
-        db_input.cursor.execute(query_dates)
-        processed_dates = [row["date"].strftime("%Y-%m-%d") for row in db_input.cursor.fetchall()]
-        
-        # Об'єднуємо дати з обох таблиць без дублікатів
-        dates = list(set(raw_dates + processed_dates))
-        dates.sort()
-        
-        # Запит на отримання всіх унікальних часів для кожної дати
-        times_by_date = {}
-        for date in dates:
-            times_by_date[date] = []
-            
-            # Отримуємо часи з raw_metrics для всіх типів метрик
-            for metric_type in metric_types:
-                query_times = "SELECT DISTINCT time FROM raw_metrics WHERE date = %s AND metric_type = %s ORDER BY time"
-                db_input.cursor.execute(query_times, (date, metric_type))
-                
-                # Додаємо унікальні часи у список
-                for row in db_input.cursor.fetchall():
-                    # Конвертація time в рядок
-                    if hasattr(row["time"], "strftime"):
-                        time_str = row["time"].strftime("%H:%M:%S")
-                    else:
-                        # Якщо це timedelta або інший тип
-                        total_seconds = int(row["time"].total_seconds())
-                        hours, remainder = divmod(total_seconds, 3600)
-                        minutes, seconds = divmod(remainder, 60)
-                        time_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                    
-                    if time_str not in times_by_date[date]:
-                        times_by_date[date].append(time_str)
-            
-            # Отримуємо часи з processed_metrics для всіх типів метрик, якщо немає даних з raw_metrics
-            if not times_by_date[date]:
-                for metric_type in metric_types:
-                    query_times = "SELECT DISTINCT time FROM processed_metrics WHERE date = %s AND metric_type = %s ORDER BY time"
-                    db_input.cursor.execute(query_times, (date, metric_type))
-                    
-                    # Додаємо унікальні часи у список
-                    for row in db_input.cursor.fetchall():
-                        # Конвертація time в рядок
-                        if hasattr(row["time"], "strftime"):
-                            time_str = row["time"].strftime("%H:%M:%S")
-                        else:
-                            # Якщо це timedelta або інший тип
-                            total_seconds = int(row["time"].total_seconds())
-                            hours, remainder = divmod(total_seconds, 3600)
-                            minutes, seconds = divmod(remainder, 60)
-                            time_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                        
-                        if time_str not in times_by_date[date]:
-                            times_by_date[date].append(time_str)
-            
-            # Сортуємо часи
-            times_by_date[date].sort()
-        
-        db_input.close()
+        # Увесь набір опцій будується одним запитом до каталогу metric_windows
+        # і кешується в процесі до наступного запису метрик
+        options, generation = cached_options()
+        if options is None:
+            options = cache_options(await repository.get_window_catalog(), generation)
         
         return AvailableOptions(
-            dates=dates,
-            times=times_by_date,
-            metric_types=metric_types
+            dates=options["dates"],
+            times=options["times"],
+            metric_types=options["metric_types"]
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Помилка при отриманні доступних опцій: {str(e)}") 
@@ -207,54 +128,40 @@ async def get_available_options():
 async def normalize_data_to_percentage(
     metric_type: str = Query(..., description="Тип метрики (CPU, RAM, CHANNEL)"),
     date: str = Query(..., description="Дата у форматі YYYY-MM-DD"),
-    time: str = Query(..., description="Час у форматі HH:MM:SS")
+    time: str = Query(..., description="Час у форматі HH:MM:SS"),
+    repository: AsyncRepository = Depends(get_repository)
 ):
     """
     Нормалізує сирі дані мікросервісів до відсотків (0-100) і зберігає їх у таблицю processed_metrics.
     """
     try:
-        # Ініціалізація з'єднань з БД
-        db_input = DBInput()
-        db_output = DBOutput()
-        
-        # Отримання даних для алгоритму
-        raw_data, service_names = db_input.get_raw_data_for_algorithm(
-            metric_type, date, time
-        )
-        
-        if not raw_data:
-            # Перевіряємо, які дані є в таблиці raw_metrics
-            query = "SELECT DISTINCT date, time FROM raw_metrics WHERE metric_type = %s ORDER BY date, time LIMIT 5"
-            db_input.cursor.execute(query, (metric_type,))
-            available_options = db_input.cursor.fetchall()
+        # Отримання сирої матриці вікна
+        window = (await repository.get_raw_windows(date, time, [metric_type])).get(metric_type)
+        
+        if not window:
+            # Перевіряємо, які сирі вікна є в каталозі
+            available_options = [
+                row for row in await repository.get_window_catalog(metric_type) if row["has_raw"]
+            ][:5]
             
             available_options_str = ""
             if available_options:
                 available_options_str = "\nДоступні опції для типу метрики " + metric_type + ":\n"
                 for option in available_options:
                     date_str = option["date"].strftime("%Y-%m-%d") if hasattr(option["date"], "strftime") else str(option["date"])
-                    time_str = option["time"].strftime("%H:%M:%S") if hasattr(option["time"], "strftime") else str(option["time"])
-                    available_options_str += f"- Дата: {date_str}, Час: {time_str}\n"
+                    available_options_str += f"- Дата: {date_str}, Час: {format_db_time(option['time'])}\n"
             
-            db_input.close()
-            db_output.close()
             raise HTTPException(
                 status_code=404, 
                 detail=f"Немає даних для вибраних параметрів: Тип: {metric_type}, Дата: {date}, Час: {time}. {available_options_str}"
             )
         
-        # Нормалізація та збереження кожного мікросервісу
-        processed_count = 0
-        for i, service_name in enumerate(service_names):
-            raw_values = raw_data[i]
-            if db_output.process_and_save_percentage_data(
-                service_name, metric_type, date, time, raw_values
-            ):
-                processed_count += 1
-        
-        # Закриття з'єднань
-        db_input.close()
-        db_output.close()
+        # Нормалізація всієї матриці однією операцією та збереження одним пакетом
+        normalized = normalize_to_percentage(window.values, metric_type)
+        processed_count = await repository.batch_save_processed_data([
+            (service_name, metric_type, date, time, values)
+            for service_name, values in zip(window.service_names, normalized)
+        ])
         
         return {
             "status": "success",
@@ -267,13 +174,12 @@ async def normalize_data_to_percentage(
         raise HTTPException(status_code=500, detail=f"Помилка при нормалізації даних: {str(e)}") 
 
 @router.get("/raw-data-options", response_model=AvailableOptions)
-async def get_raw_data_options():
+async def get_raw_data_options(repository: AsyncRepository = Depends(get_repository)):
     """
     Отримати доступні опції для сирих даних
     """
     try:
-        db_input = DBInput()
-        return await get_available_options()
+        return await get_available_options(repository)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Помилка при отриманні опцій: {str(e)}")
 
@@ -282,20 +188,19 @@ async def get_raw_metrics(
     metric_type: Optional[str] = Query(None, description="Тип метрики (CPU, RAM, CHANNEL)"),
     service_name: Optional[str] = Query(None, description="Назва сервісу"),
     date: Optional[str] = Query(None, description="Дата у форматі YYYY-MM-DD"),
-    time: Optional[str] = Query(None, description="Час у форматі HH:MM:SS")
+    time: Optional[str] = Query(None, description="Час у форматі HH:MM:SS"),
+    repository: AsyncRepository = Depends(get_repository)
 ):
     """
     Отримати сирі метрики з бази даних з можливістю фільтрації
     """
     try:
-        db = DBInput()
-        data = db.get_all_raw_metrics(
+        data = await repository.get_all_raw_metrics(
             metric_type=metric_type,
             service_name=service_name,
             date=date,
             time=time
         )
-        db.close()
         
         return data
 
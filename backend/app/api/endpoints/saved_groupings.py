@@ -4,27 +4,25 @@ from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 import sys
 import os
-import pymysql
 import json
 from datetime import datetime, date
-import numpy as np
 
 # Додавання шляху до кореню проекту
 sys.path.append(os.path.abspath("../.."))
 
-from shared.db_output import DBOutput
+from shared.db_input import format_db_time
+from shared.grouping_result import group_statistics, group_loads
+from ...executors import run_blocking
+from ...repository import AsyncRepository, get_repository
 
 router = APIRouter()
 
-# Ініціалізація підключення до БД
-def get_db_output():
-    try:
-        db_output = DBOutput()
-        yield db_output
-    finally:
-        db_output.close()
+def _load_json(value):
+    return json.loads(value) if isinstance(value, str) else value
 
 class GroupingData(BaseModel):
+    run_id: Optional[int] = None
+    version: Optional[int] = None
     date: str
     time: str
     metric_type: str
@@ -35,33 +33,27 @@ class GroupService(BaseModel):
     component_type: str
 
 @router.get("/groupings", response_model=List[GroupingData])
-async def get_groupings(db_output: DBOutput = Depends(get_db_output)):
+async def get_groupings(
+    limit: int = Query(100, ge=1, le=1000, description="Кількість записів на сторінці"),
+    offset: int = Query(0, ge=0, description="Зсув від початку списку"),
+    repository: AsyncRepository = Depends(get_repository)
+):
     """
     Отримує список збережених варіантів групування
     """
     try:
-        # Запит до БД для отримання списку збережених варіантів групування
-        query = """
-        SELECT 
-            date, 
-            time, 
-            metric_type, 
-            COUNT(DISTINCT group_id) AS num_groups
-        FROM grouping_results
-        GROUP BY date, time, metric_type
-        ORDER BY date DESC, time DESC
-        """
-        
-        db_output.cursor.execute(query)
-        results = db_output.cursor.fetchall()
+        # Запит до таблиці заголовків запусків замість агрегації по grouping_results
+        results = await repository.get_grouping_runs(limit=limit, offset=offset)
         
         # Перетворення результатів у формат відповіді
         groupings = []
         for row in results:
             date_str = row["date"].strftime("%Y-%m-%d") if isinstance(row["date"], date) else str(row["date"])
             groupings.append({
+                "run_id": row["run_id"],
+                "version": row["version"],
                 "date": date_str,
-                "time": str(row["time"]),
+                "time": format_db_time(row["time"]),
                 "metric_type": row["metric_type"],
                 "num_groups": row["num_groups"]
             })
@@ -76,25 +68,17 @@ async def get_groups(
     date: str = Query(..., description="Дата групування у форматі YYYY-MM-DD"),
     time: str = Query(..., description="Час групування"),
     metric_type: str = Query(..., description="Тип метрики"),
-    db_output: DBOutput = Depends(get_db_output)
+    repository: AsyncRepository = Depends(get_repository)
 ):
     """
     Отримує список груп для вибраного варіанту групування
     """
     try:
-        # Запит до БД для отримання груп
-        query = """
-        SELECT DISTINCT group_id
-        FROM grouping_results
-        WHERE date = %s AND time = %s AND metric_type = %s
-        ORDER BY group_id
-        """
-        
-        db_output.cursor.execute(query, (date, time, metric_type))
-        results = db_output.cursor.fetchall()
+        # Рядки останньої версії групування вікна (відсортовані за group_id)
+        results = await repository.get_grouping_rows(metric_type, date, time)
         
         # Перетворення результатів у формат відповіді
-        groups = [row["group_id"] for row in results]
+        groups = list(dict.fromkeys(row["group_id"] for row in results))
         
         return groups
     
@@ -107,22 +91,15 @@ async def get_services(
     time: str = Query(..., description="Час групування"),
     metric_type: str = Query(..., description="Тип метрики"),
     group_id: int = Query(..., description="ID групи"),
-    db_output: DBOutput = Depends(get_db_output)
+    repository: AsyncRepository = Depends(get_repository)
 ):
     """
     Отримує список мікросервісів для вибраної групи
     """
     try:
-        # Запит до БД для отримання мікросервісів
-        query = """
-        SELECT service_name, component_type
-        FROM grouping_results
-        WHERE date = %s AND time = %s AND metric_type = %s AND group_id = %s
-        ORDER BY service_name
-        """
-        
-        db_output.cursor.execute(query, (date, time, metric_type, group_id))
-        results = db_output.cursor.fetchall()
+        # Рядки групи з останньої версії групування вікна
+        rows = await repository.get_grouping_rows(metric_type, date, time)
+        results = [row for row in rows if row["group_id"] == group_id]
         
         # Перетворення результатів у формат відповіді
         services = []
@@ -143,28 +120,21 @@ async def get_group_load(
     time: str = Query(..., description="Час групування"),
     metric_type: str = Query(..., description="Тип метрики"),
     group_id: int = Query(..., description="ID групи"),
-    db_output: DBOutput = Depends(get_db_output)
+    repository: AsyncRepository = Depends(get_repository)
 ):
     """
     Отримує дані навантаження для вибраної групи
     """
     try:
-        # Запит до БД для отримання даних навантаження
-        query = """
-        SELECT service_name, component_type, load_data
-        FROM grouping_results
-        WHERE date = %s AND time = %s AND metric_type = %s AND group_id = %s
-        ORDER BY service_name
-        """
-        
-        db_output.cursor.execute(query, (date, time, metric_type, group_id))
-        results = db_output.cursor.fetchall()
+        # Рядки групи з останньої версії групування вікна
+        rows = await repository.get_grouping_rows(metric_type, date, time)
+        results = [row for row in rows if row["group_id"] == group_id]
         
         services_load = {}
         for row in results:
             service_name = row["service_name"]
             component_type = row["component_type"]
-            load_data = json.loads(row["load_data"]) if isinstance(row["load_data"], str) else row["load_data"]
+            load_data = _load_json(row["load_data"])
             
             services_load[service_name] = {
                 "component_type": component_type,
@@ -179,81 +149,67 @@ async def get_group_load(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Помилка при отриманні даних навантаження: {str(e)}")
 
+def _saved_statistics(results):
+    """
+    Статистика груп з рядків збереженого групування (збережені навантаження та стабільність)
+    """
+    # Групуємо результати по group_id
+    groups_data = {}
+    for row in results:
+        group_id = row["group_id"]
+        if group_id not in groups_data:
+            group_load = row["group_load"]
+            groups_data[group_id] = {
+                "services": [],
+                "total_load": _load_json(group_load),
+                "stability": row["stability_coefficient"]
+            }
+        
+        groups_data[group_id]["services"].append(row["service_name"])
+    
+    # Статистика всіх груп одним проходом по матриці навантаження
+    # (групи без збереженого навантаження мають нульове)
+    stats = group_statistics(group_loads([
+        [data["total_load"]] if data["total_load"] else [] for data in groups_data.values()
+    ]))
+    
+    statistics = []
+    for (group_id, data), mean_load, max_load in zip(
+        groups_data.items(), stats["mean"].tolist(), stats["peak"].tolist()
+    ):
+        cv = float(data["stability"]) if data["stability"] is not None else 0
+        
+        statistics.append({
+            "group_id": group_id,
+            "num_services": len(data["services"]),
+            "services": data["services"],
+            "mean_load": round(mean_load, 2),
+            "peak_load": round(max_load, 2),
+            "stability": round(cv, 2)
+        })
+    
+    return statistics
+
 @router.get("/statistics", response_model=Dict[str, Any])
 async def get_group_statistics(
     date: str = Query(..., description="Дата групування у форматі YYYY-MM-DD"),
     time: str = Query(..., description="Час групування"),
     metric_type: str = Query(..., description="Тип метрики"),
-    db_output: DBOutput = Depends(get_db_output)
+    repository: AsyncRepository = Depends(get_repository)
 ):
     """
     Отримує статистику для всіх груп
     """
     try:
-        # Запит до БД для отримання статистики всіх груп
-        query = """
-        SELECT 
-            group_id,
-            service_name, 
-            component_type, 
-            load_data,
-            stability_coefficient
-        FROM grouping_results
-        WHERE date = %s AND time = %s AND metric_type = %s
-        ORDER BY group_id, service_name
-        """
-        
-        db_output.cursor.execute(query, (date, time, metric_type))
-        results = db_output.cursor.fetchall()
+        # Навантаження та стабільність групи зберігаються під час запису
+        # результатів, тому тут лише читання рядків останньої версії
+        results = await repository.get_grouping_rows(metric_type, date, time)
         
         if not results:
             raise HTTPException(status_code=404, detail="Групи не знайдені")
         
-        # Групуємо результати по group_id
-        groups_data = {}
-        for row in results:
-            group_id = row["group_id"]
-            if group_id not in groups_data:
-                groups_data[group_id] = {
-                    "services": [],
-                    "loads": []
-                }
-            
-            service_name = row["service_name"]
-            component_type = row["component_type"]
-            load_data = json.loads(row["load_data"]) if isinstance(row["load_data"], str) else row["load_data"]
-            
-            groups_data[group_id]["services"].append({
-                "name": service_name,
-                "component_type": component_type
-            })
-            groups_data[group_id]["loads"].append(load_data)
-        
-        # Формуємо статистику для кожної групи
-        statistics = []
-        for group_id, data in groups_data.items():
-            service_loads = data["loads"]
-        total_load = np.sum(service_loads, axis=0).tolist() if service_loads else []
-        
-        # Обчислення статистики
-        if total_load:
-            mean_load = np.mean(total_load)
-            max_load = np.max(total_load)
-            std_dev = np.std(total_load)
-            cv = (std_dev / mean_load * 100) if mean_load > 0 else 0
-        else:
-            mean_load = 0
-            max_load = 0
-            cv = 0
-        
-            statistics.append({
-            "group_id": group_id,
-                "num_services": len(data["services"]),
-                "services": [s["name"] for s in data["services"]],
-            "mean_load": round(mean_load, 2),
-            "peak_load": round(max_load, 2),
-                "stability": round(cv, 2)
-            })
+        # Розбір збережених навантажень займає O(G*T), тому виконується поза циклом подій
+        statistics = await run_blocking(_saved_statistics, results)
         
         return {"statistics": statistics}
     
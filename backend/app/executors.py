@@ -0,0 +1,247 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from anyio import to_thread
+from shared.grouping_strategies import run_strategy
+from shared.grouping_sweep import sweep_grouping
+from shared.chart_rendering import render_chart, warm_up
+
+# Розмір пулу потоків для блокуючої роботи (БД, розбір рядів, очікування пулів процесів)
+BLOCKING_WORKERS = int(os.getenv("BLOCKING_WORKERS") or 16)
+# Кількість процесів для CPU-важкого групування (порожнє значення - за кількістю CPU)
+GROUPING_WORKERS = int(os.getenv("GROUPING_WORKERS") or os.cpu_count() or 1)
+# Кількість процесів побудови PNG-графіків
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS") or min(4, os.cpu_count() or 1))
+# Найбільша кількість графіків, що будуються або чекають у черзі пулу
+RENDER_QUEUE_LIMIT = int(os.getenv("RENDER_QUEUE_LIMIT") or RENDER_WORKERS * 4)
+
+
+class WaitStats:
+    """
+    Статистика очікування в черзі пулу за останні вимірювання
+    """
+    def __init__(self, size=1000):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=size)
+        self.total = 0
+
+    def add(self, wait_ms):
+        with self._lock:
+            self._samples.append(wait_ms)
+            self.total += 1
+
+    def snapshot(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            total = self.total
+        if not samples:
+            return {"count": total, "avg_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        return {
+            "count": total,
+            "avg_ms": round(sum(samples) / len(samples), 3),
+            "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+            "max_ms": round(samples[-1], 3),
+        }
+
+
+class RenderQueueFull(Exception):
+    """
+    Черга пулу побудови графіків заповнена (RENDER_QUEUE_LIMIT)
+    """
+
+
+thread_wait = WaitStats()
+process_wait = WaitStats()
+render_wait = WaitStats()
+render_time = WaitStats()
+
+_process_pool = None
+_process_lock = threading.Lock()
+_process_pending = 0
+
+_render_pool = None
+_render_lock = threading.Lock()
+_render_pending = 0
+_render_rejected = 0
+
+
+def configure_thread_pool():
+    """
+    Обмежує пул потоків, у якому виконується блокуюча робота (див. run_blocking)
+    """
+    to_thread.current_default_thread_limiter().total_tokens = BLOCKING_WORKERS
+
+
+async def run_blocking(function, *args, **kwargs):
+    """
+    Виконує блокуючу функцію в пулі потоків, не займаючи цикл подій
+
+    Фіксує час очікування на вільний потік пулу (від виклику до запуску функції).
+    """
+    submitted_at = perf_counter()
+
+    def call():
+        thread_wait.add((perf_counter() - submitted_at) * 1000)
+        return function(*args, **kwargs)
+
+    return await to_thread.run_sync(call)
+
+
+def _process_pool_executor():
+    global _process_pool
+    with _process_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=GROUPING_WORKERS)
+        return _process_pool
+
+
+def _timed_call(submitted_at, function, *args, **kwargs):
+    # Виконується в дочірньому процесі; perf_counter монотонний для всієї системи
+    wait_ms = (perf_counter() - submitted_at) * 1000
+    return wait_ms, function(*args, **kwargs)
+
+
+def _run_in_pool(function, *args, **kwargs):
+    """
+    Виконує функцію рівня модуля в пулі процесів і блокує лише поточний робочий потік
+    """
+    global _process_pending
+    pool = _process_pool_executor()
+
+    with _process_lock:
+        _process_pending += 1
+    try:
+        future = pool.submit(_timed_call, perf_counter(), function, *args, **kwargs)
+        wait_ms, result = future.result()
+    finally:
+        with _process_lock:
+            _process_pending -= 1
+
+    process_wait.add(wait_ms)
+    return result
+
+
+def group_in_pool(window, max_group_size, stability_threshold, strategy=None):
+    """
+    Виконує формування груп у пулі процесів
+
+    Args:
+        window (WindowMatrix): Матриця вікна
+        max_group_size (int): Максимальний розмір групи
+        stability_threshold (float): Поріг стабільності (%)
+        strategy (str, optional): Назва стратегії з реєстру (за замовчуванням GROUPING_STRATEGY)
+
+    Returns:
+        GroupingResult: Розпаковується як (groups, group_services, slot_sums)
+    """
+    return _run_in_pool(
+        run_strategy, window, strategy, max_group_size=max_group_size, stability_threshold=stability_threshold
+    )
+
+
+def sweep_in_pool(window, max_group_sizes, stability_thresholds):
+    """
+    Виконує перебір налаштувань групування (див. sweep_grouping) у пулі процесів
+    """
+    return _run_in_pool(sweep_grouping, window, max_group_sizes, stability_thresholds)
+
+
+def _render_pool_executor():
+    global _render_pool
+    with _render_lock:
+        if _render_pool is None:
+            # Кожен процес готує стиль і шрифти один раз під час запуску
+            _render_pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS, initializer=warm_up)
+        return _render_pool
+
+
+def warm_render_pool():
+    """
+    Запускає всі процеси побудови графіків заздалегідь (під час старту застосунку)
+    """
+    pool = _render_pool_executor()
+    for _ in range(RENDER_WORKERS):
+        pool.submit(int)
+
+
+def render_in_pool(kind, **data):
+    """
+    Будує PNG-графік (див. render_chart) у пулі процесів побудови графіків
+
+    Returns:
+        bytes: Вміст PNG
+
+    Raises:
+        RenderQueueFull: Якщо в черзі вже RENDER_QUEUE_LIMIT графіків
+    """
+    global _render_pending, _render_rejected
+    pool = _render_pool_executor()
+
+    with _render_lock:
+        if _render_pending >= RENDER_QUEUE_LIMIT:
+            _render_rejected += 1
+            raise RenderQueueFull("Черга побудови графіків переповнена")
+        _render_pending += 1
+    try:
+        future = pool.submit(_timed_call, perf_counter(), render_chart, kind, **data)
+        wait_ms, (png, render_ms) = future.result()
+    finally:
+        with _render_lock:
+            _render_pending -= 1
+
+    render_wait.add(wait_ms)
+    render_time.add(render_ms)
+    return png
+
+
+def executor_stats():
+    """
+    Поточна глибина черг і час очікування пулів потоків та процесів
+    """
+    limiter = to_thread.current_default_thread_limiter()
+    statistics = limiter.statistics()
+    with _process_lock:
+        pending = _process_pending
+    with _render_lock:
+        render_pending = _render_pending
+        render_rejected = _render_rejected
+
+    return {
+        "threads": {
+            "workers": int(limiter.total_tokens),
+            "busy": statistics.borrowed_tokens,
+            "queued": statistics.tasks_waiting,
+            "wait": thread_wait.snapshot(),
+        },
+        "processes": {
+            "workers": GROUPING_WORKERS,
+            "in_flight": pending,
+            "queued": max(0, pending - GROUPING_WORKERS),
+            "wait": process_wait.snapshot(),
+        },
+        "renders": {
+            "workers": RENDER_WORKERS,
+            "in_flight": render_pending,
+            "queued": max(0, render_pending - RENDER_WORKERS),
+            "limit": RENDER_QUEUE_LIMIT,
+            "rejected": render_rejected,
+            "wait": render_wait.snapshot(),
+            "render": render_time.snapshot(),
+        },
+    }
+
+
+def shutdown():
+    """
+    Зупиняє пули процесів під час завершення застосунку
+    """
+    global _process_pool, _render_pool
+    with _process_lock:
+        pool, _process_pool = _process_pool, None
+    with _render_lock:
+        render_pool, _render_pool = _render_pool, None
+    for pool in (pool, render_pool):
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,384 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from time import perf_counter
+import aiomysql
+from shared.db_input import (
+    WINDOW_QUERY, RAW_WINDOW_QUERY, RAW_WINDOWS_QUERY, WINDOW_FINGERPRINT_QUERY, RAW_FINGERPRINT_QUERY,
+    WINDOW_SHAPE_QUERY, LATEST_RUN_QUERY, GROUPING_RUNS_QUERY, GROUPING_ROWS_QUERY, LEGACY_GROUPING_ROWS_QUERY,
+    window_catalog_query, raw_metrics_query,
+    raw_metric_records, raw_windows_from_rows, window_from_rows, normalized_window_from_rows,
+    fingerprint_from_row
+)
+from shared.db_output import (
+    RUN_VERSION_QUERY, RUN_INSERT, RESULTS_INSERT, RUN_STATS_UPDATE, WINDOW_RUNS_QUERY,
+    LEGACY_RESULTS_DELETE, PROCESSED_UPSERT, WINDOW_REGISTER_QUERY, build_grouping_records,
+    processed_records, stale_run_ids
+)
+from shared.db_input import DBInput
+from shared.db_output import DBOutput
+from shared.normalization import get_memoized_window, memoize_window
+from shared.storage import is_sqlite
+from shared.window_catalog import invalidate_window_catalog
+from shared.window_store import WindowStore
+from .executors import run_blocking
+
+# Розмір пулу асинхронних з'єднань з MySQL на один процес
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 1))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 20))
+
+
+class AsyncRepository:
+    """
+    Асинхронний шар доступу до даних для бекенду
+
+    Виконує ті самі запити, що й DBInput/DBOutput, через пул aiomysql, тож
+    ендпоінти можуть чекати на БД без окремого потоку на запит. Розбір JSON
+    рядів і файлове сховище вікон виконуються в пулі потоків, щоб не займати
+    цикл подій. Синхронні класи залишаються для десктопного застосунку та скриптів.
+    """
+    def __init__(self, pool, window_store=None):
+        self.pool = pool
+        self.window_store = window_store
+        self.keep_versions = max(1, int(os.getenv('GROUPING_KEEP_VERSIONS', 1)))
+        self.store_processed = os.getenv('STORE_PROCESSED', '1') == '1'
+        # Як у DBInput: без запису оброблених рядів вікна обчислюються з сирих даних
+        self.normalize_on_read = os.getenv('NORMALIZE_ON_READ', '0') == '1' or not self.store_processed
+
+    @classmethod
+    async def create(cls):
+        """
+        Створює пул з'єднань з параметрів середовища DB_*
+        """
+        pool = await aiomysql.create_pool(
+            host=os.getenv('DB_HOST', 'localhost'),
+            user=os.getenv('DB_USER', 'root'),
+            password=os.getenv('DB_PASSWORD', 'root'),
+            db=os.getenv('DB_NAME', 'diploma'),
+            port=int(os.getenv('DB_PORT', 3306)),
+            minsize=DB_POOL_MIN,
+            maxsize=DB_POOL_MAX,
+            autocommit=True,
+            cursorclass=aiomysql.DictCursor
+        )
+        return cls(pool, WindowStore.from_env())
+
+    async def close(self):
+        self.pool.close()
+        await self.pool.wait_closed()
+
+    async def _fetchall(self, query, params=()):
+        async with self.pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(query, params)
+                return await cursor.fetchall()
+
+    async def _fetchone(self, query, params=()):
+        async with self.pool.acquire() as connection:
+            async with connection.cursor() as cursor:
+                await cursor.execute(query, params)
+                return await cursor.fetchone()
+
+    @asynccontextmanager
+    async def _snapshot(self):
+        """
+        Курсор, усі читання якого бачать один знімок БД (аналог storage.read_snapshot)
+        """
+        async with self.pool.acquire() as connection:
+            await connection.begin()
+            try:
+                async with connection.cursor() as cursor:
+                    yield cursor
+            finally:
+                await connection.commit()
+
+    # --- Вікна метрик ---
+
+    async def get_window_matrix(self, metric_type, date, time):
+        """
+        Аналог DBInput.get_window_matrix: читання через локальне сховище вікон,
+        інакше один запит до processed_metrics або нормалізація сирих даних;
+        відбиток вікна читається з того ж знімка БД, що й ряди
+        """
+        if self.normalize_on_read:
+            return await self.get_normalized_window(metric_type, date, time)
+
+        params = (metric_type, date, time)
+        async with self._snapshot() as cursor:
+            await cursor.execute(WINDOW_FINGERPRINT_QUERY, params)
+            fingerprint = fingerprint_from_row(await cursor.fetchone())
+            if self.window_store is not None:
+                window = await run_blocking(self.window_store.load, metric_type, date, time, fingerprint)
+                if window is not None:
+                    return window
+
+            await cursor.execute(WINDOW_QUERY, params)
+            rows = await cursor.fetchall()
+
+        window = await run_blocking(window_from_rows, rows, metric_type, date, time, fingerprint)
+
+        if self.window_store is not None and window:
+            await run_blocking(self.window_store.save, window, fingerprint)
+
+        if not window:
+            return await self.get_normalized_window(metric_type, date, time)
+
+        return window
+
+    async def get_normalized_window(self, metric_type, date, time):
+        """
+        Аналог DBInput.get_normalized_window (спільна пам'ять нормалізованих вікон)
+        """
+        params = (metric_type, date, time)
+        async with self._snapshot() as cursor:
+            await cursor.execute(RAW_FINGERPRINT_QUERY, params)
+            fingerprint = fingerprint_from_row(await cursor.fetchone())
+            key = (metric_type, str(date), str(time), fingerprint)
+            window = get_memoized_window(key)
+            if window is not None:
+                return window
+
+            await cursor.execute(RAW_WINDOW_QUERY, params)
+            rows = await cursor.fetchall()
+
+        window = await run_blocking(normalized_window_from_rows, rows, metric_type, date, time, fingerprint)
+        if window:
+            memoize_window(key, window)
+
+        return window
+
+    async def get_window_fingerprint(self, metric_type, date, time):
+        row = await self._fetchone(WINDOW_FINGERPRINT_QUERY, (metric_type, date, time))
+        return fingerprint_from_row(row)
+
+    async def get_window_shape(self, metric_type, date, time):
+        """
+        Аналог DBInput.get_window_shape: (n мікросервісів, T слотів) без передачі рядів
+        """
+        tables = ["raw_metrics"] if self.normalize_on_read else ["processed_metrics", "raw_metrics"]
+        for table in tables:
+            row = await self._fetchone(WINDOW_SHAPE_QUERY.format(table=table), (metric_type, date, time))
+            if row["services"]:
+                return int(row["services"]), int(row["slots"])
+        return 0, 0
+
+    async def get_raw_windows(self, date, time, metric_types=("CPU", "RAM", "CHANNEL")):
+        """
+        Аналог DBInput.get_raw_windows: сирі вікна кількох метрик одним запитом
+        """
+        metric_types = list(metric_types)
+        query = RAW_WINDOWS_QUERY.format(metric_types=", ".join(["%s"] * len(metric_types)))
+
+        rows = await self._fetchall(query, metric_types + [date, time])
+        return await run_blocking(raw_windows_from_rows, rows, date, time)
+
+    async def get_all_raw_metrics(self, metric_type=None, service_name=None, date=None, time=None):
+        query, params = raw_metrics_query(metric_type, service_name, date, time)
+        return await run_blocking(raw_metric_records, await self._fetchall(query, params))
+
+    async def batch_save_processed_data(self, data_list, normalization_type="percentage"):
+        """
+        Аналог DBOutput.batch_save_processed_data: upsert рядів і позначка вікон
+        у каталозі в одній транзакції
+
+        Returns:
+            int: Кількість збережених рядів
+        """
+        if not data_list:
+            return 0
+
+        records = await run_blocking(processed_records, data_list, normalization_type)
+        async with self.pool.acquire() as connection:
+            await connection.begin()
+            try:
+                async with connection.cursor() as cursor:
+                    if self.store_processed:
+                        await cursor.executemany(PROCESSED_UPSERT, records)
+                    for window in {(row[1], row[2], row[3]) for row in records}:
+                        await cursor.execute(WINDOW_REGISTER_QUERY.format(flag="has_processed"), window)
+                await connection.commit()
+            except BaseException:
+                await connection.rollback()
+                raise
+
+        invalidate_window_catalog()
+        return len(records)
+
+    # --- Каталог ---
+
+    async def get_window_catalog(self, metric_type=None, date=None, updated_since=None):
+        query, params = window_catalog_query(metric_type, date, updated_since)
+        return await self._fetchall(query, params)
+
+    # --- Збережені групування ---
+
+    async def get_grouping_runs(self, limit=100, offset=0):
+        return await self._fetchall(GROUPING_RUNS_QUERY, (limit, offset))
+
+    async def get_latest_run_id(self, metric_type, date, time):
+        row = await self._fetchone(LATEST_RUN_QUERY, (metric_type, date, time))
+        return row["run_id"] if row else None
+
+    async def get_grouping_rows(self, metric_type=None, date=None, time=None, run_id=None):
+        """
+        Аналог DBInput.get_grouping_rows: рядки останньої (або заданої) версії групування
+        """
+        if run_id is None:
+            run_id = await self.get_latest_run_id(metric_type, date, time)
+
+        if run_id is not None:
+            return await self._fetchall(GROUPING_ROWS_QUERY, (run_id,))
+
+        # Записи, збережені до появи заголовків запусків
+        return await self._fetchall(LEGACY_GROUPING_ROWS_QUERY, (date, time, metric_type))
+
+    async def save_grouping_results(self, result, service_names, metric_type, date, time,
+                                    max_group_size=None, stability_threshold=None, grouping_ms=None,
+                                    fingerprint=None, keep_versions=None):
+        """
+        Аналог DBOutput.save_grouping_results: нова версія вікна та очищення
+        застарілих версій в одній транзакції
+
+        Returns:
+            tuple: (кількість збережених записів, run_id)
+        """
+        if not len(result):
+            return 0, None
+
+        keep_versions = keep_versions if keep_versions is not None else self.keep_versions
+        save_started = perf_counter()
+
+        async with self.pool.acquire() as connection:
+            await connection.begin()
+            try:
+                async with connection.cursor() as cursor:
+                    await cursor.execute(RUN_VERSION_QUERY, (metric_type, date, time))
+                    version = (await cursor.fetchone())["version"] + 1
+
+                    await cursor.execute(RUN_INSERT, (
+                        metric_type, date, time, version, max_group_size, stability_threshold,
+                        len(result), len(service_names), grouping_ms, fingerprint
+                    ))
+                    run_id = cursor.lastrowid
+
+                    records = await run_blocking(
+                        build_grouping_records, result, service_names, run_id, metric_type, date, time
+                    )
+                    await cursor.executemany(RESULTS_INSERT, records)
+
+                    save_ms = (perf_counter() - save_started) * 1000
+                    await cursor.execute(RUN_STATS_UPDATE, (len(records), save_ms, run_id))
+
+                    await cursor.execute(WINDOW_RUNS_QUERY, (metric_type, date, time))
+                    stale_ids = stale_run_ids(await cursor.fetchall(), keep_versions)
+                    if stale_ids:
+                        placeholders = ", ".join(["%s"] * len(stale_ids))
+                        await cursor.execute(
+                            f"DELETE FROM grouping_results WHERE run_id IN ({placeholders})", stale_ids
+                        )
+                        await cursor.execute(
+                            f"DELETE FROM grouping_runs WHERE run_id IN ({placeholders})", stale_ids
+                        )
+                    await cursor.execute(LEGACY_RESULTS_DELETE, (metric_type, date, time))
+
+                await connection.commit()
+            except BaseException:
+                await connection.rollback()
+                raise
+
+        return len(records), run_id
+
+
+class ThreadedRepository:
+    """
+    Інтерфейс AsyncRepository поверх синхронних DBInput/DBOutput
+
+    Використовується для вбудованого SQLite (DB_BACKEND=sqlite), для якого
+    немає асинхронного драйвера: кожен виклик виконується з власним
+    з'єднанням у пулі потоків.
+    """
+    async def _read(self, method, *args, **kwargs):
+        def call():
+            db_input = DBInput()
+            try:
+                return getattr(db_input, method)(*args, **kwargs)
+            finally:
+                db_input.close()
+        return await run_blocking(call)
+
+    async def get_window_matrix(self, metric_type, date, time):
+        return await self._read("get_window_matrix", metric_type, date, time)
+
+    async def get_normalized_window(self, metric_type, date, time):
+        return await self._read("get_normalized_window", metric_type, date, time)
+
+    async def get_window_fingerprint(self, metric_type, date, time):
+        return await self._read("get_window_fingerprint", metric_type, date, time)
+
+    async def get_window_shape(self, metric_type, date, time):
+        return await self._read("get_window_shape", metric_type, date, time)
+
+    async def get_raw_windows(self, date, time, metric_types=("CPU", "RAM", "CHANNEL")):
+        return await self._read("get_raw_windows", date, time, metric_types)
+
+    async def get_all_raw_metrics(self, metric_type=None, service_name=None, date=None, time=None):
+        return await self._read("get_all_raw_metrics", metric_type, service_name, date, time)
+
+    async def get_window_catalog(self, metric_type=None, date=None, updated_since=None):
+        return await self._read("get_window_catalog", metric_type, date, updated_since)
+
+    async def get_grouping_runs(self, limit=100, offset=0):
+        return await self._read("get_grouping_runs", limit, offset)
+
+    async def get_latest_run_id(self, metric_type, date, time):
+        return await self._read("get_latest_run_id", metric_type, date, time)
+
+    async def get_grouping_rows(self, metric_type=None, date=None, time=None, run_id=None):
+        return await self._read("get_grouping_rows", metric_type, date, time, run_id)
+
+    async def batch_save_processed_data(self, data_list, normalization_type="percentage"):
+        def call():
+            db_output = DBOutput()
+            try:
+                return db_output.batch_save_processed_data(data_list, normalization_type)
+            finally:
+                db_output.close()
+        return await run_blocking(call)
+
+    async def save_grouping_results(self, *args, **kwargs):
+        def call():
+            db_output = DBOutput()
+            try:
+                return db_output.save_grouping_results(*args, **kwargs), db_output.last_run_id
+            finally:
+                db_output.close()
+        return await run_blocking(call)
+
+    async def close(self):
+        pass
+
+
+_repository = None
+_repository_lock = asyncio.Lock()
+
+
+async def get_repository():
+    """
+    Залежність FastAPI: спільний для процесу репозиторій (пул створюється ліниво)
+    """
+    global _repository
+    if _repository is None:
+        async with _repository_lock:
+            if _repository is None:
+                _repository = ThreadedRepository() if is_sqlite() else await AsyncRepository.create()
+    return _repository
+
+
+async def close_repository():
+    """
+    Закриває пул з'єднань під час завершення застосунку
+    """
+    global _repository
+    if _repository is not None:
+        repository, _repository = _repository, None
+        await repository.close()
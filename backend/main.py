@@ -35,6 +35,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+from app import executors
+from app.admission import admission_stats
+from app.repository import close_repository
+
+@app.on_event("startup")
+async def configure_executors():
+    executors.configure_thread_pool()
+    executors.warm_render_pool()
+
+@app.on_event("shutdown")
+async def shutdown_executors():
+    executors.shutdown()
+    await close_repository()
+
 @app.get("/")
 async def root():
     return {"message": "Мікросервіс Групування API працює", "environment": environment}
@@ -43,6 +57,14 @@ async def root():
 async def health_check():
     return {"status": "ok", "environment": environment}
 
+@app.get("/health/executors")
+async def executors_health():
+    """
+    Глибина черг і час очікування пулів потоків (БД), процесів групування та побудови
+    графіків (з часом побудови), а також стан бюджету допуску запитів групування
+    """
+    return {**executors.executor_stats(), "admission": admission_stats()}
+
 # Підключення маршрутів API
 from app.api.routes import router
 app.include_router(router, prefix="/api")
@@ -1,15 +1,213 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
-import matplotlib.pyplot as plt
+from matplotlib import colormaps
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import datetime
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+import queue
+import threading
+from collections import OrderedDict
+from time import perf_counter
 from typing import List, Dict, Any, Tuple
+import numpy as np
 
-from shared.db_input import DBInput
+from shared.db_input import DBInput, format_db_time
 from shared.db_output import DBOutput
-from shared.group_finder import form_multiple_knapsack_groups, split_microservice_load
+from shared.group_finder import split_microservice_load, saved_grouping_result, GroupingCancelled
+from shared.grouping_strategies import STRATEGIES, get_strategy, run_strategy
+from shared.grouping_sweep import CandidateCache
 from shared.visualization import Visualizer
+from shared.window_catalog import WindowIndex
+
+# Межі повзунка порогу стабільності (%); кеш кандидатів будується для верхньої межі
+LIVE_THRESHOLD_RANGE = (5.0, 50.0)
+# Кількість вікон, для яких зберігаються оцінені кандидати
+LIVE_CACHE_WINDOWS = 4
+# Затримка (мс) перегрупування після останньої зміни параметрів
+LIVE_UPDATE_DELAY_MS = 150
+# Інтервал (мс) опитування подій фонового групування та завантаження каталогу
+WORKER_POLL_MS = 100
+# Інтервал (мс) інкрементального оновлення каталогу вікон
+CATALOG_REFRESH_MS = 30000
+
+
+class GroupingWorker(threading.Thread):
+    """
+    Фоновий потік групування: читання вікна з БД, формування груп і збереження
+
+    Потік не звертається до віджетів Tk: події ("progress", fraction, message),
+    ("done", window, result, records_count), ("empty",), ("cancelled",) та
+    ("error", exception) складаються в чергу events, яку головний потік
+    опитує через after(). Скасування перевіряється перед кожним кроком
+    групування (див. knapsack_grouping, progress); збереження в БД не
+    переривається. Потік працює з власними з'єднаннями з БД.
+    """
+    def __init__(self, metric_type, date, time, strategy, max_group_size, stability_threshold):
+        super().__init__(daemon=True)
+        self.metric_type = metric_type
+        self.date = date
+        self.time = time
+        self.strategy = strategy
+        self.max_group_size = max_group_size
+        self.stability_threshold = stability_threshold
+        self.events = queue.Queue()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _progress(self, fraction, message):
+        if self._cancel.is_set():
+            raise GroupingCancelled()
+        self.events.put(("progress", fraction, message))
+
+    def _grouping_progress(self, fraction, message):
+        # Групування займає шкалу між читанням даних і збереженням
+        self._progress(0.05 + 0.85 * fraction, message)
+
+    def run(self):
+        try:
+            db_input = DBInput()
+            db_output = None
+            try:
+                db_output = DBOutput()
+                self._progress(0.0, "Отримання даних з бази даних...")
+                window = db_input.get_window_matrix(self.metric_type, self.date, self.time)
+                if not window:
+                    self.events.put(("empty",))
+                    return
+                
+                started = perf_counter()
+                result = run_strategy(
+                    window, self.strategy, max_group_size=self.max_group_size,
+                    stability_threshold=self.stability_threshold, progress=self._grouping_progress
+                )
+                grouping_ms = (perf_counter() - started) * 1000
+                
+                self._progress(0.9, "Збереження результатів у базу даних...")
+                records_count = db_output.save_grouping_results(
+                    result,
+                    window.service_names,
+                    self.metric_type,
+                    self.date,
+                    self.time,
+                    max_group_size=self.max_group_size,
+                    stability_threshold=self.stability_threshold,
+                    grouping_ms=grouping_ms,
+                    fingerprint=window.fingerprint
+                )
+                self.events.put(("done", window, result, records_count))
+            finally:
+                db_input.close()
+                if db_output is not None:
+                    db_output.close()
+        except GroupingCancelled:
+            self.events.put(("cancelled",))
+        except Exception as e:
+            self.events.put(("error", e))
+
+class CandidateCacheBuilder(threading.Thread):
+    """
+    Фонова оцінка кандидатів вікна (CandidateCache) для живого оновлення
+
+    Результат передається через чергу events: ("cache", key, cache) або
+    ("error", exception). Потік не звертається до віджетів Tk і до БД.
+    """
+    def __init__(self, key, window, max_group_size, stability_threshold):
+        super().__init__(daemon=True)
+        self.key = key
+        self.window = window
+        self.max_group_size = max_group_size
+        self.stability_threshold = stability_threshold
+        self.events = queue.Queue()
+
+    def run(self):
+        try:
+            cache = CandidateCache(self.window, self.max_group_size, self.stability_threshold)
+            self.events.put(("cache", self.key, cache))
+        except Exception as e:
+            self.events.put(("error", e))
+
+
+class CatalogLoader(threading.Thread):
+    """
+    Фонове читання каталогу вікон у WindowIndex (повне або інкрементальне)
+
+    Після завершення потоку головний потік читає changed - кількість змінених
+    вікон - або error. Потік працює з власним з'єднанням з БД.
+    """
+    def __init__(self, catalog):
+        super().__init__(daemon=True)
+        self.catalog = catalog
+        self.changed = 0
+        self.error = None
+
+    def run(self):
+        try:
+            db_input = DBInput()
+            try:
+                self.changed = self.catalog.refresh(db_input)
+            finally:
+                db_input.close()
+        except Exception as e:
+            self.error = e
+
+
+class ChartPanel:
+    """
+    Графік вкладки: Figure і FigureCanvasTkAgg створюються один раз
+    
+    Фігура не реєструється в pyplot, тому не накопичується між запусками
+    групування; під час оновлення змінюються дані наявних елементів (artists),
+    а полотно перемальовується через draw_idle.
+    """
+    def __init__(self, master, figsize=(10, 6)):
+        self.figure = Figure(figsize=figsize)
+        self.ax = self.figure.add_subplot(111)
+        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.artists = []
+        self._message = None
+    
+    def update_lines(self, series, labels, **style):
+        """
+        Оновлює лінії графіка: наявні отримують нові дані, бракуючі додаються, зайві прибираються
+        """
+        labels = list(labels)
+        for i, (values, label) in enumerate(zip(series, labels)):
+            slots = np.arange(len(values))
+            if i < len(self.artists):
+                self.artists[i].set_data(slots, values)
+                self.artists[i].set_label(label)
+            else:
+                self.artists.append(self.ax.plot(slots, values, label=label, **style)[0])
+        
+        for line in self.artists[len(labels):]:
+            line.remove()
+        del self.artists[len(labels):]
+        self.ax.relim()
+        self.ax.autoscale_view()
+    
+    def show_message(self, text):
+        """
+        Показує повідомлення замість даних (очищує осі); None прибирає повідомлення
+        """
+        if self._message is not None and self._message.axes is not None:
+            self._message.remove()
+        self._message = None
+        if text:
+            self.ax.clear()
+            self.artists = []
+            self._message = self.ax.text(0.5, 0.5, text, ha='center', va='center', transform=self.ax.transAxes)
+    
+    def redraw(self):
+        self.canvas.draw_idle()
+    
+    def close(self):
+        self.canvas.get_tk_widget().destroy()
+        self.figure.clear()
+
 
 class MicroserviceGroupingApp:
     """
@@ -33,9 +231,25 @@ class MicroserviceGroupingApp:
         self.available_times = []
         self.microservices = []
         self.service_names = []
-        self.groups = []
-        self.group_services = []
-        self.slot_sums = []
+        self.result = None
+        
+        # Оцінені кандидати вікон для живого оновлення (ключ - метрика, дата, час)
+        self.candidate_caches = OrderedDict()
+        self.cache_builder = None
+        self._live_job = None
+        self._live_pending = False
+        # Фонове групування, що виконується (GroupingWorker)
+        self.worker = None
+        # Каталог вікон у пам'яті: вибір метрики й дати не звертається до БД
+        self.catalog = WindowIndex()
+        self.catalog_loader = None
+        
+        # Графіки вкладок (ключ - фрейм) і вкладки, що вже показують поточний результат
+        self.charts = {}
+        self.rendered_tabs = set()
+        self.stats_text = None
+        self.split_combo = None
+        self.group_combo = None
         
         # Ініціалізація об'єктів
         self.db_input = DBInput()
@@ -44,9 +258,11 @@ class MicroserviceGroupingApp:
         
         # Створення інтерфейсу
         self._create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
         
-        # Завантаження доступних дат
-        self._load_available_dates()
+        # Завантаження каталогу доступних дат і часів у фоні
+        self.status_var.set("Завантаження доступних дат...")
+        self._refresh_catalog()
     
     def _create_widgets(self):
         """
@@ -93,6 +309,27 @@ class MicroserviceGroupingApp:
                                              textvariable=self.stability_threshold_var, width=5)
         stability_threshold_spin.grid(row=1, column=3, sticky=tk.W, padx=5, pady=5)
         
+        # Стратегія групування
+        ttk.Label(params_frame, text="Стратегія:").grid(row=2, column=0, sticky=tk.W, padx=5, pady=5)
+        self.strategy_var = tk.StringVar(value=get_strategy().name)
+        strategy_combo = ttk.Combobox(params_frame, textvariable=self.strategy_var, values=list(STRATEGIES),
+                                      state="readonly")
+        strategy_combo.grid(row=2, column=1, sticky=tk.W, padx=5, pady=5)
+        strategy_combo.bind("<<ComboboxSelected>>", self._schedule_live_update)
+        
+        # Повзунок порогу: після першого запуску групи перераховуються з кешу кандидатів
+        ttk.Label(params_frame, text="Поріг (живе оновлення):").grid(row=2, column=2, sticky=tk.W, padx=5, pady=5)
+        threshold_scale = ttk.Scale(
+            params_frame, from_=LIVE_THRESHOLD_RANGE[0], to=LIVE_THRESHOLD_RANGE[1], orient=tk.HORIZONTAL,
+            variable=self.stability_threshold_var, length=240,
+            command=lambda value: self.stability_threshold_var.set(round(float(value) * 2) / 2)
+        )
+        threshold_scale.grid(row=2, column=3, columnspan=3, sticky=tk.W + tk.E, padx=5, pady=5)
+        
+        # Зміна розміру групи чи порогу (повзунком або в полі) перегруповує без запуску
+        self.group_size_var.trace_add("write", self._schedule_live_update)
+        self.stability_threshold_var.trace_add("write", self._schedule_live_update)
+        
         # Кнопка запуску групування
         self.run_button = ttk.Button(params_frame, text="Запустити групування", command=self._run_grouping)
         self.run_button.grid(row=1, column=4, sticky=tk.E, padx=5, pady=5)
@@ -131,6 +368,17 @@ class MicroserviceGroupingApp:
         self.notebook.add(self.tab_base_peak, text="Базові/пікові компоненти")
         self.notebook.add(self.tab_load_distribution, text="Розподіл навантаження")
         
+        # Вкладки малюються під час першого відкриття
+        self.tab_renderers = {
+            str(self.tab_microservices): self._render_microservices_tab,
+            str(self.tab_group_load): self._render_group_load_tab,
+            str(self.tab_stability): self._render_stability_tab,
+            str(self.tab_statistics): self._render_statistics_tab,
+            str(self.tab_base_peak): self._render_base_peak_tab,
+            str(self.tab_load_distribution): self._render_load_distribution_tab,
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", self._render_selected_tab)
+        
         # Фрейм для статусу
         status_frame = ttk.Frame(main_frame)
         status_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -138,30 +386,62 @@ class MicroserviceGroupingApp:
         # Статус
         self.status_var = tk.StringVar(value="Готовий до роботи")
         ttk.Label(status_frame, textvariable=self.status_var).pack(side=tk.LEFT)
+        
+        # Хід фонового групування та його скасування
+        self.cancel_button = ttk.Button(status_frame, text="Скасувати", command=self._cancel_grouping,
+                                        state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.RIGHT, padx=5)
+        self.progress_var = tk.DoubleVar(value=0.0)
+        self.progress_bar = ttk.Progressbar(status_frame, variable=self.progress_var, maximum=100, length=200)
+        self.progress_bar.pack(side=tk.RIGHT, padx=5)
     
-    def _load_available_dates(self):
+    def _refresh_catalog(self):
         """
-        Завантаження доступних дат з бази даних
+        Запускає фонове оновлення каталогу вікон
         """
-        try:
-            self.status_var.set("Завантаження доступних дат...")
-            
-            # Отримання списку доступних дат
-            query = "SELECT DISTINCT date FROM processed_metrics ORDER BY date"
-            self.db_input.cursor.execute(query)
-            results = self.db_input.cursor.fetchall()
-            
-            self.available_dates = [row["date"].strftime("%Y-%m-%d") for row in results]
-            self.date_combo["values"] = self.available_dates
-            
-            if self.available_dates:
-                self.date_var.set(self.available_dates[0])
-                self._on_date_selected()
-            
+        if self.catalog_loader is not None and self.catalog_loader.is_alive():
+            return
+        self.catalog_loader = CatalogLoader(self.catalog)
+        self.catalog_loader.start()
+        self.root.after(WORKER_POLL_MS, self._poll_catalog)
+    
+    def _poll_catalog(self):
+        """
+        Оновлює списки дат і часів після завершення фонового читання каталогу
+        """
+        loader = self.catalog_loader
+        if loader.is_alive():
+            self.root.after(WORKER_POLL_MS, self._poll_catalog)
+            return
+        
+        first_load = not self.available_dates
+        if loader.error is not None:
+            # Помилка періодичного оновлення не перериває роботу з уже завантаженим каталогом
+            if first_load:
+                messagebox.showerror("Помилка", f"Помилка при завантаженні доступних дат: {loader.error}")
+                self.status_var.set("Помилка при завантаженні доступних дат")
+        elif loader.changed or first_load:
+            self._load_available_dates(report=first_load)
+        
+        self.root.after(CATALOG_REFRESH_MS, self._refresh_catalog)
+    
+    def _load_available_dates(self, report=True):
+        """
+        Заповнення списку доступних дат з каталогу вікон
+        
+        Args:
+            report: Показати кількість знайдених дат у рядку статусу
+        """
+        self.available_dates = self.catalog.dates(self.metric_var.get())
+        self.date_combo["values"] = self.available_dates
+        
+        # Вибрана дата зберігається, якщо вона є для поточної метрики
+        if self.date_var.get() not in self.available_dates:
+            self.date_var.set(self.available_dates[0] if self.available_dates else "")
+        self._on_date_selected(report=False)
+        
+        if report:
             self.status_var.set(f"Знайдено {len(self.available_dates)} доступних дат")
-        except Exception as e:
-            messagebox.showerror("Помилка", f"Помилка при завантаженні доступних дат: {e}")
-            self.status_var.set("Помилка при завантаженні доступних дат")
     
     def _on_metric_selected(self, event=None):
         """
@@ -170,551 +450,588 @@ class MicroserviceGroupingApp:
         # При зміні типу метрики, оновлюємо доступні дати
         self._load_available_dates()
     
-    def _on_date_selected(self, event=None):
+    def _on_date_selected(self, event=None, report=True):
         """
         Обробник події вибору дати
         """
-        try:
-            self.status_var.set("Завантаження доступних часів...")
-            
-            # Отримання списку доступних часів для вибраної дати
-            query = "SELECT DISTINCT time FROM processed_metrics WHERE date = %s ORDER BY time"
-            self.db_input.cursor.execute(query, (self.date_var.get(),))
-            results = self.db_input.cursor.fetchall()
-            
-            # Конвертація timedelta в рядок формату HH:MM:SS
-            self.available_times = []
-            for row in results:
-                # Перевірка типу
-                if isinstance(row["time"], datetime.timedelta):
-                    # Конвертація timedelta в секунди
-                    total_seconds = int(row["time"].total_seconds())
-                    hours, remainder = divmod(total_seconds, 3600)
-                    minutes, seconds = divmod(remainder, 60)
-                    time_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                    self.available_times.append(time_str)
-                else:
-                    # Якщо це не timedelta, спробуємо використати strftime
-                    self.available_times.append(row["time"].strftime("%H:%M:%S"))
-            
-            self.time_combo["values"] = self.available_times
-            
-            if self.available_times:
-                self.time_var.set(self.available_times[0])
-            
+        self.available_times = self.catalog.times(self.metric_var.get(), self.date_var.get())
+        self.time_combo["values"] = self.available_times
+        
+        if self.time_var.get() not in self.available_times:
+            self.time_var.set(self.available_times[0] if self.available_times else "")
+        
+        if report:
             self.status_var.set(f"Знайдено {len(self.available_times)} доступних часів")
-        except Exception as e:
-            messagebox.showerror("Помилка", f"Помилка при завантаженні доступних часів: {e}")
-            self.status_var.set("Помилка при завантаженні доступних часів")
     
     def _run_grouping(self):
         """
-        Запуск процесу групування мікросервісів
+        Запуск процесу групування мікросервісів у фоновому потоці
         """
+        # Перевірка вибору параметрів
+        if not self.date_var.get() or not self.time_var.get():
+            messagebox.showwarning("Попередження", "Виберіть дату та час")
+            return
+        
+        if self.worker is not None and self.worker.is_alive():
+            return
+        
         try:
-            # Перевірка вибору параметрів
-            if not self.date_var.get() or not self.time_var.get():
-                messagebox.showwarning("Попередження", "Виберіть дату та час")
-                return
-            
-            self.status_var.set("Отримання даних з бази даних...")
-            
-            # Отримання даних з бази даних
-            metric_type = self.metric_var.get()
-            date = self.date_var.get()
-            time = self.time_var.get()
-            
-            self.microservices, self.service_names = self.db_input.get_data_for_algorithm(
-                metric_type, date, time
-            )
-            
-            if not self.microservices:
+            max_group_size = self.group_size_var.get()
+            stability_threshold = self.stability_threshold_var.get()
+        except tk.TclError:
+            messagebox.showwarning("Попередження", "Некоректні параметри групування")
+            return
+        
+        # Живе оновлення не перегруповує попереднє вікно, поки виконується запуск
+        if self._live_job is not None:
+            self.root.after_cancel(self._live_job)
+            self._live_job = None
+        self._live_pending = False
+        
+        self.worker = GroupingWorker(
+            self.metric_var.get(), self.date_var.get(), self.time_var.get(), self.strategy_var.get(),
+            max_group_size, stability_threshold
+        )
+        self.run_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.progress_var.set(0.0)
+        self.worker.start()
+        self.root.after(WORKER_POLL_MS, self._poll_worker)
+    
+    def _cancel_grouping(self):
+        """
+        Запит на скасування фонового групування
+        """
+        if self.worker is not None and self.worker.is_alive():
+            self.worker.cancel()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status_var.set("Скасування групування...")
+    
+    def _poll_worker(self):
+        """
+        Обробляє події фонового групування в головному потоці
+        """
+        worker = self.worker
+        while True:
+            try:
+                event = worker.events.get_nowait()
+            except queue.Empty:
+                break
+            
+            kind = event[0]
+            if kind == "progress":
+                self.progress_var.set(event[1] * 100)
+                self.status_var.set(event[2])
+                continue
+            
+            self._finish_worker()
+            if kind == "done":
+                _, window, result, records_count = event
+                self.microservices = window
+                self.service_names = window.service_names
+                self.result = result
+                
+                if records_count > 0:
+                    self.status_var.set(f"Сформовано {len(result)} груп (стратегія {result.strategy}, "
+                                        f"рушій {result.engine}). Збережено {records_count} записів у базу даних.")
+                else:
+                    self.status_var.set(f"Сформовано {len(result)} груп. Помилка при збереженні в базу даних.")
+                
+                # Відображення результатів
+                self._show_results()
+                # Кандидати для живого оновлення оцінюються у фоні одразу після запуску
+                if get_strategy(worker.strategy).serves_from_cache(
+                        window.values, worker.max_group_size, worker.stability_threshold):
+                    self._build_candidate_cache(worker.max_group_size)
+            elif kind == "empty":
                 messagebox.showwarning("Попередження", "Немає даних для вибраних параметрів")
                 self.status_var.set("Немає даних для вибраних параметрів")
-                return
-            
-            self.status_var.set(f"Отримано дані для {len(self.microservices)} мікросервісів")
-            
-            # Формування груп
+            elif kind == "cancelled":
+                self.status_var.set("Групування скасовано")
+            else:
+                messagebox.showerror("Помилка", f"Помилка при групуванні мікросервісів: {event[1]}")
+                self.status_var.set("Помилка при групуванні мікросервісів")
+            return
+        
+        self.root.after(WORKER_POLL_MS, self._poll_worker)
+    
+    def _finish_worker(self):
+        self.worker = None
+        self.run_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+        self.progress_var.set(0.0)
+    
+    def _schedule_live_update(self, *args):
+        """
+        Відкладає перегрупування до завершення зміни параметрів
+        """
+        if self.result is None or not self.microservices:
+            return
+        # Під час запуску групування поточний результат ще належить попередньому вікну
+        if self.worker is not None and self.worker.is_alive():
+            return
+        if self._live_job is not None:
+            self.root.after_cancel(self._live_job)
+        self._live_job = self.root.after(LIVE_UPDATE_DELAY_MS, self._apply_live_settings)
+    
+    def _window_key(self):
+        window = self.microservices
+        return (window.metric_type, window.date, window.time)
+    
+    def _candidate_cache(self, max_group_size, stability_threshold):
+        """
+        Повертає кеш оцінених кандидатів поточного вікна або None, якщо його
+        ще немає чи він не покриває параметри
+        """
+        key = self._window_key()
+        cache = self.candidate_caches.get(key)
+        if cache is None or not cache.covers(max_group_size, stability_threshold) \
+                or not np.array_equal(cache.values, self.microservices.values):
+            return None
+        
+        self.candidate_caches.move_to_end(key)
+        return cache
+    
+    def _build_candidate_cache(self, max_group_size, stability_threshold=None):
+        """
+        Запускає фонову оцінку кандидатів поточного вікна (див. CandidateCacheBuilder)
+        
+        Кеш будується для верхньої межі повзунка порогу, тож подальші зміни
+        порогу обслуговуються без повторного перебору.
+        """
+        if self.cache_builder is not None and self.cache_builder.is_alive():
+            return
+        
+        key = self._window_key()
+        cache = self.candidate_caches.get(key)
+        self.cache_builder = CandidateCacheBuilder(
+            key, self.microservices,
+            max(max_group_size, cache.max_group_size if cache else 0),
+            max(stability_threshold or 0, LIVE_THRESHOLD_RANGE[1])
+        )
+        self.cache_builder.start()
+        self.root.after(WORKER_POLL_MS, self._poll_cache_builder)
+    
+    def _poll_cache_builder(self):
+        """
+        Приймає оцінені кандидати з фонового потоку і застосовує відкладене живе оновлення
+        """
+        try:
+            event = self.cache_builder.events.get_nowait()
+        except queue.Empty:
+            self.root.after(WORKER_POLL_MS, self._poll_cache_builder)
+            return
+        
+        if event[0] == "error":
+            self._live_pending = False
+            self.status_var.set(f"Помилка живого оновлення: {event[1]}")
+            return
+        
+        _, key, cache = event
+        self.candidate_caches[key] = cache
+        while len(self.candidate_caches) > LIVE_CACHE_WINDOWS:
+            self.candidate_caches.popitem(last=False)
+        
+        if self._live_pending:
+            self._live_pending = False
+            self._apply_live_settings()
+    
+    def _apply_live_settings(self):
+        """
+        Перегруповує поточне вікно з кешу кандидатів: лише вибір груп і перемальовування,
+        без звернення до бази даних і без збереження результату
+        """
+        self._live_job = None
+        if self.worker is not None and self.worker.is_alive():
+            return
+        try:
             max_group_size = self.group_size_var.get()
             stability_threshold = self.stability_threshold_var.get()
+        except tk.TclError:
+            # Значення ще вводиться в полі
+            return
+        if max_group_size < 1 or stability_threshold <= 0:
+            return
+        
+        try:
+            strategy = get_strategy(self.strategy_var.get())
+            if not strategy.serves_from_cache(self.microservices.values, max_group_size, stability_threshold):
+                self.status_var.set(
+                    f"Живе оновлення недоступне для стратегії {strategy.name}: запустіть групування"
+                )
+                return
             
-            self.status_var.set("Формування груп...")
-            self.groups, self.group_services, self.slot_sums = form_multiple_knapsack_groups(
-                self.microservices, max_group_size=max_group_size, stability_threshold=stability_threshold
-            )
-            
-            self.status_var.set(f"Сформовано {len(self.groups)} груп")
+            cache = self._candidate_cache(max_group_size, stability_threshold)
+            if cache is None:
+                # Кандидати оцінюються у фоні; оновлення застосується після їх готовності
+                self._live_pending = True
+                self.status_var.set("Оцінка кандидатів груп для живого оновлення...")
+                self._build_candidate_cache(max_group_size, stability_threshold)
+                return
             
-            # Збереження результатів в базу даних
-            self.status_var.set("Збереження результатів у базу даних...")
-            records_count = self.db_output.save_grouping_results(
-                self.groups, 
-                self.group_services, 
-                self.service_names, 
-                metric_type, 
-                date, 
-                time
+            started = perf_counter()
+            self.result = strategy.run_cached(
+                cache, max_group_size=max_group_size, stability_threshold=stability_threshold
             )
+            grouping_ms = (perf_counter() - started) * 1000
             
-            if records_count > 0:
-                self.status_var.set(f"Сформовано {len(self.groups)} груп. Збережено {records_count} записів у базу даних.")
-            else:
-                self.status_var.set(f"Сформовано {len(self.groups)} груп. Помилка при збереженні в базу даних.")
-            
-            # Відображення результатів
-            self._show_results()
-            
+            self._show_results(live=True)
+            self.status_var.set(
+                f"Живе оновлення: {len(self.result)} груп (розмір до {max_group_size}, поріг {stability_threshold}%) "
+                f"за {grouping_ms:.0f} мс, результат не збережено"
+            )
         except Exception as e:
-            messagebox.showerror("Помилка", f"Помилка при групуванні мікросервісів: {e}")
-            self.status_var.set("Помилка при групуванні мікросервісів")
+            self.status_var.set(f"Помилка живого оновлення: {e}")
     
-    def _show_results(self):
+    def _show_results(self, live=False):
         """
         Відображення результатів групування
-        """
-        # Очищення вкладок
-        for widget in self.tab_microservices.winfo_children():
-            widget.destroy()
-        for widget in self.tab_group_load.winfo_children():
-            widget.destroy()
-        for widget in self.tab_stability.winfo_children():
-            widget.destroy()
-        for widget in self.tab_statistics.winfo_children():
-            widget.destroy()
-        for widget in self.tab_base_peak.winfo_children():
-            widget.destroy()
-        for widget in self.tab_load_distribution.winfo_children():
-            widget.destroy()
-        
-        # Вкладка "Мікросервіси"
-        self._create_microservices_tab()
-        
-        # Вкладка "Навантаження груп"
-        self._create_group_load_tab()
         
-        # Вкладка "Стабільність"
-        self._create_stability_tab()
+        Вкладки перемальовуються ліниво: одразу лише вибрана, решта - під час
+        першого відкриття після зміни результату (див. _render_selected_tab).
         
-        # Вкладка "Статистика"
-        self._create_statistics_tab()
-        
-        # Вкладка "Базові/пікові компоненти"
-        self._create_base_peak_tab()
-        
-        # Вкладка "Розподіл навантаження"
-        self._create_load_distribution_tab()
+        Args:
+            live: Перемальовування після живого оновлення - вкладка мікросервісів
+                не змінюється, вибрана вкладка зберігається
+        """
+        if live:
+            self.rendered_tabs &= {str(self.tab_microservices)}
+        else:
+            self.rendered_tabs.clear()
         
         # Перехід на першу вкладку
-        self.notebook.select(0)
+        if not live:
+            self.notebook.select(0)
+        self._render_selected_tab()
     
-    def _create_microservices_tab(self):
+    def _render_selected_tab(self, event=None):
         """
-        Створення вкладки "Мікросервіси"
+        Малює вибрану вкладку, якщо вона ще не показувала поточний результат
         """
-        # Створення фігури matplotlib
-        fig = plt.figure(figsize=(10, 6))
-        ax = fig.add_subplot(111)
-        
-        # Побудова графіка
-        for i, (service, name) in enumerate(zip(self.microservices, self.service_names)):
-            ax.plot(service, label=name, marker='o', linestyle='-', markersize=4)
+        if self.result is None:
+            return
+        tab = self.notebook.select()
+        if tab in self.rendered_tabs or tab not in self.tab_renderers:
+            return
+        self.tab_renderers[tab]()
+        self.rendered_tabs.add(tab)
+    
+    def _chart(self, master, figsize=(10, 6)):
+        """
+        Повертає графік фрейму, створюючи його під час першого звернення
+        """
+        key = str(master)
+        if key not in self.charts:
+            self.charts[key] = ChartPanel(master, figsize)
+        return self.charts[key]
+    
+    def _close_charts(self):
+        """
+        Закриває фігури всіх вкладок
+        """
+        for chart in self.charts.values():
+            chart.close()
+        self.charts.clear()
+        self.rendered_tabs.clear()
+    
+    def _on_close(self):
+        """
+        Закриття головного вікна: зупинка фонового групування і звільнення фігур
+        """
+        if self.worker is not None:
+            self.worker.cancel()
+        self._close_charts()
+        self.root.destroy()
+    
+    def _render_microservices_tab(self):
+        """
+        Вкладка "Мікросервіси"
+        """
+        chart = self._chart(self.tab_microservices)
+        ax = chart.ax
+        chart.update_lines(self.microservices, self.service_names, marker='o', linestyle='-', markersize=4)
         
         ax.set_title("Часові ряди мікросервісів")
         ax.set_xlabel("Часовий слот")
         ax.set_ylabel("Навантаження")
         ax.legend(loc='best')
         ax.grid(True)
-        
-        # Додавання фігури на вкладку
-        canvas = FigureCanvasTkAgg(fig, master=self.tab_microservices)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        chart.redraw()
     
-    def _create_group_load_tab(self):
+    def _render_group_load_tab(self):
         """
-        Створення вкладки "Навантаження груп"
+        Вкладка "Навантаження груп"
         """
-        # Створення фігури matplotlib
-        fig = plt.figure(figsize=(10, 6))
-        ax = fig.add_subplot(111)
-        
-        # Побудова графіка
-        for i, group in enumerate(self.groups):
-            # Обчислення загального навантаження групи
-            time_slots = len(group[0]) if group else 0
-            total_load = [0] * time_slots
-            
-            for service in group:
-                for t in range(time_slots):
-                    total_load[t] += service[t]
-            
-            # Побудова графіка для групи
-            ax.plot(total_load, label=f"Група {i+1}", marker='o', linestyle='-', markersize=4)
+        chart = self._chart(self.tab_group_load)
+        ax = chart.ax
+        chart.update_lines(
+            self.result.slot_sums, [f"Група {i+1}" for i in range(len(self.result))],
+            marker='o', linestyle='-', markersize=4
+        )
         
         ax.set_title("Загальне навантаження груп")
         ax.set_xlabel("Часовий слот")
         ax.set_ylabel("Загальне навантаження")
         ax.legend(loc='best')
         ax.grid(True)
-        
-        # Додавання фігури на вкладку
-        canvas = FigureCanvasTkAgg(fig, master=self.tab_group_load)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        chart.redraw()
     
-    def _create_stability_tab(self):
+    def _render_stability_tab(self):
         """
-        Створення вкладки "Стабільність"
+        Вкладка "Стабільність"
         """
-        # Створення фігури matplotlib
-        fig = plt.figure(figsize=(10, 6))
-        ax = fig.add_subplot(111)
-        
-        # Обчислення коефіцієнтів варіації
-        cv_values = []
-        group_labels = []
-        
-        for i, group in enumerate(self.groups):
-            # Обчислення загального навантаження групи
-            time_slots = len(group[0]) if group else 0
-            total_load = [0] * time_slots
-            
-            for service in group:
-                for t in range(time_slots):
-                    total_load[t] += service[t]
-            
-            # Обчислення коефіцієнта варіації
-            mean = sum(total_load) / len(total_load) if total_load else 0
-            variance = sum((x - mean) ** 2 for x in total_load) / len(total_load) if total_load else 0
-            std_dev = variance ** 0.5
-            cv = (std_dev / mean) * 100 if mean > 0 else float('inf')
-            
-            cv_values.append(cv if cv != float('inf') else 100)  # Обмеження для візуалізації
-            group_labels.append(f"Група {i+1}")
-        
-        # Побудова графіка
-        ax.bar(group_labels, cv_values)
+        chart = self._chart(self.tab_stability)
+        ax = chart.ax
+        cv_values = self.result.cvs
+        positions = np.arange(len(cv_values))
+        
+        # Стовпчики перевикористовуються, якщо кількість груп не змінилася
+        if len(chart.artists) == len(cv_values):
+            for bar, cv in zip(chart.artists, cv_values):
+                bar.set_height(cv)
+        else:
+            for bar in chart.artists:
+                bar.remove()
+            chart.artists = list(ax.bar(positions, cv_values, color='C0'))
+        
+        ax.set_xticks(positions)
+        ax.set_xticklabels([f"Група {i+1}" for i in positions])
+        ax.relim()
+        ax.autoscale_view()
         ax.set_title("Порівняння стабільності груп за коефіцієнтом варіації")
         ax.set_xlabel("Група")
         ax.set_ylabel("Коефіцієнт варіації (%)")
         ax.grid(True, axis='y')
-        
-        # Додавання фігури на вкладку
-        canvas = FigureCanvasTkAgg(fig, master=self.tab_stability)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        chart.redraw()
     
-    def _create_statistics_tab(self):
+    def _render_statistics_tab(self):
         """
-        Створення вкладки "Статистика"
+        Вкладка "Статистика"
         """
-        # Створення фрейму для статистики
-        stats_frame = ttk.Frame(self.tab_statistics, padding="10")
-        stats_frame.pack(fill=tk.BOTH, expand=True)
-        
-        # Створення текстового поля для статистики
-        stats_text = tk.Text(stats_frame, wrap=tk.WORD, width=80, height=20)
-        stats_text.pack(fill=tk.BOTH, expand=True)
-        
-        # Додавання скролбару
-        scrollbar = ttk.Scrollbar(stats_text, command=stats_text.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        stats_text.config(yscrollcommand=scrollbar.set)
-        
-        # Підготовка даних для статистики
-        group_sizes = [len(group) for group in self.group_services]
-        
-        # Обчислення середнього навантаження для кожної групи
-        mean_loads = []
-        peak_loads = []
-        stability_values = []
-        
-        for group in self.groups:
-            # Обчислення загального навантаження групи
-            time_slots = len(group[0]) if group else 0
-            total_load = [0] * time_slots
+        if self.stats_text is None:
+            # Створення фрейму для статистики
+            stats_frame = ttk.Frame(self.tab_statistics, padding="10")
+            stats_frame.pack(fill=tk.BOTH, expand=True)
             
-            for service in group:
-                for t in range(time_slots):
-                    total_load[t] += service[t]
+            # Створення текстового поля для статистики
+            self.stats_text = tk.Text(stats_frame, wrap=tk.WORD, width=80, height=20)
+            self.stats_text.pack(fill=tk.BOTH, expand=True)
             
-            mean_loads.append(sum(total_load) / len(total_load) if total_load else 0)
-            peak_loads.append(max(total_load) if total_load else 0)
-            
-            # Обчислення коефіцієнту стабільності (CV)
-            from shared.group_finder import calculate_stability
-            stability = calculate_stability(group)
-            stability_values.append(stability)
-        
-        # Додавання статистики в текстове поле
-        stats_text.insert(tk.END, f"Загальна статистика:\n")
-        stats_text.insert(tk.END, f"- Кількість груп: {len(self.groups)}\n")
-        stats_text.insert(tk.END, f"- Кількість мікросервісів: {len(self.microservices)}\n")
-        stats_text.insert(tk.END, f"- Тип метрики: {self.metric_var.get()}\n")
-        stats_text.insert(tk.END, f"- Дата: {self.date_var.get()}\n")
-        stats_text.insert(tk.END, f"- Час: {self.time_var.get()}\n")
-        stats_text.insert(tk.END, f"- Максимальний розмір групи: {self.group_size_var.get()}\n")
-        stats_text.insert(tk.END, f"- Коефіцієнт варіації: {self.stability_threshold_var.get()}%\n\n")
-        
-        stats_text.insert(tk.END, "Статистика по групах:\n")
-        stats_text.insert(tk.END, "-" * 50 + "\n")
+            # Додавання скролбару
+            scrollbar = ttk.Scrollbar(self.stats_text, command=self.stats_text.yview)
+            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+            self.stats_text.config(yscrollcommand=scrollbar.set)
+        
+        # Підготовка даних для статистики
+        result = self.result
+        stats = result.statistics()
+        group_sizes = stats["size"].tolist()
+        mean_loads = stats["mean"].tolist()
+        peak_loads = stats["peak"].tolist()
+        stability_values = stats["cv"].tolist()
+        
+        # Текст збирається повністю і вставляється одним викликом
+        lines = [
+            "Загальна статистика:",
+            f"- Кількість груп: {len(result)}",
+            f"- Кількість мікросервісів: {len(self.microservices)}",
+            f"- Тип метрики: {self.metric_var.get()}",
+            f"- Дата: {self.date_var.get()}",
+            f"- Час: {self.time_var.get()}",
+            f"- Максимальний розмір групи: {self.group_size_var.get()}",
+            f"- Коефіцієнт варіації: {self.stability_threshold_var.get()}%",
+            "",
+            "Статистика по групах:",
+            "-" * 50,
+        ]
         
         for i, (size, mean, peak, stability) in enumerate(zip(group_sizes, mean_loads, peak_loads, stability_values)):
-            stats_text.insert(tk.END, f"Група {i+1}:\n")
-            stats_text.insert(tk.END, f"  Кількість мікросервісів: {size}\n")
-            stats_text.insert(tk.END, f"  Середнє навантаження: {mean:.2f}\n")
-            stats_text.insert(tk.END, f"  Пікове навантаження: {peak:.2f}\n")
-            stats_text.insert(tk.END, f"  Коефіцієнт стабільності: {stability:.2f}%\n")
-            
-            # Отримання списку мікросервісів у групі з урахуванням базових та пікових компонентів
-            services_in_group = []
-            for idx in self.group_services[i]:
-                if idx >= 1000:  # Базовий компонент
-                    real_idx = idx - 1000
-                    if 0 <= real_idx < len(self.service_names):
-                        services_in_group.append(f"{self.service_names[real_idx]} (базовий)")
-                elif idx < 0:  # Піковий компонент
-                    real_idx = -idx
-                    if 0 <= real_idx < len(self.service_names):
-                        services_in_group.append(f"{self.service_names[real_idx]} (піковий)")
-                else:  # Звичайний мікросервіс
-                    if 0 <= idx < len(self.service_names):
-                        services_in_group.append(self.service_names[idx])
+            lines.append(f"Група {i+1}:")
+            lines.append(f"  Кількість мікросервісів: {size}")
+            lines.append(f"  Середнє навантаження: {mean:.2f}")
+            lines.append(f"  Пікове навантаження: {peak:.2f}")
+            lines.append(f"  Коефіцієнт стабільності: {stability:.2f}%")
             
-            stats_text.insert(tk.END, f"  Мікросервіси: {services_in_group}\n")
+            # Мікросервіси групи з позначкою базових та пікових компонентів
+            services_in_group = result.member_labels(i, self.service_names)
+            lines.append(f"  Мікросервіси: {services_in_group}")
             
             # Додавання часових рядів мікросервісів у групі
-            stats_text.insert(tk.END, "  Часові ряди мікросервісів у групі:\n")
-            
-            for j, service_idx in enumerate(self.group_services[i]):
-                service_name = ""
-                service_data = []
-                
-                if service_idx >= 1000:  # Базовий компонент
-                    real_idx = service_idx - 1000
-                    if 0 <= real_idx < len(self.service_names):
-                        service_name = f"{self.service_names[real_idx]} (базовий)"
-                        service_data = self.groups[i][j]
-                elif service_idx < 0:  # Піковий компонент
-                    real_idx = -service_idx
-                    if 0 <= real_idx < len(self.service_names):
-                        service_name = f"{self.service_names[real_idx]} (піковий)"
-                        service_data = self.groups[i][j]
-                else:  # Звичайний мікросервіс
-                    if 0 <= service_idx < len(self.service_names):
-                        service_name = self.service_names[service_idx]
-                        service_data = self.groups[i][j]
-                
-                # Форматування часового ряду для виводу
+            lines.append("  Часові ряди мікросервісів у групі:")
+            for service_name, service_data in zip(services_in_group, result.group_series(i)):
                 time_series_str = " ".join([f"{val:.2f}" for val in service_data])
-                stats_text.insert(tk.END, f"    {service_name}: [{time_series_str}]\n")
+                lines.append(f"    {service_name}: [{time_series_str}]")
             
             # Додавання загального навантаження групи
-            time_slots = len(self.groups[i][0]) if self.groups[i] else 0
-            total_load = [0] * time_slots
-            
-            for service in self.groups[i]:
-                for t in range(time_slots):
-                    total_load[t] += service[t]
-            
-            total_load_str = " ".join([f"{val:.2f}" for val in total_load])
-            stats_text.insert(tk.END, f"  Загальне навантаження групи: [{total_load_str}]\n")
-            stats_text.insert(tk.END, "-" * 50 + "\n")
+            total_load_str = " ".join([f"{val:.2f}" for val in result.slot_sums[i]])
+            lines.append(f"  Загальне навантаження групи: [{total_load_str}]")
+            lines.append("-" * 50)
+        
+        self.stats_text.config(state=tk.NORMAL)
+        self.stats_text.delete("1.0", tk.END)
+        self.stats_text.insert(tk.END, "\n".join(lines) + "\n")
         
         # Заборона редагування тексту
-        stats_text.config(state=tk.DISABLED)
+        self.stats_text.config(state=tk.DISABLED)
     
-    def _create_base_peak_tab(self):
+    def _render_base_peak_tab(self):
         """
-        Створення вкладки "Базові/пікові компоненти"
+        Вкладка "Базові/пікові компоненти"
         """
-        # Знаходимо мікросервіси, які були розділені на базові та пікові компоненти
-        split_indices = set()
-        
-        for group in self.group_services:
-            for idx in group:
-                if idx >= 1000 or idx < 0:  # Базовий або піковий компонент
-                    # Визначаємо реальний індекс
-                    real_idx = idx - 1000 if idx >= 1000 else -idx
-                    split_indices.add(real_idx)
-        
-        if not split_indices:
-            # Якщо немає розділених мікросервісів
-            ttk.Label(self.tab_base_peak, text="Немає мікросервісів, які були розділені на базові та пікові компоненти").pack(pady=20)
-            return
-        
-        # Створення фрейму для вибору мікросервісу
-        select_frame = ttk.Frame(self.tab_base_peak, padding="10")
-        select_frame.pack(fill=tk.X)
-        
-        ttk.Label(select_frame, text="Виберіть мікросервіс:").pack(side=tk.LEFT, padx=5)
-        
-        # Створення списку розділених мікросервісів
-        split_names = [self.service_names[idx] for idx in split_indices]
-        
-        # Змінна для вибору мікросервісу
-        self.selected_split_var = tk.StringVar(value=split_names[0] if split_names else "")
-        
-        # Комбобокс для вибору мікросервісу
-        split_combo = ttk.Combobox(select_frame, textvariable=self.selected_split_var, values=split_names, state="readonly")
-        split_combo.pack(side=tk.LEFT, padx=5)
-        split_combo.bind("<<ComboboxSelected>>", self._on_split_selected)
-        
-        # Фрейм для графіка
-        self.split_graph_frame = ttk.Frame(self.tab_base_peak, padding="10")
-        self.split_graph_frame.pack(fill=tk.BOTH, expand=True)
-        
-        # Відображення першого розділеного мікросервісу
-        if split_names:
-            self._on_split_selected()
+        if self.split_combo is None:
+            # Створення фрейму для вибору мікросервісу
+            select_frame = ttk.Frame(self.tab_base_peak, padding="10")
+            select_frame.pack(fill=tk.X)
+            
+            ttk.Label(select_frame, text="Виберіть мікросервіс:").pack(side=tk.LEFT, padx=5)
+            
+            # Комбобокс для вибору мікросервісу
+            self.selected_split_var = tk.StringVar()
+            self.split_combo = ttk.Combobox(select_frame, textvariable=self.selected_split_var, state="readonly")
+            self.split_combo.pack(side=tk.LEFT, padx=5)
+            self.split_combo.bind("<<ComboboxSelected>>", self._on_split_selected)
+            
+            # Фрейм для графіка
+            self.split_graph_frame = ttk.Frame(self.tab_base_peak, padding="10")
+            self.split_graph_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Мікросервіси, які були розділені на базові та пікові компоненти
+        split_names = [self.service_names[idx] for idx in self.result.split_services()]
+        self.split_combo["values"] = split_names
+        if self.selected_split_var.get() not in split_names:
+            self.selected_split_var.set(split_names[0] if split_names else "")
+        
+        self._on_split_selected()
     
     def _on_split_selected(self, event=None):
         """
         Обробник події вибору розділеного мікросервісу
         """
-        # Очищення фрейму для графіка
-        for widget in self.split_graph_frame.winfo_children():
-            widget.destroy()
-        
-        # Отримання індексу вибраного мікросервісу
+        chart = self._chart(self.split_graph_frame)
+        ax = chart.ax
         selected_name = self.selected_split_var.get()
-        selected_idx = self.service_names.index(selected_name)
-        
-        # Розділення мікросервісу на базовий та піковий компоненти
-        base, peak = split_microservice_load(self.microservices[selected_idx])
         
-        # Створення фігури matplotlib
-        fig = plt.figure(figsize=(10, 6))
-        ax = fig.add_subplot(111)
+        if not selected_name:
+            chart.show_message("Немає мікросервісів, які були розділені на базові та пікові компоненти")
+            chart.redraw()
+            return
         
-        # Побудова графіків
-        ax.plot(base, label="Базовий компонент", marker='o', linestyle='-', color='blue', markersize=4)
-        ax.plot(peak, label="Піковий компонент", marker='x', linestyle='--', color='red', markersize=4)
-        ax.plot([b + p for b, p in zip(base, peak)], label="Загальне навантаження", 
-                marker='s', linestyle='-.', color='green', markersize=4)
+        # Розділення мікросервісу на базовий та піковий компоненти
+        base, peak = split_microservice_load(self.microservices.row(selected_name))
+        series = [base, peak, np.add(base, peak)]
+        
+        if len(chart.artists) == len(series):
+            for line, values in zip(chart.artists, series):
+                line.set_data(np.arange(len(values)), values)
+            ax.relim()
+            ax.autoscale_view()
+        else:
+            chart.show_message(None)
+            chart.artists = [
+                ax.plot(base, label="Базовий компонент", marker='o', linestyle='-', color='blue', markersize=4)[0],
+                ax.plot(peak, label="Піковий компонент", marker='x', linestyle='--', color='red', markersize=4)[0],
+                ax.plot(series[2], label="Загальне навантаження",
+                        marker='s', linestyle='-.', color='green', markersize=4)[0],
+            ]
+            ax.set_xlabel("Часовий слот")
+            ax.set_ylabel("Навантаження")
+            ax.legend(loc='best')
+            ax.grid(True)
         
         ax.set_title(f"Розділення навантаження для мікросервісу: {selected_name}")
-        ax.set_xlabel("Часовий слот")
-        ax.set_ylabel("Навантаження")
-        ax.legend(loc='best')
-        ax.grid(True)
-        
-        # Додавання фігури на вкладку
-        canvas = FigureCanvasTkAgg(fig, master=self.split_graph_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        chart.redraw()
     
-    def _create_load_distribution_tab(self):
+    def _render_load_distribution_tab(self):
         """
-        Створення вкладки "Розподіл навантаження"
+        Вкладка "Розподіл навантаження"
         """
-        if not self.groups:
-            ttk.Label(self.tab_load_distribution, text="Немає даних для відображення").pack(pady=20)
-            return
-        
-        # Створення фрейму для вибору групи
-        select_frame = ttk.Frame(self.tab_load_distribution, padding="10")
-        select_frame.pack(fill=tk.X)
-        
-        ttk.Label(select_frame, text="Виберіть групу:").pack(side=tk.LEFT, padx=5)
-        
-        # Створення списку груп
-        group_names = [f"Група {i+1}" for i in range(len(self.groups))]
-        
-        # Змінна для вибору групи
-        self.selected_group_var = tk.StringVar(value=group_names[0] if group_names else "")
-        
-        # Комбобокс для вибору групи
-        group_combo = ttk.Combobox(select_frame, textvariable=self.selected_group_var, values=group_names, state="readonly")
-        group_combo.pack(side=tk.LEFT, padx=5)
-        group_combo.bind("<<ComboboxSelected>>", self._on_group_selected)
-        
-        # Фрейм для графіка
-        self.load_distribution_frame = ttk.Frame(self.tab_load_distribution, padding="10")
-        self.load_distribution_frame.pack(fill=tk.BOTH, expand=True)
-        
-        # Відображення першої групи
-        if group_names:
-            self._on_group_selected()
+        if self.group_combo is None:
+            # Створення фрейму для вибору групи
+            select_frame = ttk.Frame(self.tab_load_distribution, padding="10")
+            select_frame.pack(fill=tk.X)
+            
+            ttk.Label(select_frame, text="Виберіть групу:").pack(side=tk.LEFT, padx=5)
+            
+            # Комбобокс для вибору групи
+            self.selected_group_var = tk.StringVar()
+            self.group_combo = ttk.Combobox(select_frame, textvariable=self.selected_group_var, state="readonly")
+            self.group_combo.pack(side=tk.LEFT, padx=5)
+            self.group_combo.bind("<<ComboboxSelected>>", self._on_group_selected)
+            
+            # Фрейм для графіка та інформації про стабільність групи
+            self.load_distribution_frame = ttk.Frame(self.tab_load_distribution, padding="10")
+            self.load_distribution_frame.pack(fill=tk.BOTH, expand=True)
+            self.group_info_var = tk.StringVar()
+            ttk.Label(self.load_distribution_frame, textvariable=self.group_info_var,
+                      font=('TkDefaultFont', 10, 'bold')).pack(side=tk.BOTTOM, anchor=tk.W, padx=10, pady=5)
+        
+        group_names = [f"Група {i+1}" for i in range(len(self.result))]
+        self.group_combo["values"] = group_names
+        if self.selected_group_var.get() not in group_names:
+            self.selected_group_var.set(group_names[0] if group_names else "")
+        
+        self._on_group_selected()
     
     def _on_group_selected(self, event=None):
         """
         Обробник події вибору групи для відображення розподілу навантаження
         """
-        # Очищення фрейму для графіка
-        for widget in self.load_distribution_frame.winfo_children():
-            widget.destroy()
-        
-        # Отримання індексу вибраної групи
+        chart = self._chart(self.load_distribution_frame, figsize=(12, 6))
+        ax = chart.ax
         selected_group = self.selected_group_var.get()
-        group_idx = int(selected_group.split(" ")[1]) - 1
+        
+        # Склад групи змінюється, тому стовпчики будуються заново на тих самих осях
+        ax.clear()
+        chart.artists = []
+        if not selected_group:
+            chart.show_message("Немає даних для відображення")
+            self.group_info_var.set("")
+            chart.redraw()
+            return
+        chart.show_message(None)
         
         # Отримання даних для вибраної групи
-        group = self.groups[group_idx]
-        group_services = self.group_services[group_idx]
+        group_idx = int(selected_group.split(" ")[1]) - 1
+        group = self.result.group_series(group_idx)
+        service_labels = self.result.member_labels(group_idx, self.service_names)
         
         # Кількість часових слотів
-        time_slots = len(group[0]) if group else 0
-        
-        # Створення фігури matplotlib
-        fig = plt.figure(figsize=(12, 6))
-        ax = fig.add_subplot(111)
+        time_slots = self.result.time_slots
+        slots = np.arange(time_slots)
         
-        # Знаходження максимального навантаження для групи
-        max_load = 0
-        for t in range(time_slots):
-            slot_load = sum(service[t] for service in group)
-            max_load = max(max_load, slot_load)
+        # Максимальне навантаження групи
+        max_load = float(self.result.slot_sums[group_idx].max()) if time_slots else 0
         
         # Підготовка даних для стекової гістограми
-        bottoms = [0] * time_slots
+        bottoms = np.zeros(time_slots)
         
         # Кольори для мікросервісів
-        colors = plt.cm.tab20(range(len(group)))
+        colors = colormaps["tab20"](range(len(group)))
         
         # Підготовка даних для легенди
         legend_patches = []
         
         # Для кожного мікросервісу в групі
-        for i, (service, service_idx) in enumerate(zip(group, group_services)):
-            # Визначаємо назву мікросервісу
-            if service_idx >= 1000:  # Базовий компонент
-                real_idx = service_idx - 1000
-                if 0 <= real_idx < len(self.service_names):
-                    service_name = f"{self.service_names[real_idx]} (базовий)"
-            elif service_idx < 0:  # Піковий компонент
-                real_idx = -service_idx
-                if 0 <= real_idx < len(self.service_names):
-                    service_name = f"{self.service_names[real_idx]} (піковий)"
-            else:  # Звичайний мікросервіс
-                if 0 <= service_idx < len(self.service_names):
-                    service_name = self.service_names[service_idx]
-                else:
-                    service_name = f"Сервіс {i+1}"
-            
-            # Додаємо стовпчик для цього мікросервісу
-            bars = ax.bar(range(time_slots), service, bottom=bottoms, label=service_name, 
-                         color=colors[i % len(colors)], edgecolor='black', linewidth=0.5)
-            
-            # Додаємо патч для легенди
-            legend_patches.append(plt.Rectangle((0, 0), 1, 1, color=colors[i % len(colors)], label=service_name))
+        for i, (service, service_name) in enumerate(zip(group, service_labels)):
+            color = colors[i % len(colors)]
+            ax.bar(slots, service, bottom=bottoms, label=service_name,
+                   color=color, edgecolor='black', linewidth=0.5)
+            legend_patches.append(Rectangle((0, 0), 1, 1, color=color, label=service_name))
             
             # Оновлюємо нижні межі для наступного мікросервісу
-            bottoms = [bottoms[t] + service[t] for t in range(time_slots)]
+            bottoms = bottoms + service
         
         # Додаємо "вільне місце" як прозору частину стовпчиків
-        free_space = [max_load - b for b in bottoms]
-        ax.bar(range(time_slots), free_space, bottom=bottoms, alpha=0.2, hatch='///', 
-              label="Вільне місце", edgecolor='gray', linewidth=0.5)
-        legend_patches.append(plt.Rectangle((0, 0), 1, 1, alpha=0.2, hatch='///', label="Вільне місце"))
+        ax.bar(slots, max_load - bottoms, bottom=bottoms, alpha=0.2, hatch='///',
+               label="Вільне місце", edgecolor='gray', linewidth=0.5)
+        legend_patches.append(Rectangle((0, 0), 1, 1, alpha=0.2, hatch='///', label="Вільне місце"))
         
         # Налаштування графіка
         ax.set_title(f"Розподіл навантаження для {selected_group}")
         ax.set_xlabel("Часовий слот")
         ax.set_ylabel("Навантаження")
-        ax.set_xticks(range(time_slots))
-        ax.set_xticklabels([f"{t+1}" for t in range(time_slots)])
+        ax.set_xticks(slots)
+        ax.set_xticklabels([f"{t+1}" for t in slots])
         ax.grid(True, axis='y', linestyle='--', alpha=0.7)
         
         # Встановлюємо межі осі Y
@@ -722,27 +1039,16 @@ class MicroserviceGroupingApp:
         
         # Додаємо легенду
         ax.legend(handles=legend_patches, loc='upper right', title="Мікросервіси")
-        
-        # Додавання фігури на вкладку
-        canvas = FigureCanvasTkAgg(fig, master=self.load_distribution_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        chart.redraw()
         
         # Додаємо інформацію про стабільність групи
-        from shared.group_finder import calculate_stability
-        stability = calculate_stability(group)
-        
-        info_frame = ttk.Frame(self.load_distribution_frame)
-        info_frame.pack(fill=tk.X, pady=5)
-        
-        ttk.Label(info_frame, text=f"Коефіцієнт стабільності групи: {stability:.2f}%", 
-                 font=('TkDefaultFont', 10, 'bold')).pack(side=tk.LEFT, padx=10)
+        self.group_info_var.set(f"Коефіцієнт стабільності групи: {self.result.cvs[group_idx]:.2f}%")
     
     def _open_saved_groupings(self):
         """
         Відкриває вікно для перегляду збережених варіантів групування
         """
-        saved_groupings_window = SavedGroupingsWindow(self.root, self.db_output, self)
+        saved_groupings_window = SavedGroupingsWindow(self.root, self.db_input, self)
         saved_groupings_window.grab_set()  # Робимо вікно модальним
     
     def _show_help(self):
@@ -774,16 +1080,17 @@ class SavedGroupingsWindow(tk.Toplevel):
     """
     Вікно для перегляду збережених варіантів групування
     """
-    def __init__(self, parent, db_output, main_app=None):
+    def __init__(self, parent, db_input, main_app=None):
         super().__init__(parent)
         self.title("Збережені варіанти групування")
         self.geometry("800x600")
         self.minsize(600, 400)
         
-        self.db_output = db_output
+        self.db_input = db_input
         self.main_app = main_app  # Посилання на головний додаток
         self.selected_grouping = None
         self.selected_group_id = None
+        self.grouping_rows = []  # Рядки вибраного запуску, завантажені одним запитом
         
         # Створення віджетів
         self._create_widgets()
@@ -890,29 +1197,15 @@ class SavedGroupingsWindow(tk.Toplevel):
             for item in self.groupings_table.get_children():
                 self.groupings_table.delete(item)
             
-            # Запит для отримання доступних варіантів групування
-            query = """
-            SELECT 
-                date, 
-                time, 
-                metric_type, 
-                COUNT(DISTINCT group_id) AS num_groups
-            FROM grouping_results
-            GROUP BY date, time, metric_type
-            ORDER BY date DESC, time DESC
-            """
-            
-            self.db_output.cursor.execute(query)
-            results = self.db_output.cursor.fetchall()
-            
-            # Додавання результатів у таблицю
-            for row in results:
+            # Заголовки запусків з grouping_runs; iid рядка таблиці - ідентифікатор запуску
+            for row in self.db_input.get_grouping_runs():
                 date_str = row["date"].strftime("%Y-%m-%d")
-                time_str = str(row["time"])
+                time_str = format_db_time(row["time"])
                 metric_type = row["metric_type"]
                 num_groups = row["num_groups"]
                 
-                self.groupings_table.insert("", tk.END, values=(date_str, time_str, metric_type, num_groups))
+                self.groupings_table.insert("", tk.END, iid=str(row["run_id"]),
+                                            values=(date_str, time_str, metric_type, num_groups))
             
         except Exception as e:
             messagebox.showerror("Помилка", f"Помилка при завантаженні варіантів групування: {e}")
@@ -932,8 +1225,8 @@ class SavedGroupingsWindow(tk.Toplevel):
         time_str = item_data[1]
         metric_type = item_data[2]
         
-        # Збереження вибраного варіанту групування
-        self.selected_grouping = (date_str, time_str, metric_type)
+        # Збереження вибраного варіанту групування разом з ідентифікатором запуску
+        self.selected_grouping = (date_str, time_str, metric_type, int(selected_item[0]))
         
         # Завантаження доступних груп для вибраного варіанту групування
         self._load_available_groups()
@@ -954,21 +1247,14 @@ class SavedGroupingsWindow(tk.Toplevel):
             if not self.selected_grouping:
                 return
             
-            date_str, time_str, metric_type = self.selected_grouping
+            run_id = self.selected_grouping[3]
             
-            # Запит для отримання доступних груп
-            query = """
-            SELECT DISTINCT group_id
-            FROM grouping_results
-            WHERE date = %s AND time = %s AND metric_type = %s
-            ORDER BY group_id
-            """
-            
-            self.db_output.cursor.execute(query, (date_str, time_str, metric_type))
-            results = self.db_output.cursor.fetchall()
+            # Усі рядки запуску одним запитом; групи та мікросервіси далі читаються з пам'яті
+            self.grouping_rows = self.db_input.get_grouping_rows(run_id=run_id)
             
             # Додавання результатів у комбобокс
-            group_names = [f"Група {row['group_id']}" for row in results]
+            group_ids = sorted({row["group_id"] for row in self.grouping_rows})
+            group_names = [f"Група {group_id}" for group_id in group_ids]
             self.group_combo["values"] = group_names
             
             if group_names:
@@ -1004,18 +1290,7 @@ class SavedGroupingsWindow(tk.Toplevel):
             if not self.selected_grouping or self.selected_group_id is None:
                 return
             
-            date_str, time_str, metric_type = self.selected_grouping
-            
-            # Запит для отримання мікросервісів у вибраній групі
-            query = """
-            SELECT service_name, component_type
-            FROM grouping_results
-            WHERE date = %s AND time = %s AND metric_type = %s AND group_id = %s
-            ORDER BY service_name
-            """
-            
-            self.db_output.cursor.execute(query, (date_str, time_str, metric_type, self.selected_group_id))
-            results = self.db_output.cursor.fetchall()
+            results = [row for row in self.grouping_rows if row["group_id"] == self.selected_group_id]
             
             # Додавання результатів у таблицю
             for row in results:
@@ -1046,93 +1321,18 @@ class SavedGroupingsWindow(tk.Toplevel):
             return
         
         try:
-            date_str, time_str, metric_type = self.selected_grouping
+            date_str, time_str, metric_type, run_id = self.selected_grouping
             
             # Завантаження даних мікросервісів
-            self.main_app.microservices, self.main_app.service_names = self.main_app.db_input.get_data_for_algorithm(
+            self.main_app.microservices = self.main_app.db_input.get_window_matrix(
                 metric_type, date_str, time_str
             )
+            self.main_app.service_names = self.main_app.microservices.service_names
             
-            # Завантаження груп
-            self.main_app.groups = []
-            self.main_app.group_services = []
-            
-            # Отримання всіх груп для вибраного варіанту групування
-            query = """
-            SELECT DISTINCT group_id
-            FROM grouping_results
-            WHERE date = %s AND time = %s AND metric_type = %s
-            ORDER BY group_id
-            """
-            
-            self.db_output.cursor.execute(query, (date_str, time_str, metric_type))
-            group_ids = [row["group_id"] for row in self.db_output.cursor.fetchall()]
-            
-            for group_id in group_ids:
-                # Отримання мікросервісів для поточної групи
-                query = """
-                SELECT service_name, component_type
-                FROM grouping_results
-                WHERE date = %s AND time = %s AND metric_type = %s AND group_id = %s
-                ORDER BY service_name
-                """
-                
-                self.db_output.cursor.execute(query, (date_str, time_str, metric_type, group_id))
-                services_in_group = self.db_output.cursor.fetchall()
-                
-                # Формування групи
-                group = []
-                group_indices = []
-                
-                for service_row in services_in_group:
-                    service_name = service_row["service_name"]
-                    component_type = service_row["component_type"]
-                    
-                    # Знаходження індексу мікросервісу
-                    if service_name in self.main_app.service_names:
-                        service_idx = self.main_app.service_names.index(service_name)
-                        
-                        # Визначення типу компоненту
-                        if component_type == "original":
-                            idx = service_idx
-                        elif component_type == "base":
-                            idx = service_idx + 1000  # Базовий компонент
-                        elif component_type == "peak":
-                            idx = -service_idx  # Піковий компонент
-                        else:
-                            continue
-                        
-                        # Додавання мікросервісу в групу
-                        if 0 <= service_idx < len(self.main_app.microservices):
-                            if component_type == "original":
-                                group.append(self.main_app.microservices[service_idx])
-                            elif component_type == "base":
-                                # Розділення на базовий та піковий компоненти
-                                base, _ = split_microservice_load(self.main_app.microservices[service_idx])
-                                group.append(base)
-                            elif component_type == "peak":
-                                # Розділення на базовий та піковий компоненти
-                                _, peak = split_microservice_load(self.main_app.microservices[service_idx])
-                                group.append(peak)
-                            
-                            group_indices.append(idx)
-                
-                # Додавання групи в список груп
-                if group:
-                    self.main_app.groups.append(group)
-                    self.main_app.group_services.append(group_indices)
-            
-            # Обчислення загального навантаження для кожної групи
-            self.main_app.slot_sums = []
-            for group in self.main_app.groups:
-                time_slots = len(group[0]) if group else 0
-                slot_sums = [0] * time_slots
-                
-                for service in group:
-                    for t in range(time_slots):
-                        slot_sums[t] += service[t]
-                
-                self.main_app.slot_sums.append(slot_sums)
+            # Завантаження груп: усі рядки одним запитом; збережені ряди компонентів
+            # використовуються напряму, решта розділяється не більше одного разу
+            rows = self.grouping_rows or self.db_input.get_grouping_rows(run_id=run_id)
+            self.main_app.result = saved_grouping_result(rows, self.main_app.microservices)
             
             # Оновлення параметрів в інтерфейсі
             self.main_app.metric_var.set(metric_type)
@@ -1227,6 +1427,12 @@ class HelpWindow(tk.Toplevel):
         text.insert(tk.END, "Коефіцієнт варіації обчислюється як відношення стандартного відхилення до середнього значення, помножене на 100%.\n")
         text.insert(tk.END, "Рекомендоване значення: 20%.\n\n")
         
+        text.insert(tk.END, "Живе оновлення:\n", "subheader")
+        text.insert(tk.END, "Після першого запуску групування зміна порогу повзунком, розміру групи чи стратегії "
+                            "одразу перераховує групи поточного вікна з оцінених кандидатів, без повторного "
+                            "перебору і звернення до бази даних. Такий результат не зберігається - для збереження "
+                            "натисніть \"Запустити групування\".\n\n")
+        
         # Налаштування стилів тексту
         text.tag_configure("header", font=("TkDefaultFont", 14, "bold"))
         text.tag_configure("subheader", font=("TkDefaultFont", 12, "bold"))
@@ -0,0 +1,147 @@
+import io
+from time import perf_counter
+import numpy as np
+import matplotlib.style
+from matplotlib import colormaps, font_manager
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+
+# Оформлення PNG-графіків (як у Visualizer)
+CHART_STYLE = "ggplot"
+CHART_FIGSIZE = (12, 6)
+CHART_DPI = 100
+
+
+def _stability_chart(fig, cv_values):
+    ax = fig.add_subplot(111)
+    ax.bar([f"Група {i+1}" for i in range(len(cv_values))], cv_values)
+    ax.set_title("Порівняння стабільності груп за коефіцієнтом варіації")
+    ax.set_xlabel("Група")
+    ax.set_ylabel("Коефіцієнт варіації (%)")
+    ax.grid(True, axis='y')
+    fig.tight_layout()
+
+
+def _group_load_chart(fig, slot_sums, title):
+    ax = fig.add_subplot(111)
+    for i, total_load in enumerate(slot_sums):
+        ax.plot(total_load, label=f"Група {i+1}", marker='o', linestyle='-', markersize=4)
+
+    ax.set_title(title)
+    ax.set_xlabel("Часовий слот")
+    ax.set_ylabel("Загальне навантаження")
+    ax.legend(loc='best')
+    ax.grid(True)
+    fig.tight_layout()
+
+
+def _load_distribution_chart(fig, group_id, series, labels, stability):
+    ax = fig.add_subplot(111)
+    series = np.asarray(series, dtype=np.float64)
+    time_slots = series.shape[1] if series.ndim == 2 else 0
+    slots = np.arange(time_slots)
+    max_load = float(series.sum(axis=0).max()) if time_slots else 0
+
+    colors = colormaps["tab20"](range(len(series)))
+    legend_patches = []
+
+    # Стекова гістограма учасників групи
+    bottoms = np.zeros(time_slots)
+    for i, (service, service_name) in enumerate(zip(series, labels)):
+        color = colors[i % len(colors)]
+        ax.bar(slots, service, bottom=bottoms, color=color, edgecolor='black', linewidth=0.5)
+        legend_patches.append(Rectangle((0, 0), 1, 1, color=color, label=service_name))
+        bottoms = bottoms + service
+
+    # "Вільне місце" - прозора частина стовпчиків до максимального навантаження
+    ax.bar(slots, max_load - bottoms, bottom=bottoms, alpha=0.2, hatch='///', edgecolor='gray', linewidth=0.5)
+    legend_patches.append(Rectangle((0, 0), 1, 1, alpha=0.2, hatch='///', label="Вільне місце"))
+
+    ax.set_title(f"Розподіл навантаження для Групи {group_id}")
+    ax.set_xlabel("Часовий слот")
+    ax.set_ylabel("Навантаження")
+    ax.set_xticks(slots)
+    ax.set_xticklabels([f"{t+1}" for t in slots])
+    ax.grid(True, axis='y', linestyle='--', alpha=0.7)
+    ax.set_ylim(0, max_load)
+    ax.legend(handles=legend_patches, loc='upper right', title="Мікросервіси")
+
+    fig.text(0.5, 0.01, f"Коефіцієнт стабільності групи: {stability:.2f}%",
+             ha='center', fontsize=10, fontweight='bold')
+    fig.tight_layout(rect=[0, 0.03, 1, 0.98])  # Залишаємо місце для тексту
+
+
+def _microservices_chart(fig, series, labels, title):
+    ax = fig.add_subplot(111)
+    for service, name in zip(series, labels):
+        ax.plot(service, label=name, marker='o', linestyle='-', markersize=4)
+
+    ax.set_title(title)
+    ax.set_xlabel("Часовий слот")
+    ax.set_ylabel("Навантаження")
+    # Розміщення легенди збоку від графіка
+    ax.legend(loc='center left', bbox_to_anchor=(1.02, 0.5), fontsize=9)
+    ax.grid(True)
+    fig.tight_layout(rect=[0, 0, 0.85, 1])  # Залишаємо простір для легенди
+
+
+def _base_peak_chart(fig, base, peak, service_name):
+    ax = fig.add_subplot(111)
+    ax.plot(base, label="Базовий компонент", marker='o', linestyle='-', color='blue', markersize=4)
+    ax.plot(peak, label="Піковий компонент", marker='x', linestyle='--', color='red', markersize=4)
+    ax.plot(np.add(base, peak), label="Загальне навантаження",
+            marker='s', linestyle='-.', color='green', markersize=4)
+
+    ax.set_title(f"Розділення навантаження для мікросервісу: {service_name}")
+    ax.set_xlabel("Часовий слот")
+    ax.set_ylabel("Навантаження")
+    ax.legend(loc='center left', bbox_to_anchor=(1.02, 0.5), fontsize=9)
+    ax.grid(True)
+    fig.tight_layout(rect=[0, 0, 0.85, 1])
+
+
+# Назва графіка -> функція, що будує його на порожній фігурі
+CHARTS = {
+    "stability": _stability_chart,
+    "group_load": _group_load_chart,
+    "load_distribution": _load_distribution_chart,
+    "microservices": _microservices_chart,
+    "base_peak": _base_peak_chart,
+}
+
+
+def render_chart(kind, **data):
+    """
+    Будує графік з реєстру CHARTS у PNG
+
+    Використовує лише об'єктний API (Figure + FigureCanvasAgg) без глобального
+    стану pyplot, тому графіки можна будувати паралельно в потоках і процесах.
+
+    Args:
+        kind (str): Назва графіка з CHARTS
+        **data: Дані графіка (аргументи функції з CHARTS)
+
+    Returns:
+        tuple: (png, render_ms) - вміст PNG і час побудови в мілісекундах
+    """
+    started = perf_counter()
+    fig = Figure(figsize=CHART_FIGSIZE)
+    FigureCanvasAgg(fig)
+    CHARTS[kind](fig, **data)
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=CHART_DPI)
+    return buf.getvalue(), (perf_counter() - started) * 1000
+
+
+def warm_up():
+    """
+    Підготовка процесу побудови графіків: стиль, пошук шрифтів і перший рендер
+
+    Викликається як initializer пулу процесів, щоб перший запит до графіка не
+    платив за завантаження кешу шрифтів і гліфів кирилиці.
+    """
+    matplotlib.style.use(CHART_STYLE)
+    font_manager.findfont(font_manager.FontProperties())
+    render_chart("stability", cv_values=[1.0])
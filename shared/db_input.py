@@ -1,24 +1,272 @@
-import mysql.connector
 import json
 import os
 from dotenv import load_dotenv
+from shared import storage
+from shared.window_matrix import WindowMatrix
+from shared.window_store import WindowStore
+from shared.normalization import normalize_to_percentage, get_memoized_window, memoize_window
 
 # Завантаження змінних середовища з .env файлу
 load_dotenv()
 
+# Запити гарячих шляхів читання; shared.migrations перевіряє їх плани виконання
+WINDOW_QUERY = """
+SELECT service_name, value 
+FROM processed_metrics 
+WHERE metric_type = %s AND date = %s AND time = %s
+ORDER BY service_name
+"""
+
+RAW_WINDOW_QUERY = """
+SELECT service_name, value 
+FROM raw_metrics 
+WHERE metric_type = %s AND date = %s AND time = %s
+ORDER BY service_name
+"""
+
+# Сирі ряди кількох метрик одного вікна; {metric_types} - плейсхолдери списку метрик
+RAW_WINDOWS_QUERY = """
+SELECT metric_type, service_name, value
+FROM raw_metrics
+WHERE metric_type IN ({metric_types}) AND date = %s AND time = %s
+ORDER BY metric_type, service_name
+"""
+
+# Відбиток вікна на боці БД; {table} - таблиця метрик
+WINDOW_FINGERPRINT_TEMPLATE = """
+SELECT COUNT(*) AS rows_count, COALESCE(SUM(CRC32(CONCAT(service_name, value))), 0) AS checksum
+FROM {table}
+WHERE metric_type = %s AND date = %s AND time = %s
+"""
+WINDOW_FINGERPRINT_QUERY = WINDOW_FINGERPRINT_TEMPLATE.format(table="processed_metrics")
+RAW_FINGERPRINT_QUERY = WINDOW_FINGERPRINT_TEMPLATE.format(table="raw_metrics")
+
+# Розмір вікна (n мікросервісів, T слотів) без передачі рядів; {table} - таблиця метрик
+WINDOW_SHAPE_QUERY = """
+SELECT COUNT(*) AS services, COALESCE(MAX(JSON_LENGTH(value)), 0) AS slots
+FROM {table}
+WHERE metric_type = %s AND date = %s AND time = %s
+"""
+
+LATEST_RUN_QUERY = """
+SELECT run_id
+FROM grouping_runs
+WHERE metric_type = %s AND date = %s AND time = %s
+ORDER BY version DESC
+LIMIT 1
+"""
+
+GROUPING_RUNS_QUERY = """
+SELECT run_id, metric_type, date, time, version, max_group_size, stability_threshold,
+       num_groups, num_services, num_records, grouping_ms, save_ms, fingerprint, created_at
+FROM grouping_runs
+ORDER BY date DESC, time DESC, version DESC
+LIMIT %s OFFSET %s
+"""
+
+GROUPING_ROWS_QUERY = """
+SELECT group_id, service_name, component_type, load_data, group_load, stability_coefficient
+FROM grouping_results
+WHERE run_id = %s
+ORDER BY group_id, service_name
+"""
+
+# Записи групування, збережені до появи заголовків запусків (run_id IS NULL)
+LEGACY_GROUPING_ROWS_QUERY = """
+SELECT group_id, service_name, component_type, load_data, group_load, stability_coefficient
+FROM grouping_results
+WHERE date = %s AND time = %s AND metric_type = %s
+ORDER BY group_id, service_name
+"""
+
+def format_db_time(value):
+    """
+    Перетворює значення стовпця time (timedelta або time) у рядок 'HH:MM:SS'
+    """
+    if hasattr(value, "strftime"):
+        return value.strftime("%H:%M:%S")
+    if hasattr(value, "total_seconds"):
+        total_seconds = int(value.total_seconds())
+        hours, remainder = divmod(total_seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return str(value)
+
+def find_latest_run_id(cursor, metric_type, date, time):
+    """
+    Знаходить ідентифікатор останньої версії групування для вікна
+    
+    Args:
+        cursor: Курсор БД зі словниковими рядками
+        metric_type (str): Тип метрики
+        date (str): Дата у форматі 'YYYY-MM-DD'
+        time (str): Час у форматі 'HH:MM:SS'
+        
+    Returns:
+        int або None, якщо для вікна немає запусків
+    """
+    cursor.execute(LATEST_RUN_QUERY, (metric_type, date, time))
+    row = cursor.fetchone()
+    return row["run_id"] if row else None
+
+def fingerprint_from_row(row):
+    """
+    Форматує рядок запиту відбитка як '<кількість рядків>:<контрольна сума>'
+    """
+    return f"{row['rows_count']}:{row['checksum']}"
+
+def window_from_rows(rows, metric_type, date, time, fingerprint=None):
+    """
+    Будує WindowMatrix з рядків (service_name, value) запиту вікна
+    """
+    return WindowMatrix.from_rows(
+        ((row['service_name'], json.loads(row['value'])) for row in rows),
+        metric_type=metric_type, date=date, time=time, fingerprint=fingerprint
+    )
+
+def normalized_window_from_rows(rows, metric_type, date, time, fingerprint=None):
+    """
+    Будує нормалізоване у відсотки вікно з рядків сирого вікна
+    """
+    raw = window_from_rows(rows, metric_type, date, time)
+    return WindowMatrix(
+        normalize_to_percentage(raw.values, metric_type) if raw else raw.values,
+        raw.service_names, metric_type=metric_type, date=date, time=time, fingerprint=fingerprint
+    )
+
+def window_catalog_query(metric_type=None, date=None, updated_since=None):
+    """
+    Запит до каталогу вікон metric_windows з необов'язковими фільтрами
+    
+    Returns:
+        tuple: (query, params)
+    """
+    query = """
+    SELECT metric_type, date, time, has_raw, has_processed, updated_at
+    FROM metric_windows
+    WHERE 1=1
+    """
+    params = []
+    
+    if metric_type:
+        query += " AND metric_type = %s"
+        params.append(metric_type)
+    
+    if date:
+        query += " AND date = %s"
+        params.append(date)
+    
+    if updated_since:
+        query += " AND updated_at > %s"
+        params.append(updated_since)
+    
+    query += " ORDER BY date, time, metric_type"
+    return query, params
+
+def algorithm_data_query(metric_type, date=None, time=None):
+    """
+    Запит оброблених рядів метрики з необов'язковими фільтрами дати й часу
+    
+    Returns:
+        tuple: (query, params)
+    """
+    query = """
+    SELECT service_name, value 
+    FROM processed_metrics 
+    WHERE metric_type = %s
+    """
+    params = [metric_type]
+    
+    if date:
+        query += " AND date = %s"
+        params.append(date)
+    
+    if time:
+        query += " AND time = %s"
+        params.append(time)
+    
+    query += " ORDER BY service_name"
+    return query, params
+
+def raw_metrics_query(metric_type=None, service_name=None, date=None, time=None):
+    """
+    Запит сирих метрик з необов'язковими фільтрами
+    
+    Returns:
+        tuple: (query, params)
+    """
+    query = "SELECT service_name, metric_type, date, time, value FROM raw_metrics WHERE 1=1"
+    params = []
+
+    if metric_type:
+        query += " AND metric_type = %s"
+        params.append(metric_type)
+    
+    if service_name:
+        query += " AND service_name = %s"
+        params.append(service_name)
+    
+    if date:
+        query += " AND date = %s"
+        params.append(date)
+    
+    if time:
+        query += " AND time = %s"
+        params.append(time)
+
+    query += " ORDER BY date DESC, time DESC"
+    return query, params
+
+def raw_windows_from_rows(rows, date, time):
+    """
+    Будує WindowMatrix кожної метрики з рядків запиту RAW_WINDOWS_QUERY
+    
+    Returns:
+        dict: Тип метрики -> WindowMatrix (лише метрики, для яких є дані)
+    """
+    series = {}
+    for row in rows:
+        series.setdefault(row['metric_type'], []).append((row['service_name'], json.loads(row['value'])))
+    
+    return {
+        metric_type: WindowMatrix.from_rows(rows, metric_type=metric_type, date=date, time=time)
+        for metric_type, rows in series.items()
+    }
+
+def raw_metric_records(rows):
+    """
+    Перетворює рядки raw_metrics у словники відповіді API (некоректні рядки пропускаються)
+    """
+    result = []
+    for row in rows:
+        try:
+            result.append({
+                "service_name": row["service_name"],
+                "metric_type": row["metric_type"],
+                "date": row["date"].strftime("%Y-%m-%d"),
+                "time": row["time"].strftime("%H:%M:%S") if hasattr(row["time"], "strftime") else str(row["time"]),
+                "values": json.loads(row["value"])
+            })
+        except Exception as e:
+            continue
+    
+    return result
+
 class DBInput:
     def __init__(self):
         """
         Ініціалізація з'єднання з базою даних
         """
-        self.connection = mysql.connector.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            user=os.getenv('DB_USER', 'root'),
-            password=os.getenv('DB_PASSWORD', 'root'),
-            database=os.getenv('DB_NAME', 'diploma'),
-            port=int(os.getenv('DB_PORT', 3306))
-        )
+        # MySQL або вбудований SQLite залежно від DB_BACKEND
+        self.connection = storage.connect()
         self.cursor = self.connection.cursor(dictionary=True)
+        # Локальне сховище вікон (якщо задано WINDOW_STORE_DIR)
+        self.window_store = WindowStore.from_env()
+        # Читати оброблені вікна як нормалізацію сирих даних замість processed_metrics;
+        # без запису оброблених рядів (STORE_PROCESSED=0) processed_metrics може
+        # містити застарілі ряди, тому вікна теж обчислюються з сирих даних
+        self.normalize_on_read = (os.getenv('NORMALIZE_ON_READ', '0') == '1'
+                                  or os.getenv('STORE_PROCESSED', '1') != '1')
 
     def get_data_for_algorithm(self, metric_type, date=None, time=None):
         """
@@ -34,23 +282,7 @@ class DBInput:
                 microservices - список списків значень для кожного мікросервісу
                 service_names - список назв мікросервісів
         """
-        query = """
-        SELECT service_name, value 
-        FROM processed_metrics 
-        WHERE metric_type = %s
-        """
-        params = [metric_type]
-        
-        if date:
-            query += " AND date = %s"
-            params.append(date)
-        
-        if time:
-            query += " AND time = %s"
-            params.append(time)
-        
-        query += " ORDER BY service_name"
-        
+        query, params = algorithm_data_query(metric_type, date, time)
         self.cursor.execute(query, params)
         results = self.cursor.fetchall()
         
@@ -64,65 +296,185 @@ class DBInput:
         
         return microservices, service_names
 
-    def get_raw_data_for_algorithm(self, metric_type, date=None, time=None):
+    def get_window_matrix(self, metric_type, date, time):
         """
-        Отримання сирих даних метрик для нормалізації
+        Отримання даних вікна одним запитом у вигляді щільної матриці
         
         Args:
             metric_type (str): Тип метрики ('CPU', 'RAM', 'CHANNEL')
-            date (str, optional): Дата у форматі 'YYYY-MM-DD'
-            time (str, optional): Час у форматі 'HH:MM:SS'
+            date (str): Дата у форматі 'YYYY-MM-DD'
+            time (str): Час у форматі 'HH:MM:SS'
             
         Returns:
-            tuple: (raw_data, service_names)
-                raw_data - список списків сирих значень для кожного мікросервісу
-                service_names - список назв мікросервісів
+            WindowMatrix: Матриця (n_services, T), індекс назв та метадані вікна;
+                fingerprint - відбиток саме тих рядів, з яких побудовано матрицю
         """
-        query = """
-        SELECT service_name, value 
-        FROM raw_metrics 
-        WHERE metric_type = %s
+        if self.normalize_on_read:
+            return self.get_normalized_window(metric_type, date, time)
+        
+        # Відбиток і ряди читаються з одного знімка БД, тому відбиток, яким
+        # позначається запуск групування, відповідає згрупованим даним.
+        # Блок локального сховища використовується, лише якщо його відбиток
+        # збігається з поточним станом вікна в БД
+        with storage.read_snapshot(self.connection):
+            fingerprint = self.get_window_fingerprint(metric_type, date, time)
+            if self.window_store is not None:
+                window = self.window_store.load(metric_type, date, time, fingerprint)
+                if window is not None:
+                    return window
+            
+            self.cursor.execute(WINDOW_QUERY, (metric_type, date, time))
+            results = self.cursor.fetchall()
+        
+        window = window_from_rows(results, metric_type, date, time, fingerprint)
+        
+        if self.window_store is not None and window:
+            self.window_store.save(window, fingerprint)
+        
+        # Оброблені ряди не записувались - вікно обчислюється з сирих даних
+        if not window:
+            return self.get_normalized_window(metric_type, date, time)
+        
+        return window
+
+    def get_normalized_window(self, metric_type, date, time):
         """
-        params = [metric_type]
+        Нормалізоване у відсотки вікно, обчислене з raw_metrics під час читання
         
-        if date:
-            query += " AND date = %s"
-            params.append(date)
+        Результат запам'ятовується в пам'яті процесу разом з відбитком сирих
+        рядів, тому повторне читання передає лише відбиток, а записи інших
+        процесів змінюють його і вікно обчислюється наново.
         
-        if time:
-            query += " AND time = %s"
-            params.append(time)
+        Args:
+            metric_type (str): Тип метрики ('CPU', 'RAM', 'CHANNEL')
+            date (str): Дата у форматі 'YYYY-MM-DD'
+            time (str): Час у форматі 'HH:MM:SS'
+            
+        Returns:
+            WindowMatrix: Матриця відсотків (порожня, якщо сирих даних немає)
+                з відбитком сирих рядів
+        """
+        with storage.read_snapshot(self.connection):
+            self.cursor.execute(RAW_FINGERPRINT_QUERY, (metric_type, date, time))
+            fingerprint = fingerprint_from_row(self.cursor.fetchone())
+            key = (metric_type, str(date), str(time), fingerprint)
+            window = get_memoized_window(key)
+            if window is not None:
+                return window
+            
+            self.cursor.execute(RAW_WINDOW_QUERY, (metric_type, date, time))
+            rows = self.cursor.fetchall()
         
-        query += " ORDER BY service_name"
+        window = normalized_window_from_rows(rows, metric_type, date, time, fingerprint)
+        if window:
+            memoize_window(key, window)
         
-        self.cursor.execute(query, params)
-        results = self.cursor.fetchall()
+        return window
+
+    def get_window_fingerprint(self, metric_type, date, time):
+        """
+        Обчислює відбиток вікна на боці БД без передачі самих рядів
         
-        raw_data = []
-        service_names = []
+        Args:
+            metric_type (str): Тип метрики ('CPU', 'RAM', 'CHANNEL')
+            date (str): Дата у форматі 'YYYY-MM-DD'
+            time (str): Час у форматі 'HH:MM:SS'
+            
+        Returns:
+            str: Відбиток у форматі '<кількість рядків>:<контрольна сума>'
+        """
+        self.cursor.execute(WINDOW_FINGERPRINT_QUERY, (metric_type, date, time))
         
-        for row in results:
-            service_names.append(row['service_name'])
-            values = json.loads(row['value'])
-            raw_data.append(values)
+        return fingerprint_from_row(self.cursor.fetchone())
+
+    def get_window_shape(self, metric_type, date, time):
+        """
+        Розмір вікна, обчислений на боці БД (для оцінки вартості групування)
         
-        return raw_data, service_names
+        Returns:
+            tuple: (кількість мікросервісів, кількість часових слотів)
+        """
+        tables = ["raw_metrics"] if self.normalize_on_read else ["processed_metrics", "raw_metrics"]
+        for table in tables:
+            self.cursor.execute(WINDOW_SHAPE_QUERY.format(table=table), (metric_type, date, time))
+            row = self.cursor.fetchone()
+            if row["services"]:
+                return int(row["services"]), int(row["slots"])
+        
+        return 0, 0
 
-    def get_all_raw_metrics(self, metric_type=None, service_name=None, date=None, time=None):
+    def get_grouping_runs(self, limit=100, offset=0):
         """
-        Отримати сирі метрики з бази даних з можливістю фільтрації
+        Отримання сторінки заголовків збережених запусків групування
+        
+        Args:
+            limit (int): Максимальна кількість запусків
+            offset (int): Зсув від початку списку
+            
+        Returns:
+            list: Рядки таблиці grouping_runs, від найновіших вікон до найстаріших
         """
-        try:
-            query = "SELECT service_name, metric_type, date, time, value FROM raw_metrics WHERE 1=1"
-            params = []
+        self.cursor.execute(GROUPING_RUNS_QUERY, (limit, offset))
+        return self.cursor.fetchall()
 
-            if metric_type:
-                query += " AND metric_type = %s"
-                params.append(metric_type)
+    def get_latest_run_id(self, metric_type, date, time):
+        """
+        Ідентифікатор останнього запуску групування для вікна
+        
+        Returns:
+            int або None, якщо для вікна немає запусків
+        """
+        return find_latest_run_id(self.cursor, metric_type, date, time)
+
+    def get_grouping_rows(self, metric_type=None, date=None, time=None, run_id=None):
+        """
+        Отримання всіх рядків збереженого групування одним запитом
+        
+        Args:
+            metric_type (str): Тип метрики ('CPU', 'RAM', 'CHANNEL')
+            date (str): Дата у форматі 'YYYY-MM-DD'
+            time (str): Час у форматі 'HH:MM:SS'
+            run_id (int, optional): Ідентифікатор запуску. Якщо не задано,
+                використовується останній запуск для вікна
             
-            if service_name:
-                query += " AND service_name = %s"
-                params.append(service_name)
+        Returns:
+            list: Рядки з ключами group_id, service_name, component_type, load_data,
+                group_load, stability_coefficient, впорядковані за group_id та service_name
+        """
+        if run_id is None:
+            run_id = self.get_latest_run_id(metric_type, date, time)
+        
+        if run_id is not None:
+            self.cursor.execute(GROUPING_ROWS_QUERY, (run_id,))
+        else:
+            # Записи, збережені до появи заголовків запусків
+            self.cursor.execute(LEGACY_GROUPING_ROWS_QUERY, (date, time, metric_type))
+        return self.cursor.fetchall()
+
+    def get_raw_data_for_algorithm(self, metric_type, date=None, time=None):
+        """
+        Отримання сирих даних метрик для нормалізації
+        
+        Args:
+            metric_type (str): Тип метрики ('CPU', 'RAM', 'CHANNEL')
+            date (str, optional): Дата у форматі 'YYYY-MM-DD'
+            time (str, optional): Час у форматі 'HH:MM:SS'
+            
+        Returns:
+            tuple: (raw_data, service_names)
+                raw_data - список списків сирих значень для кожного мікросервісу
+                service_names - список назв мікросервісів
+        """
+        if date and time:
+            # Звичайний випадок - одне вікно
+            self.cursor.execute(RAW_WINDOW_QUERY, (metric_type, date, time))
+        else:
+            query = """
+            SELECT service_name, value 
+            FROM raw_metrics 
+            WHERE metric_type = %s
+            """
+            params = [metric_type]
             
             if date:
                 query += " AND date = %s"
@@ -131,24 +483,62 @@ class DBInput:
             if time:
                 query += " AND time = %s"
                 params.append(time)
-
-            query += " ORDER BY date DESC, time DESC"
+            
+            query += " ORDER BY service_name"
             
             self.cursor.execute(query, params)
-            rows = self.cursor.fetchall()
+        results = self.cursor.fetchall()
+        
+        raw_data = []
+        service_names = []
+        
+        for row in results:
+            service_names.append(row['service_name'])
+            values = json.loads(row['value'])
+            raw_data.append(values)
+        
+        return raw_data, service_names
+
+    def get_raw_windows(self, date, time, metric_types=("CPU", "RAM", "CHANNEL")):
+        """
+        Отримання сирих даних вікна для кількох метрик одним запитом
+        
+        Args:
+            date (str): Дата у форматі 'YYYY-MM-DD'
+            time (str): Час у форматі 'HH:MM:SS'
+            metric_types: Типи метрик
             
-            result = []
-            for row in rows:
-                try:
-                    result.append({
-                        "service_name": row["service_name"],
-                        "metric_type": row["metric_type"],
-                        "date": row["date"].strftime("%Y-%m-%d"),
-                        "time": row["time"].strftime("%H:%M:%S") if hasattr(row["time"], "strftime") else str(row["time"]),
-                        "values": json.loads(row["value"])
-                    })
-                except Exception as e:
-                    continue
+        Returns:
+            dict: Тип метрики -> WindowMatrix (лише метрики, для яких є дані)
+        """
+        metric_types = list(metric_types)
+        query = RAW_WINDOWS_QUERY.format(metric_types=", ".join(["%s"] * len(metric_types)))
+        
+        self.cursor.execute(query, metric_types + [date, time])
+        return raw_windows_from_rows(self.cursor.fetchall(), date, time)
+
+    def get_window_catalog(self, metric_type=None, date=None, updated_since=None):
+        """
+        Отримання каталогу вікон (метрика, дата, час) одним запитом до metric_windows
+        
+        Args:
+            metric_type (str, optional): Тип метрики
+            date (str, optional): Дата у форматі 'YYYY-MM-DD'
+            updated_since (datetime, optional): Лише вікна, змінені після цього моменту
+            
+        Returns:
+            list: Рядки з полями metric_type, date, time, has_raw, has_processed, updated_at
+        """
+        self.cursor.execute(*window_catalog_query(metric_type, date, updated_since))
+        return self.cursor.fetchall()
+
+    def get_all_raw_metrics(self, metric_type=None, service_name=None, date=None, time=None):
+        """
+        Отримати сирі метрики з бази даних з можливістю фільтрації
+        """
+        try:
+            self.cursor.execute(*raw_metrics_query(metric_type, service_name, date, time))
+            result = raw_metric_records(self.cursor.fetchall())
             
             return result
             
@@ -1,26 +1,144 @@
-import mysql.connector
 import json
 import os
+import time as time_module
 import numpy as np
 from dotenv import load_dotenv
-from shared.constants import STANDARD_CONFIG
+from shared import storage
+from shared.normalization import normalize_to_percentage, invalidate_normalized_windows
+from shared.window_catalog import invalidate_window_catalog
 
 # Завантаження змінних середовища з .env файлу
 load_dotenv()
 
+# Запити гарячих шляхів запису; shared.migrations перевіряє їх плани виконання
+RUN_VERSION_QUERY = """
+SELECT COALESCE(MAX(version), 0) AS version
+FROM grouping_runs
+WHERE metric_type = %s AND date = %s AND time = %s
+FOR UPDATE
+"""
+
+WINDOW_RUNS_QUERY = """
+SELECT run_id
+FROM grouping_runs
+WHERE metric_type = %s AND date = %s AND time = %s
+ORDER BY version DESC
+"""
+
+RUN_INSERT = """
+INSERT INTO grouping_runs
+(metric_type, date, time, version, max_group_size, stability_threshold,
+ num_groups, num_services, grouping_ms, fingerprint)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+RESULTS_INSERT = """
+INSERT INTO grouping_results 
+(run_id, group_id, service_name, date, time, metric_type, component_type,
+ load_data, group_load, stability_coefficient)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+RUN_STATS_UPDATE = "UPDATE grouping_runs SET num_records = %s, save_ms = %s WHERE run_id = %s"
+
+# Оброблений ряд мікросервісу унікальний для вікна: повторна нормалізація його замінює
+PROCESSED_UPSERT = """
+INSERT INTO processed_metrics 
+(service_name, metric_type, date, time, value, normalization_type)
+VALUES (%s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE value = VALUES(value), normalization_type = VALUES(normalization_type)
+"""
+
+# Позначка вікна в каталозі metric_windows; flag - has_raw або has_processed
+WINDOW_REGISTER_QUERY = """
+INSERT INTO metric_windows (metric_type, date, time, {flag})
+VALUES (%s, %s, %s, 1)
+ON DUPLICATE KEY UPDATE {flag} = 1, updated_at = CURRENT_TIMESTAMP
+"""
+
+LEGACY_RESULTS_DELETE = """
+DELETE FROM grouping_results
+WHERE run_id IS NULL AND metric_type = %s AND date = %s AND time = %s
+"""
+
+def encode_series(values):
+    """
+    Компактне JSON-представлення часового ряду без втрати точності
+    """
+    return json.dumps(np.asarray(values, dtype=np.float64).tolist(), separators=(",", ":"))
+
+def processed_records(data_list, normalization_type="percentage"):
+    """
+    Рядки PROCESSED_UPSERT з кортежів (service_name, metric_type, date, time, values)
+    """
+    return [
+        (service_name, metric_type, date, time, encode_series(values), normalization_type)
+        for service_name, metric_type, date, time, values in data_list
+    ]
+
+def build_grouping_records(result, service_names, run_id, metric_type, date, time):
+    """
+    Формує рядки grouping_results для одного запуску групування
+    
+    Навантаження та стабільність групи беруться з GroupingResult і
+    записуються в кожен її рядок.
+    
+    Args:
+        result (GroupingResult): Результат групування
+        service_names: Список назв мікросервісів вікна
+    
+    Returns:
+        list: Кортежі в порядку стовпців RESULTS_INSERT
+    """
+    records = []
+    
+    # Для кожної групи
+    for group_id in range(len(result)):
+        group_load = encode_series(result.slot_sums[group_id])
+        stability = float(result.cvs[group_id])
+        
+        # Для кожного учасника групи
+        for service_idx, component_type, values in result.members(group_id):
+            records.append((
+                run_id,
+                group_id + 1, 
+                service_names[service_idx], 
+                date,
+                time,
+                metric_type,
+                component_type,
+                encode_series(values),
+                group_load,
+                stability
+            ))
+    
+    return records
+
+def stale_run_ids(window_runs, keep_versions):
+    """
+    Ідентифікатори запусків вікна понад keep_versions останніх
+    
+    Args:
+        window_runs: Рядки WINDOW_RUNS_QUERY (від новішої версії до старішої)
+        keep_versions (int): Кількість версій, що залишаються (мінімум 1)
+    """
+    return [row["run_id"] for row in window_runs[max(1, keep_versions):]]
+
 class DBOutput:
     def __init__(self):
         """
         Ініціалізація з'єднання з базою даних
         """
-        self.connection = mysql.connector.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            user=os.getenv('DB_USER', 'root'),
-            password=os.getenv('DB_PASSWORD', 'root'),
-            database=os.getenv('DB_NAME', 'diploma'),
-            port=int(os.getenv('DB_PORT', 3306))
-        )
+        # MySQL або вбудований SQLite залежно від DB_BACKEND
+        self.connection = storage.connect()
         self.cursor = self.connection.cursor(dictionary=True)
+        # Ідентифікатор останнього збереженого запуску групування
+        self.last_run_id = None
+        # Чи записувати оброблені ряди в processed_metrics; якщо ні, читачі
+        # обчислюють їх з raw_metrics (DBInput.get_normalized_window)
+        self.store_processed = os.getenv('STORE_PROCESSED', '1') == '1'
+        # Скільки версій групування зберігати для кожного вікна (1 - атомарна заміна)
+        self.keep_versions = max(1, int(os.getenv('GROUPING_KEEP_VERSIONS', 1)))
 
     def save_raw_data(self, service_name, metric_type, date, time, values):
         """
@@ -43,7 +161,10 @@ class DBOutput:
             """
             values_json = json.dumps(values)
             self.cursor.execute(query, (service_name, metric_type, date, time, values_json))
+            self._register_window(metric_type, date, time, "has_raw")
             self.connection.commit()
+            invalidate_window_catalog()
+            invalidate_normalized_windows()
             print(f"Дані успішно збережено в raw_metrics")
             return True
         except Exception as e:
@@ -53,7 +174,10 @@ class DBOutput:
 
     def save_processed_data(self, service_name, metric_type, date, time, processed_values):
         """
-        Зберігає оброблені дані в таблицю processed_metrics
+        Зберігає оброблені дані в таблицю processed_metrics (наявний ряд
+        мікросервісу для того ж вікна замінюється). Якщо STORE_PROCESSED=0,
+        ряд не записується: вікно лише позначається в каталозі, а читачі
+        обчислюють його з сирих даних.
         
         Args:
             service_name (str): Назва мікросервісу
@@ -66,17 +190,15 @@ class DBOutput:
             bool: True, якщо дані успішно збережено, False - інакше
         """
         try:
-            query = """
-            INSERT INTO processed_metrics 
-            (service_name, metric_type, date, time, value, normalization_type)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            values_json = json.dumps(processed_values)
-            self.cursor.execute(query, (
-                service_name, metric_type, date, time, 
-                values_json, "percentage"
-            ))
+            if self.store_processed:
+                values_json = json.dumps(processed_values)
+                self.cursor.execute(PROCESSED_UPSERT, (
+                    service_name, metric_type, date, time, 
+                    values_json, "percentage"
+                ))
+            self._register_window(metric_type, date, time, "has_processed")
             self.connection.commit()
+            invalidate_window_catalog()
             print(f"Дані успішно збережено в processed_metrics")
             return True
         except Exception as e:
@@ -84,65 +206,118 @@ class DBOutput:
             print(f"Помилка при збереженні даних в processed_metrics: {e}")
             return False
 
-    def save_grouping_results(self, groups, group_services, service_names, metric_type, date, time):
+    def _register_window(self, metric_type, date, time, flag):
         """
-        Зберігає результати групування в базу даних
+        Додає вікно до каталогу metric_windows або позначає наявність у ньому
+        сирих (has_raw) чи оброблених (has_processed) даних. Не виконує commit.
+        """
+        self.cursor.execute(WINDOW_REGISTER_QUERY.format(flag=flag), (metric_type, date, time))
+
+    def rebuild_window_catalog(self):
+        """
+        Повністю перебудовує каталог metric_windows з таблиць метрик
+        (для даних, записаних до появи каталогу)
+        
+        Returns:
+            int: Кількість вікон у каталозі
+        """
+        try:
+            for table, flag in (("raw_metrics", "has_raw"), ("processed_metrics", "has_processed")):
+                query = f"""
+                INSERT INTO metric_windows (metric_type, date, time, {flag})
+                SELECT DISTINCT metric_type, date, time, 1 FROM {table}
+                ON DUPLICATE KEY UPDATE {flag} = 1
+                """
+                self.cursor.execute(query)
+            
+            self.cursor.execute("SELECT COUNT(*) AS windows FROM metric_windows")
+            windows = self.cursor.fetchone()["windows"]
+            self.connection.commit()
+            invalidate_window_catalog()
+            return windows
+        except Exception as e:
+            self.connection.rollback()
+            print(f"Помилка при перебудові каталогу вікон: {e}")
+            return 0
+
+    def save_grouping_results(self, result, service_names, metric_type, date, time,
+                              max_group_size=None, stability_threshold=None, grouping_ms=None,
+                              fingerprint=None, keep_versions=None):
+        """
+        Зберігає результати групування в базу даних разом з часовим рядом кожного
+        учасника (load_data), сумарним навантаженням групи (group_load) та її
+        коефіцієнтом варіації (stability_coefficient), щоб читачам не доводилось
+        їх перераховувати. В одній транзакції створюється заголовок запуску в
+        таблиці grouping_runs з наступним номером версії вікна, а всі записи
+        результатів посилаються на його run_id. Версії понад keep_versions (та
+        записи без заголовка запуску) для цього ж вікна видаляються в тій самій
+        транзакції, тому повторний запуск замінює результат, а не дублює його.
         
         Args:
-            groups: Список груп, де кожна група містить часові ряди мікросервісів
-            group_services: Список індексів мікросервісів у кожній групі
+            result (GroupingResult): Результат групування (старий формат -
+                через GroupingResult.from_tuple)
             service_names: Список назв мікросервісів
             metric_type: Тип метрики ('CPU', 'RAM', 'CHANNEL')
             date: Дата у форматі 'YYYY-MM-DD'
             time: Час у форматі 'HH:MM:SS'
+            max_group_size: Параметр запуску - максимальний розмір групи
+            stability_threshold: Параметр запуску - поріг стабільності (%)
+            grouping_ms: Тривалість формування груп у мілісекундах
+            fingerprint: Відбиток вхідних даних вікна (WindowMatrix.fingerprint)
+            keep_versions: Кількість версій вікна, що залишаються після запису
+                (за замовчуванням GROUPING_KEEP_VERSIONS, мінімум 1)
             
         Returns:
-            int: Кількість збережених записів
+            int: Кількість збережених записів (ідентифікатор запуску - у self.last_run_id)
         """
+        self.last_run_id = None
+        
         # Перевіряємо, чи є результати для збереження
-        if not groups or not group_services:
+        if not len(result):
             print("Немає результатів для збереження")
             return 0
         
         try:
-            # Підготовка даних для вставки
-            records_count = 0
-            
-            # Для кожної групи
-            for group_id, (group, service_indices) in enumerate(zip(groups, group_services), 1):
-                # Для кожного мікросервісу в групі
-                for idx in service_indices:
-                    # Визначаємо реальний індекс та назву мікросервісу
-                    if idx >= 1000:  # Базовий компонент
-                        real_idx = idx - 1000
-                        service_name = service_names[real_idx]
-                        component_type = "base"
-                    elif idx < 0:  # Піковий компонент
-                        real_idx = -idx
-                        service_name = service_names[real_idx]
-                        component_type = "peak"
-                    else:  # Звичайний мікросервіс
-                        service_name = service_names[idx]
-                        component_type = "original"
-                    
-                    # Вставка запису в таблицю grouping_results
-                    query = """
-                    INSERT INTO grouping_results 
-                    (group_id, service_name, date, time, metric_type, component_type)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    """
-                    self.cursor.execute(query, (
-                        group_id, 
-                        service_name, 
-                        date,
-                        time,
-                        metric_type,
-                        component_type
-                    ))
-                    records_count += 1
+            save_started = time_module.perf_counter()
+            
+            # Блокування заголовків вікна до кінця транзакції: паралельні записи
+            # одного вікна серіалізуються й отримують різні номери версій
+            self.cursor.execute(RUN_VERSION_QUERY, (metric_type, date, time))
+            version = self.cursor.fetchone()["version"] + 1
+            
+            # Заголовок запуску групування
+            self.cursor.execute(RUN_INSERT, (
+                metric_type,
+                date,
+                time,
+                version,
+                max_group_size,
+                stability_threshold,
+                len(result),
+                len(service_names),
+                grouping_ms,
+                fingerprint
+            ))
+            run_id = self.cursor.lastrowid
+            
+            # Вставка всіх записів у таблицю grouping_results одним пакетом
+            records = build_grouping_records(result, service_names, run_id, metric_type, date, time)
+            self.cursor.executemany(RESULTS_INSERT, records)
+            
+            # Тривалість збереження фіксується в заголовку запуску
+            save_ms = (time_module.perf_counter() - save_started) * 1000
+            self.cursor.execute(RUN_STATS_UPDATE, (len(records), save_ms, run_id))
+            
+            # Застарілі версії вікна видаляються в тій самій транзакції
+            self._purge_grouping_versions(
+                metric_type, date, time,
+                keep_versions if keep_versions is not None else self.keep_versions
+            )
             
             # Зберігаємо зміни
             self.connection.commit()
+            self.last_run_id = run_id
+            records_count = len(records)
             print(f"Збережено {records_count} записів у таблицю grouping_results")
             return records_count
             
@@ -151,6 +326,61 @@ class DBOutput:
             print(f"Помилка при збереженні результатів: {e}")
             return 0
 
+    def _purge_grouping_versions(self, metric_type, date, time, keep_versions):
+        """
+        Видаляє версії групування вікна, старші за keep_versions останніх, а також
+        записи grouping_results без заголовка запуску. Не виконує commit.
+        
+        Returns:
+            int: Кількість видалених запусків
+        """
+        self.cursor.execute(WINDOW_RUNS_QUERY, (metric_type, date, time))
+        stale_ids = stale_run_ids(self.cursor.fetchall(), keep_versions)
+        
+        if stale_ids:
+            placeholders = ", ".join(["%s"] * len(stale_ids))
+            self.cursor.execute(
+                f"DELETE FROM grouping_results WHERE run_id IN ({placeholders})", stale_ids
+            )
+            self.cursor.execute(
+                f"DELETE FROM grouping_runs WHERE run_id IN ({placeholders})", stale_ids
+            )
+        
+        # Записи, збережені до появи заголовків запусків, дублюють актуальну версію
+        self.cursor.execute(LEGACY_RESULTS_DELETE, (metric_type, date, time))
+        
+        return len(stale_ids)
+
+    def purge_grouping_versions(self, keep_versions=None):
+        """
+        Застосовує політику зберігання версій до всіх вікон
+        
+        Args:
+            keep_versions (int, optional): Кількість версій на вікно
+                (за замовчуванням GROUPING_KEEP_VERSIONS)
+            
+        Returns:
+            int: Кількість видалених запусків
+        """
+        keep_versions = keep_versions if keep_versions is not None else self.keep_versions
+        try:
+            self.cursor.execute("SELECT DISTINCT metric_type, date, time FROM grouping_runs")
+            windows = self.cursor.fetchall()
+            
+            purged = 0
+            for window in windows:
+                purged += self._purge_grouping_versions(
+                    window["metric_type"], window["date"], window["time"], keep_versions
+                )
+            
+            self.connection.commit()
+            print(f"Видалено {purged} застарілих версій групування")
+            return purged
+        except Exception as e:
+            self.connection.rollback()
+            print(f"Помилка при видаленні застарілих версій групування: {e}")
+            return 0
+
     def batch_save_raw_data(self, data_list):
         """
         Пакетне збереження сирих даних в таблицю raw_metrics
@@ -169,6 +399,36 @@ class DBOutput:
         
         return success_count
 
+    def batch_save_processed_data(self, data_list, normalization_type="percentage"):
+        """
+        Пакетне збереження оброблених даних одним upsert-запитом і однією транзакцією
+        
+        Args:
+            data_list: Список кортежів (service_name, metric_type, date, time, values)
+            normalization_type (str): Тип нормалізації
+            
+        Returns:
+            int: Кількість збережених рядів (0 у разі помилки)
+        """
+        if not data_list:
+            return 0
+        
+        try:
+            records = processed_records(data_list, normalization_type)
+            if self.store_processed:
+                self.cursor.executemany(PROCESSED_UPSERT, records)
+            
+            for metric_type, date, time in {(row[1], row[2], row[3]) for row in data_list}:
+                self._register_window(metric_type, date, time, "has_processed")
+            
+            self.connection.commit()
+            invalidate_window_catalog()
+            return len(records)
+        except Exception as e:
+            self.connection.rollback()
+            print(f"Помилка при пакетному збереженні даних в processed_metrics: {e}")
+            return 0
+
     def normalize_to_percentage(self, values, metric_type):
         """
         Нормалізує дані в межах 0-100 (відсотки) відносно стандартної конфігурації
@@ -180,20 +440,7 @@ class DBOutput:
         Returns:
             list: Нормалізовані значення у відсотках (0-100), заокруглені до двох знаків після коми
         """
-        if metric_type not in STANDARD_CONFIG:
-            raise ValueError(f"Непідтримуваний тип метрики: {metric_type}")
-
-        values = np.array(values)
-        standard_value = STANDARD_CONFIG[metric_type]["value"]
-        
-        # Нормалізація відносно стандартного значення
-        normalized = (values / standard_value) * 100
-        normalized = np.clip(normalized, 0, 100)
-        
-        # Заокруглення до двох знаків після коми
-        normalized = np.round(normalized, 2)
-        
-        return normalized.tolist()
+        return normalize_to_percentage(values, metric_type).tolist()
 
     def process_and_save_percentage_data(self, service_name, metric_type, date, time, raw_values):
         """
@@ -1,58 +1,70 @@
 import json
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, combinations, islice
 from shared.db_input import DBInput
+from shared.grouping_result import GroupingResult, ORIGINAL, BASE, PEAK, COMPONENT_KINDS, COMPONENT_TYPES, series_matrix
+from shared.window_matrix import WindowMatrix
 import numpy as np
 
+# Engine used to generate candidate groups: auto, exhaustive, pruned, parallel, approximate
+GROUPING_ENGINE = os.getenv("GROUPING_ENGINE", "auto")
+# Target latency (ms) and memory (MB) that automatic engine selection tries to meet
+GROUPING_TARGET_MS = float(os.getenv("GROUPING_TARGET_MS", 5000))
+GROUPING_MEMORY_MB = float(os.getenv("GROUPING_MEMORY_MB", 1024))
+# Worker processes of the parallel engine (blank means one per CPU)
+GROUPING_PARALLELISM = int(os.getenv("GROUPING_PARALLELISM") or os.cpu_count() or 1)
+# Cost model coefficients written by performance_test.calibrate_cost_model
+GROUPING_CALIBRATION = os.getenv(
+    "GROUPING_CALIBRATION", os.path.join(os.path.dirname(os.path.abspath(__file__)), "grouping_calibration.json")
+)
+
+# Elements of a (batch, T) slot-sum buffer scored at once by the batched engines
+BATCH_ELEMENTS = 1 << 20
+# Candidate groups kept per extension step of the approximate engine (per available service)
+APPROXIMATE_BEAM = 4
+
 def calculate_stability(group):
     """
     Calculates the coefficient of variation for a group of microservices.
     Lower value = better stability.
     
     Args:
-        group: List of time series for microservice loads in the group
+        group: List of time series (or 2-D array rows) for microservice loads in the group
         
     Returns:
         Coefficient of variation in percentage
     """
     # Calculate the sum for each time slot
-    time_slots = len(group[0])
-    slot_sums = [0] * time_slots
-    
-    for service in group:
-        for t in range(time_slots):
-            slot_sums[t] += service[t]
+    slot_sums = np.sum(group, axis=0, dtype=np.float64)
     
     # Calculate the coefficient of variation
-    mean = sum(slot_sums) / len(slot_sums)
+    mean = slot_sums.mean()
     
     if mean == 0:
         return 0 # empty == stable
     
-    variance = sum((x - mean) ** 2 for x in slot_sums) / len(slot_sums)
-    std_dev = variance ** 0.5
+    std_dev = slot_sums.std()
     
-    return (std_dev / mean) * 100  # Coefficient of variation in percentage
+    return float(std_dev / mean * 100)  # Coefficient of variation in percentage
 
 def calculate_load_sum(services):
     """
     Calculates the total load of each time slot for a set of microservices.
     
     Args:
-        services: List of time series for microservice loads
+        services: List of time series (or 2-D array rows) for microservice loads
         
     Returns:
         List of total loads by time slots
     """
-    if not services:
+    if len(services) == 0:
         return []
     
-    time_slots = len(services[0])
-    slot_sums = [0] * time_slots
-    
-    for service in services:
-        for t in range(time_slots):
-            slot_sums[t] += service[t]
-    
-    return slot_sums
+    return np.sum(services, axis=0).tolist()
 
 def generate_stable_groups(available_indices, microservices, group_size, stability_threshold):
     """
@@ -68,8 +80,6 @@ def generate_stable_groups(available_indices, microservices, group_size, stabili
     Returns:
         List of tuples (group, indices, cv) sorted by cv ascending
     """
-    from itertools import combinations
-    
     candidate_groups = []
     
     # Generate all combinations of current group size from available microservices
@@ -89,6 +99,333 @@ def generate_stable_groups(available_indices, microservices, group_size, stabili
     # Sort candidate groups by stability (lowest CV first)
     return sorted(candidate_groups, key=lambda x: x[2])
 
+def _combination_batches(size, group_size, batch_rows, first=None):
+    """
+    Yields (batch, group_size) arrays of index combinations in lexicographic order,
+    optionally only those starting with index `first`.
+    """
+    if first is None:
+        combos = combinations(range(size), group_size)
+    else:
+        combos = ((first,) + rest for rest in combinations(range(first + 1, size), group_size - 1))
+    while True:
+        batch = np.fromiter(chain.from_iterable(islice(combos, batch_rows)), dtype=np.intp)
+        if not batch.size:
+            return
+        yield batch.reshape(-1, group_size)
+
+def _score_batch(rows, batch):
+    """
+    CV (%) of every combination in the batch; same arithmetic as calculate_stability.
+    """
+    slot_sums = rows[batch[:, 0]].copy()
+    for column in range(1, batch.shape[1]):
+        slot_sums += rows[batch[:, column]]
+    mean = slot_sums.mean(axis=1)
+    std = slot_sums.std(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cv = np.where(mean == 0, 0.0, std / mean * 100)
+    return cv
+
+def _stable_combinations(rows, group_size, stability_threshold, firsts=None):
+    """
+    Scores combinations of `rows` in batches and keeps only those under the threshold.
+    
+    Returns:
+        Tuple (combos, cvs) in lexicographic order of the combinations
+    """
+    batch_rows = max(1, BATCH_ELEMENTS // max(1, rows.shape[1]))
+    sources = [None] if firsts is None else firsts
+    kept_combos, kept_cvs = [], []
+    
+    for first in sources:
+        for batch in _combination_batches(len(rows), group_size, batch_rows, first):
+            cv = _score_batch(rows, batch)
+            mask = cv < stability_threshold
+            if mask.any():
+                kept_combos.append(batch[mask].astype(np.int32))
+                kept_cvs.append(cv[mask])
+    
+    if not kept_combos:
+        return np.empty((0, group_size), dtype=np.int32), np.empty(0)
+    return np.concatenate(kept_combos), np.concatenate(kept_cvs)
+
+def _candidates_from_combinations(available_indices, microservices, combos, cvs):
+    # Stable sort keeps lexicographic order for equal CV, as sorted() does in generate_stable_groups
+    candidate_groups = []
+    for row in np.argsort(cvs, kind="stable"):
+        actual_indices = [available_indices[i] for i in combos[row]]
+        group = [microservices[idx] for idx in actual_indices]
+        candidate_groups.append((group, actual_indices, float(cvs[row])))
+    return candidate_groups
+
+def _available_rows(available_indices, microservices):
+    return np.asarray([microservices[idx] for idx in available_indices], dtype=np.float64)
+
+def generate_stable_groups_pruned(available_indices, microservices, group_size, stability_threshold):
+    """
+    Same result as generate_stable_groups, but combinations are scored in NumPy
+    batches and groups over the threshold are dropped before any Python objects
+    are built for them.
+    """
+    rows = _available_rows(available_indices, microservices)
+    combos, cvs = _stable_combinations(rows, group_size, stability_threshold)
+    return _candidates_from_combinations(available_indices, microservices, combos, cvs)
+
+_parallel_pool = None
+_parallel_lock = threading.Lock()
+
+def parallel_workers():
+    """
+    Worker processes available to the parallel engine.
+    
+    Inside a worker process (e.g. the backend grouping pool) the engine runs
+    serially instead of nesting another process pool.
+    """
+    if multiprocessing.parent_process() is not None:
+        return 1
+    return max(1, GROUPING_PARALLELISM)
+
+def _parallel_executor(workers):
+    # One lazily created pool for all group sizes and passes; recreated only if the size changes
+    global _parallel_pool
+    with _parallel_lock:
+        if _parallel_pool is not None and _parallel_pool._max_workers != workers:
+            _parallel_pool.shutdown(wait=False)
+            _parallel_pool = None
+        if _parallel_pool is None:
+            _parallel_pool = ProcessPoolExecutor(max_workers=workers)
+        return _parallel_pool
+
+def generate_stable_groups_parallel(available_indices, microservices, group_size, stability_threshold,
+                                    workers=None):
+    """
+    Same result as generate_stable_groups_pruned, with combinations split by
+    their first index across the processes of a shared pool.
+    """
+    workers = workers or GROUPING_PARALLELISM
+    if multiprocessing.parent_process() is not None:
+        workers = 1
+    rows = _available_rows(available_indices, microservices)
+    firsts = list(range(len(rows) - group_size + 1))
+    if workers <= 1 or len(firsts) < 2:
+        combos, cvs = _stable_combinations(rows, group_size, stability_threshold)
+        return _candidates_from_combinations(available_indices, microservices, combos, cvs)
+    
+    # Interleaved chunks balance the work: combinations with a small first index are the most numerous
+    chunks = [firsts[start::workers * 4] for start in range(min(len(firsts), workers * 4))]
+    parts = list(_parallel_executor(workers).map(
+        _stable_combinations, [rows] * len(chunks), [group_size] * len(chunks),
+        [stability_threshold] * len(chunks), chunks
+    ))
+    
+    combos = np.concatenate([part[0] for part in parts])
+    cvs = np.concatenate([part[1] for part in parts])
+    # Restore lexicographic order so that ties are broken exactly as in the sequential engines
+    order = np.lexsort(combos.T[::-1]) if len(combos) else np.arange(0)
+    return _candidates_from_combinations(available_indices, microservices, combos[order], cvs[order])
+
+def generate_stable_groups_approximate(available_indices, microservices, group_size, stability_threshold,
+                                       beam=None):
+    """
+    Beam search instead of full enumeration: all pairs are scored, then the
+    best partial groups are extended one service at a time. Returns a subset of
+    the candidates of generate_stable_groups (same format and order).
+    """
+    rows = _available_rows(available_indices, microservices)
+    size = len(rows)
+    beam = beam or _approximate_beam(size)
+    
+    combos, cvs = _stable_combinations(rows, 2, np.inf)
+    
+    for width in range(3, group_size + 1):
+        frontier = combos[np.argsort(cvs, kind="stable")[:beam]]
+        extended = set()
+        for partial in frontier:
+            members = set(partial.tolist())
+            for idx in range(size):
+                if idx not in members:
+                    extended.add(tuple(sorted(members | {idx})))
+        if not extended:
+            return []
+        combos = np.array(sorted(extended), dtype=np.intp).reshape(-1, width)
+        cvs = _score_batch(rows, combos)
+    
+    mask = cvs < stability_threshold
+    return _candidates_from_combinations(available_indices, microservices, combos[mask].astype(np.int32), cvs[mask])
+
+CANDIDATE_ENGINES = {
+    "exhaustive": generate_stable_groups,
+    "pruned": generate_stable_groups_pruned,
+    "parallel": generate_stable_groups_parallel,
+    "approximate": generate_stable_groups_approximate,
+}
+
+# Engines that return every candidate under the threshold, in the same order
+EXACT_ENGINES = ("exhaustive", "pruned", "parallel")
+
+def grouping_cost(n_services, max_group_size, n_slots):
+    """
+    Estimates the work of form_multiple_knapsack_groups for a window: the first
+    pass sums k time series of length T for every C(n, k) candidate group.
+    
+    Args:
+        n_services: Number of microservices in the window (n)
+        max_group_size: Maximum group size (k)
+        n_slots: Number of time slots (T)
+    
+    Returns:
+        Number of element additions, sum of C(n, k) * k * T for k = 2..max_group_size
+    """
+    return sum(
+        math.comb(n_services, size) * size * n_slots
+        for size in range(2, min(max_group_size, n_services) + 1)
+    )
+
+# Fallback cost model (ns per candidate combination and per element addition,
+# fixed overhead per call); performance_test.calibrate_cost_model replaces it
+# with coefficients measured on the deployment host
+DEFAULT_COST_MODEL = {
+    "ns_per_combination": {"exhaustive": 6500.0, "pruned": 300.0, "parallel": 300.0, "approximate": 600.0},
+    "ns_per_unit": {"exhaustive": 0.5, "pruned": 1.8, "parallel": 1.8, "approximate": 2.5},
+    "overhead_ms": {"exhaustive": 0.0, "pruned": 2.0, "parallel": 150.0, "approximate": 2.0},
+    # Bytes held per retained candidate group (tuple, index and row lists)
+    "candidate_bytes": 400,
+}
+
+def load_cost_model(path=None):
+    """
+    Loads calibrated cost model coefficients, falling back to DEFAULT_COST_MODEL.
+    """
+    model = json.loads(json.dumps(DEFAULT_COST_MODEL))
+    try:
+        with open(path or GROUPING_CALIBRATION, encoding="utf-8") as f:
+            calibrated = json.load(f)
+    except (OSError, ValueError):
+        return model
+    
+    for key, value in calibrated.items():
+        if isinstance(value, dict) and isinstance(model.get(key), dict):
+            model[key].update(value)
+        elif key in model:
+            model[key] = value
+    return model
+
+COST_MODEL = load_cost_model()
+
+def _approximate_beam(n_services):
+    return max(64, APPROXIMATE_BEAM * n_services)
+
+def engine_work(engine, n_services, max_group_size, n_slots):
+    """
+    Candidate combinations scored and element additions made by an engine.
+    
+    Returns:
+        Tuple (combinations, units)
+    """
+    sizes = range(2, min(max_group_size, n_services) + 1)
+    if engine != "approximate":
+        return sum(math.comb(n_services, size) for size in sizes), grouping_cost(n_services, max_group_size, n_slots)
+    
+    beam = _approximate_beam(n_services)
+    combos = units = 0
+    for size in sizes:
+        count = math.comb(n_services, 2) if size == 2 else min(math.comb(n_services, size), beam * n_services)
+        combos += count
+        units += count * size * n_slots
+    return combos, units
+
+def estimate_grouping(n_services, max_group_size, n_slots, stability_threshold=20.0, model=None):
+    """
+    Predicts runtime and peak memory of form_multiple_knapsack_groups for every engine.
+    
+    The share of candidates kept under the threshold is bounded by threshold/100,
+    so the memory estimate is an upper bound for typical windows.
+    
+    Returns:
+        Dict {engine: {"runtime_ms": float, "memory_mb": float}}
+    """
+    model = model or COST_MODEL
+    share = min(1.0, max(0.0, stability_threshold) / 100)
+    top_size = min(max_group_size, n_services)
+    largest = math.comb(n_services, top_size) if top_size >= 2 else 0
+    # Slot-sum buffer of one batch (sums, mean/std temporaries), never larger than the window needs
+    buffer_bytes = min(BATCH_ELEMENTS, max(largest, math.comb(n_services, 2)) * n_slots) * 8 * 3
+    
+    estimates = {}
+    for engine in CANDIDATE_ENGINES:
+        combos, units = engine_work(engine, n_services, max_group_size, n_slots)
+        runtime_ms = (
+            combos * model["ns_per_combination"][engine] + units * model["ns_per_unit"][engine]
+        ) / 1e6
+        if engine == "parallel":
+            runtime_ms /= parallel_workers()
+        runtime_ms += model["overhead_ms"][engine]
+        
+        if engine == "approximate":
+            kept = min(largest, _approximate_beam(n_services) * n_services)
+            memory = math.comb(n_services, 2) * 24 + kept * model["candidate_bytes"] + buffer_bytes
+        else:
+            memory = share * largest * model["candidate_bytes"]
+            if engine != "exhaustive":
+                # Batched engines also keep retained index arrays and a slot-sum buffer
+                memory += share * largest * (4 * top_size + 8) + buffer_bytes
+        
+        estimates[engine] = {"runtime_ms": round(runtime_ms, 3), "memory_mb": round(memory / 2 ** 20, 3)}
+    
+    return estimates
+
+def choose_engine(n_services, max_group_size, n_slots, stability_threshold=20.0,
+                  target_ms=None, memory_mb=None, model=None):
+    """
+    Picks the fastest exact engine that meets the target latency and memory
+    limit; falls back to the approximate engine when no exact one does and it is faster.
+    
+    Returns:
+        Tuple (engine name, estimates from estimate_grouping)
+    """
+    target_ms = GROUPING_TARGET_MS if target_ms is None else target_ms
+    memory_mb = GROUPING_MEMORY_MB if memory_mb is None else memory_mb
+    estimates = estimate_grouping(n_services, max_group_size, n_slots, stability_threshold, model)
+    
+    exact = ["exhaustive", "pruned"] + (["parallel"] if parallel_workers() > 1 else [])
+    fitting = [engine for engine in exact if estimates[engine]["memory_mb"] <= memory_mb]
+    best = min(fitting, key=lambda engine: estimates[engine]["runtime_ms"]) if fitting else None
+    
+    if best is not None and estimates[best]["runtime_ms"] <= target_ms:
+        return best, estimates
+    if best is None or estimates["approximate"]["runtime_ms"] < estimates[best]["runtime_ms"]:
+        return "approximate", estimates
+    return best, estimates
+
+def resolve_engine(engine, microservices, max_group_size, stability_threshold):
+    """
+    Resolves the engine name for a grouping run.
+    
+    Args:
+        engine: Name from CANDIDATE_ENGINES, 'auto' or None (GROUPING_ENGINE)
+        microservices: Time series (or 2-D array) of the window
+        max_group_size: Maximum group size
+        stability_threshold: Maximum CV value to consider stable
+        
+    Returns:
+        Name of a CANDIDATE_ENGINES entry
+    """
+    engine = engine or GROUPING_ENGINE
+    if engine == "auto":
+        n = len(microservices)
+        engine, _ = choose_engine(n, max_group_size, len(microservices[0]) if n else 0, stability_threshold)
+    if engine not in CANDIDATE_ENGINES:
+        raise ValueError(f"Невідомий рушій групування: {engine}")
+    return engine
+
+class GroupingCancelled(Exception):
+    """
+    Групування перервано: зворотний виклик progress knapsack_grouping зупиняє
+    обчислення, піднімаючи цей виняток
+    """
+
+
 def is_group_available(group_indices, used_indices_set):
     """
     Checks if all indices in the group are still available (not used).
@@ -102,7 +439,29 @@ def is_group_available(group_indices, used_indices_set):
     """
     return not any(idx in used_indices_set for idx in group_indices)
 
-def form_multiple_knapsack_groups(microservices, max_group_size=4, stability_threshold=20.0):
+def select_greedy(candidate_groups, used_indices_set):
+    """
+    Selects disjoint groups from candidates sorted by CV: each candidate is taken
+    if none of its members has been used yet.
+    
+    Args:
+        candidate_groups: List of tuples (group, indices, cv) from a candidate generator
+        used_indices_set: Set of already used indices (updated in place)
+        
+    Returns:
+        List of selected tuples (group, indices, cv)
+    """
+    selected = []
+    for group, actual_indices, cv in candidate_groups:
+        # Skip the candidate if any of its members is already used
+        if not is_group_available(actual_indices, used_indices_set):
+            continue
+        selected.append((group, actual_indices, cv))
+        used_indices_set.update(actual_indices)
+    return selected
+
+def knapsack_grouping(microservices, max_group_size=4, stability_threshold=20.0, engine=None,
+                      select=select_greedy, progress=None):
     """
     Формує групи мікросервісів з використанням інкрементального підходу та розділення піків:
     1. Спочатку намагається групувати по 2, зберігаючи пари з хорошою стабільністю
@@ -112,81 +471,138 @@ def form_multiple_knapsack_groups(microservices, max_group_size=4, stability_thr
     5. Пікові компоненти додає як окремі групи в самому кінці
     
     Args:
-        microservices: Список часових рядів з навантаженням мікросервісів
-        num_knapsacks: Кількість груп для формування. Якщо None, визначається автоматично
+        microservices: Список часових рядів з навантаженням мікросервісів, 
+            двовимірний масив (n_services, T) або WindowMatrix (рядки використовуються без копіювання)
         max_group_size: Максимальна кількість елементів у групі (за замовчуванням: 4)
         stability_threshold: Поріг для коефіцієнта варіації (за замовчуванням: 20.0%)
+        engine: Генератор кандидатів з CANDIDATE_ENGINES або 'auto' - вибір за
+            оцінкою вартості (choose_engine). За замовчуванням GROUPING_ENGINE
+        select: Вибір неперетинних груп з відсортованих кандидатів (за замовчуванням select_greedy)
+        progress: Зворотний виклик progress(fraction, message) перед кожним перебором
+            кандидатів одного розміру; може підняти GroupingCancelled, щоб перервати групування
         
     Returns:
-        Кортеж з (groups, group_services, slot_sums)
-        - groups: Список груп, де кожна група містить часові ряди мікросервісів
-        - group_services: Список індексів мікросервісів у кожній групі
-        - slot_sums: Список загальних навантажень за часовими слотами для кожної групи
+        GroupingResult: Групи в порядку формування (групи першого проходу,
+        групи та окремі базові компоненти, пікові компоненти)
     """
     
-    n = len(microservices)
+    # Матриця вікна передається напряму: групи посилаються на рядки масиву
+    if isinstance(microservices, WindowMatrix):
+        microservices = microservices.values
+    values = series_matrix(microservices)
+    
+    n = len(values)
+    engine = resolve_engine(engine, values, max_group_size, stability_threshold)
+    generate = CANDIDATE_ENGINES[engine]
+    
+    if progress is not None:
+        generate = _ProgressGenerator(generate, progress, max_group_size)
     
-    # Ініціалізуємо фінальні групи
     final_groups = []
     final_group_indices = []
     final_slot_sums = []
     
-    # Зберігаємо пікові компоненти для додавання в кінці
-    peak_components = []
-    peak_indices = []
-    peak_slot_sums = []
-    
-    # Відстежуємо, які мікросервіси ще доступні
-    available_indices = list(range(n))
-    
     # Перший прохід: спробуємо згрупувати оригінальні мікросервіси
     available_indices = group_original_microservices(
-        microservices, 
-        available_indices, 
+        values, 
+        list(range(n)), 
         max_group_size, 
         stability_threshold, 
         final_groups, 
         final_group_indices, 
-        final_slot_sums
-    )
-    
-    # Якщо є мікросервіси, які не вдалося згрупувати
-    if not available_indices:
-        return finalize_results(final_groups, final_group_indices, final_slot_sums, 
-                               peak_components, peak_indices, peak_slot_sums)
-    
-    # Розділяємо незгруповані мікросервіси на базові та пікові компоненти
-    (base_services, base_indices), (peak_services, peak_indices_orig) = process_unassigned_microservices(
-        available_indices, microservices
+        final_slot_sums,
+        generate,
+        select
     )
     
-    # Зберігаємо пікові компоненти для додавання в кінці
-    process_peak_components(peak_services, peak_indices_orig, peak_components, peak_indices, peak_slot_sums)
+    # Учасники груп: (рядок ряду, індекс мікросервісу, тип компонента)
+    members = [[(idx, idx, ORIGINAL) for idx in indices] for indices in final_group_indices]
+    components = np.empty((0, values.shape[1]), dtype=np.float64)
     
-    # Другий прохід: спробуємо згрупувати базові компоненти
-    if base_services:
-        process_base_components(
-            base_services, 
+    # Якщо є мікросервіси, які не вдалося згрупувати
+    if available_indices:
+        # Розділяємо незгруповані мікросервіси на базові та пікові компоненти
+        (base_services, base_indices), (peak_services, peak_indices) = process_unassigned_microservices(
+            available_indices, values
+        )
+        # Базові та пікові компоненти - рядки одного масиву components
+        components = np.asarray(base_services + peak_services, dtype=np.float64).reshape(-1, values.shape[1])
+        base_rows = components[:len(base_services)]
+        base_offset = 0
+        peak_offset = len(base_services)
+        
+        # Другий прохід: спробуємо згрупувати базові компоненти
+        if progress is not None:
+            generate.second_pass()
+        temp_groups = []
+        temp_indices = []
+        temp_slots = []
+        base_available = group_base_components(
+            base_rows, 
             base_indices, 
+            list(range(len(base_rows))), 
             max_group_size, 
-            stability_threshold,
-            final_groups, 
-            final_group_indices, 
-            final_slot_sums
+            stability_threshold, 
+            temp_groups, 
+            temp_indices, 
+            temp_slots,
+            generate,
+            select
         )
+        members += [[(base_offset + i, base_indices[i], BASE) for i in indices] for indices in temp_indices]
+        
+        # Базові компоненти, які не вдалося згрупувати, - окремі групи
+        members += [[(base_offset + i, base_indices[i], BASE)] for i in base_available]
+        
+        # Пікові компоненти додаються в самому кінці
+        members += [[(peak_offset + i, idx, PEAK)] for i, idx in enumerate(peak_indices)]
     
-    # Якщо ми не сформували жодної групи, розміщуємо кожен мікросервіс у свою групу
-    if not final_groups:
-        final_groups = [[microservice] for microservice in microservices]
-        final_group_indices = [[i] for i in range(n)]
-        final_slot_sums = [calculate_load_sum([microservice]) for microservice in microservices]
-    
-    return finalize_results(final_groups, final_group_indices, final_slot_sums, 
-                           peak_components, peak_indices, peak_slot_sums)
+    if progress is not None:
+        progress(1.0, "Групи сформовано")
+    return GroupingResult.from_members(values, components, members, engine=engine)
+
+class _ProgressGenerator:
+    """
+    Обгортка генератора кандидатів, що повідомляє про хід групування
+
+    Кожен прохід (оригінальні мікросервіси, базові компоненти) займає половину
+    шкали, кожен розмір групи в ньому - рівну частку.
+    """
+    def __init__(self, generate, progress, max_group_size):
+        self.generate = generate
+        self.progress = progress
+        self.sizes = max(1, max_group_size - 1)
+        self.stage = 0
+
+    def second_pass(self):
+        self.stage = 1
 
+    def __call__(self, available_indices, microservices, group_size, stability_threshold):
+        fraction = (self.stage * self.sizes + group_size - 2) / (2 * self.sizes)
+        stage = "мікросервісів" if self.stage == 0 else "базових компонентів"
+        self.progress(fraction, f"Перебір груп {stage} розміру {group_size}...")
+        return self.generate(available_indices, microservices, group_size, stability_threshold)
+
+def form_multiple_knapsack_groups(microservices, max_group_size=4, stability_threshold=20.0, engine=None,
+                                  select=select_greedy):
+    """
+    Формує групи мікросервісів (див. knapsack_grouping) у старому форматі результату
+    
+    Returns:
+        Кортеж з (groups, group_services, slot_sums)
+        - groups: Список груп, де кожна група містить часові ряди мікросервісів
+        - group_services: Список індексів мікросервісів у кожній групі
+          (базовий компонент - 1000 + idx, піковий - -idx)
+        - slot_sums: Список загальних навантажень за часовими слотами для кожної групи
+    """
+    return knapsack_grouping(
+        microservices, max_group_size=max_group_size, stability_threshold=stability_threshold,
+        engine=engine, select=select
+    ).as_tuple()
 
 def group_original_microservices(microservices, available_indices, max_group_size, stability_threshold, 
-                                final_groups, final_group_indices, final_slot_sums):
+                                final_groups, final_group_indices, final_slot_sums,
+                                generate=generate_stable_groups, select=select_greedy):
     """
     Групує оригінальні мікросервіси, перебираючи різні розміри груп
     
@@ -198,6 +614,8 @@ def group_original_microservices(microservices, available_indices, max_group_siz
         final_groups: Список груп для доповнення
         final_group_indices: Список індексів мікросервісів у кожній групі
         final_slot_sums: Список загальних навантажень за часовими слотами для кожної групи
+        generate: Генератор кандидатів (див. CANDIDATE_ENGINES)
+        select: Вибір неперетинних груп з кандидатів (див. select_greedy)
         
     Returns:
         Оновлений список доступних індексів
@@ -211,7 +629,7 @@ def group_original_microservices(microservices, available_indices, max_group_siz
             break
         
         # Генеруємо стабільні групи для поточного розміру
-        candidate_groups = generate_stable_groups(
+        candidate_groups = generate(
             available_indices, 
             microservices, 
             group_size, 
@@ -225,20 +643,11 @@ def group_original_microservices(microservices, available_indices, max_group_siz
         # Створюємо набір всіх вже використаних індексів для швидкого пошуку
         used_indices_set = set(idx for group in final_group_indices for idx in group)
         
-        # Додаємо стабільні групи до фінальних груп
-        for group, actual_indices, cv in candidate_groups:
-            # Пропускаємо, якщо будь-який індекс вже використовується
-            if not is_group_available(actual_indices, used_indices_set):
-                    continue
-                
-            # Додаємо цю групу до фінальних груп
+        # Додаємо вибрані стабільні групи до фінальних груп (select оновлює used_indices_set)
+        for group, actual_indices, cv in select(candidate_groups, used_indices_set):
             final_groups.append(group)
             final_group_indices.append(actual_indices)
             final_slot_sums.append(calculate_load_sum(group))
-            
-            # Оновлюємо набір використаних індексів
-            used_indices_set.update(actual_indices)
-            
         
         # Оновлюємо доступні індекси, видаляючи використані
         available_indices = [idx for idx in available_indices if idx not in used_indices_set]
@@ -251,82 +660,9 @@ def group_original_microservices(microservices, available_indices, max_group_siz
     return available_indices
 
 
-def process_peak_components(peak_services, peak_indices_orig, peak_components, peak_indices, peak_slot_sums):
-    """
-    Обробляє пікові компоненти і зберігає їх для додавання в кінці
-    
-    Args:
-        peak_services: Список часових рядів пікових компонентів
-        peak_indices_orig: Список індексів вихідних мікросервісів
-        peak_components: Список для збереження пікових компонентів
-        peak_indices: Список для збереження індексів пікових компонентів
-        peak_slot_sums: Список для збереження сум навантажень пікових компонентів
-    """
-    for i, (service, idx) in enumerate(zip(peak_services, peak_indices_orig)):
-        peak_components.append([service])
-        # Використовуємо від'ємні індекси для позначення пікових компонентів
-        peak_indices.append([-idx])
-        peak_slot_sums.append(calculate_load_sum([service]))
-
-
-def process_base_components(base_services, base_indices, max_group_size, stability_threshold,
-                          final_groups, final_group_indices, final_slot_sums):
-    """
-    Обробляє базові компоненти, групуючи їх і додаючи до фінальних результатів
-    
-    Args:
-        base_services: Список часових рядів базових компонентів
-        base_indices: Список індексів вихідних мікросервісів
-        max_group_size: Максимальна кількість елементів у групі
-        stability_threshold: Поріг для коефіцієнта варіації
-        final_groups: Список груп для доповнення
-        final_group_indices: Список індексів мікросервісів у кожній групі
-        final_slot_sums: Список загальних навантажень за часовими слотами для кожної групи
-    """
-    
-    # Створюємо тимчасові структури для другого проходу
-    temp_groups = []
-    temp_indices = []
-    temp_slots = []
-    
-    # Доступні базові компоненти для другого проходу
-    base_available = list(range(len(base_services)))
-    
-    # Групуємо базові компоненти
-    base_available = group_base_components(
-        base_services, 
-        base_indices, 
-        base_available, 
-        max_group_size, 
-        stability_threshold, 
-        temp_groups, 
-        temp_indices, 
-        temp_slots
-    )
-                            
-    # Додаємо до фінальних результатів сформовані групи базових компонентів
-    for i, (group, indices, slots) in enumerate(zip(temp_groups, temp_indices, temp_slots)):
-        # Перетворюємо індекси базових компонентів на оригінальні індекси мікросервісів
-        real_indices = [base_indices[idx] for idx in indices]
-        
-        final_groups.append(group)
-        # Додаємо префікс 1000 до індексів, щоб відрізняти базові компоненти від оригінальних мікросервісів
-        final_group_indices.append([1000 + idx for idx in real_indices])
-        final_slot_sums.append(slots)
-    
-    # Додаємо базові компоненти, які не вдалося згрупувати, як окремі групи
-    add_ungrouped_base_components(
-        base_services, 
-        base_indices, 
-        base_available, 
-        final_groups, 
-        final_group_indices, 
-        final_slot_sums
-    )
-
-
 def group_base_components(base_services, base_indices, base_available, max_group_size, stability_threshold,
-                         temp_groups, temp_indices, temp_slots):
+                         temp_groups, temp_indices, temp_slots, generate=generate_stable_groups,
+                         select=select_greedy):
     """
     Групує базові компоненти
     
@@ -339,6 +675,8 @@ def group_base_components(base_services, base_indices, base_available, max_group
         temp_groups: Список тимчасових груп для доповнення
         temp_indices: Список тимчасових індексів для доповнення
         temp_slots: Список тимчасових сум навантажень для доповнення
+        generate: Генератор кандидатів (див. CANDIDATE_ENGINES)
+        select: Вибір неперетинних груп з кандидатів (див. select_greedy)
         
     Returns:
         Оновлений список доступних індексів базових компонентів
@@ -350,7 +688,7 @@ def group_base_components(base_services, base_indices, base_available, max_group
             break
         
         # Генеруємо стабільні групи базових компонентів
-        candidate_groups = generate_stable_groups(
+        candidate_groups = generate(
             base_available, 
             base_services, 
             group_size, 
@@ -364,22 +702,11 @@ def group_base_components(base_services, base_indices, base_available, max_group
         # Створюємо набір всіх вже використаних індексів для швидкого пошуку
         used_base_set = set(idx for group in temp_indices for idx in group)
         
-        # Додаємо стабільні групи до тимчасових груп
-        for group, actual_indices, cv in candidate_groups:
-            # Пропускаємо, якщо будь-який індекс вже використовується
-            if not is_group_available(actual_indices, used_base_set):
-                continue
-                
-            # Додаємо цю групу до тимчасових груп
+        # Додаємо вибрані стабільні групи до тимчасових груп (select оновлює used_base_set)
+        for group, actual_indices, cv in select(candidate_groups, used_base_set):
             temp_groups.append(group)
             temp_indices.append(actual_indices)
             temp_slots.append(calculate_load_sum(group))
-            
-            # Оновлюємо набір використаних індексів
-            used_base_set.update(actual_indices)
-            
-            # Виводимо індекси оригінальних мікросервісів для зрозумілості
-            real_indices = [base_indices[idx] for idx in actual_indices]
                             
         # Оновлюємо доступні базові компоненти
         base_available = [idx for idx in base_available if idx not in used_base_set]
@@ -392,108 +719,46 @@ def group_base_components(base_services, base_indices, base_available, max_group
     return base_available
 
 
-def add_ungrouped_base_components(base_services, base_indices, base_available,
-                                final_groups, final_group_indices, final_slot_sums):
-    """
-    Додає незгруповані базові компоненти як окремі групи
-    
-    Args:
-        base_services: Список часових рядів базових компонентів
-        base_indices: Список індексів вихідних мікросервісів
-        base_available: Список доступних індексів базових компонентів
-        final_groups: Список груп для доповнення
-        final_group_indices: Список індексів мікросервісів у кожній групі
-        final_slot_sums: Список загальних навантажень за часовими слотами для кожної групи
-    """
-    for idx in base_available:
-        service = base_services[idx]
-        real_idx = base_indices[idx]
-        
-        final_groups.append([service])
-        # Використовуємо префікс 1000 для базових компонентів
-        final_group_indices.append([1000 + real_idx])
-        final_slot_sums.append(calculate_load_sum([service]))
-
-
-def finalize_results(final_groups, final_group_indices, final_slot_sums,
-                   peak_components, peak_indices, peak_slot_sums):
-    """
-    Формує фінальні результати, додаючи пікові компоненти в кінці
-    
-    Args:
-        final_groups: Список груп
-        final_group_indices: Список індексів мікросервісів у кожній групі
-        final_slot_sums: Список загальних навантажень за часовими слотами для кожної групи
-        peak_components: Список пікових компонентів
-        peak_indices: Список індексів пікових компонентів
-        peak_slot_sums: Список сум навантажень пікових компонентів
-        
-    Returns:
-        Кортеж з (groups, group_services, slot_sums)
-    """
-    # Додаємо пікові компоненти в самому кінці
-    if peak_components:
-        for i, (group, indices, slots) in enumerate(zip(peak_components, peak_indices, peak_slot_sums)):
-            final_groups.append(group)
-            final_group_indices.append(indices)
-            final_slot_sums.append(slots)
-    
-    return final_groups, final_group_indices, final_slot_sums
-
-def print_results(groups, group_services, slot_sums):
+def print_results(result):
     """
     Prints the results of microservice grouping.
     
     Args:
-        groups: List of groups, where each group contains time series of microservices
-        group_services: List of microservice indices in each group
-        slot_sums: List of total loads by time slots for each group
+        result: GroupingResult of knapsack_grouping or a grouping strategy
     """
     print("Grouping results:")
     
-    # Зберігаємо інформацію про групи для підсумкової таблиці
-    summary_info = []
-    
-    for i, (group, service_indices, sums) in enumerate(zip(groups, group_services, slot_sums)):
-        # Calculate statistics
-        mean = sum(sums) / len(sums)
-        variance = sum((x - mean) ** 2 for x in sums) / len(sums)
-        std_dev = variance ** 0.5
-        cv = (std_dev / mean) * 100 if mean > 0 else float('inf')
-        
-        # Додаємо інформацію для підсумкової таблиці
-        summary_info.append((i+1, service_indices, cv))
-        
+    # Статистика всіх груп одним проходом
+    stats = result.statistics()
+    labels = []
+    for i in range(len(result)):
+        positions = result.group_slice(i)
+        labels.append([
+            f"{service}" if kind == ORIGINAL else f"{service} ({COMPONENT_TYPES[kind]})"
+            for service, kind in zip(result.member_service[positions], result.member_kind[positions])
+        ])
+    
+    for i in range(len(result)):
         print(f"\nGroup {i+1}:")
-        print(f"  Microservices: {service_indices}")
+        print(f"  Microservices: {labels[i]}")
         
         print("  Individual load by time slots:")
-        for j, service in enumerate(group):
-            print(f"    Microservice {service_indices[j]}: {service}")
+        for label, service in zip(labels[i], result.group_series(i)):
+            print(f"    Microservice {label}: {service.tolist()}")
         
-        print(f"  Total load by time slots: {sums}")
-        print(f"  Average load: {mean:.2f}")
-        print(f"  Standard deviation: {std_dev:.2f}")
-        print(f"  Coefficient of variation: {cv:.2f}%")
+        print(f"  Total load by time slots: {result.slot_sums[i].tolist()}")
+        print(f"  Average load: {stats['mean'][i]:.2f}")
+        print(f"  Standard deviation: {stats['std'][i]:.2f}")
+        print(f"  Coefficient of variation: {stats['cv'][i]:.2f}%")
     
     # Calculate overall statistics
     print("\nOverall statistics:")
-    print(f"  Number of groups: {len(groups)}")
-    print(f"  Total number of microservices: {sum(len(g) for g in group_services)}")
-    
-    # Calculate average coefficient of variation for all groups
-    avg_cv = 0
-    if groups:
-        cvs = []
-        for sums in slot_sums:
-            mean = sum(sums) / len(sums)
-            if mean > 0:
-                variance = sum((x - mean) ** 2 for x in sums) / len(sums)
-                std_dev = variance ** 0.5
-                cvs.append((std_dev / mean) * 100)
-        
-        if cvs:
-            avg_cv = sum(cvs) / len(cvs)
+    print(f"  Number of groups: {len(result)}")
+    print(f"  Total number of microservices: {int(stats['size'].sum())}")
+    
+    # Average coefficient of variation over groups with non-zero load
+    loaded = stats["mean"] > 0
+    avg_cv = float(stats["cv"][loaded].mean()) if loaded.any() else 0
     
     print(f"  Average coefficient of variation: {avg_cv:.2f}%")
     
@@ -504,14 +769,15 @@ def print_results(groups, group_services, slot_sums):
     print("-" * 80)
     
     # Сортуємо групи за зростанням CV
-    for group_num, services, cv in sorted(summary_info, key=lambda x: x[2]):
+    for i in np.argsort(stats["cv"], kind="stable"):
         # Форматуємо список мікросервісів для кращого відображення
+        services = labels[i]
         if len(services) <= 6:
             services_str = str(services)
         else:
             services_str = str(services[:5])[:-1] + ", ...]"
         
-        print(f"{group_num:^10}|{services_str:^50}|{cv:^15.2f}")
+        print(f"{i + 1:^10}|{services_str:^50}|{stats['cv'][i]:^15.2f}")
     
     print("-" * 80)
 
@@ -630,11 +896,146 @@ def process_unassigned_microservices(unassigned_indices, microservices):
     
     return (base_services, base_indices), (peak_services, peak_indices) 
 
+
+class SplitCache:
+    """
+    Кеш розділення мікросервісів вікна на базовий та піковий компоненти.
+    Кожен мікросервіс розділяється не більше одного разу.
+    """
+    def __init__(self, microservices):
+        """
+        Args:
+            microservices: Часові ряди мікросервісів (WindowMatrix, масив або список)
+        """
+        self.microservices = microservices
+        self._splits = {}
+
+    def split(self, idx):
+        """
+        Повертає (базове_навантаження, пікове_навантаження) для мікросервісу idx
+        """
+        if idx not in self._splits:
+            self._splits[idx] = split_microservice_load(self.microservices[idx])
+        return self._splits[idx]
+
+    def component(self, idx, component_type):
+        """
+        Повертає часовий ряд компонента мікросервісу
+
+        Args:
+            idx: Індекс мікросервісу
+            component_type: 'original', 'base' або 'peak'
+
+        Returns:
+            Часовий ряд компонента або None для невідомого типу
+        """
+        if component_type == "original":
+            return self.microservices[idx]
+        if component_type == "base":
+            return self.split(idx)[0]
+        if component_type == "peak":
+            return self.split(idx)[1]
+        return None
+
+
+def decode_series(value):
+    """
+    Декодує часовий ряд, збережений у стовпці JSON (рядок або вже розібраний список)
+    """
+    if value is None:
+        return None
+    return json.loads(value) if isinstance(value, (str, bytes, bytearray)) else value
+
+
+def has_stored_series(rows):
+    """
+    Перевіряє, чи всі рядки збереженого групування містять часові ряди учасників
+    """
+    return all(row.get("load_data") is not None for row in rows)
+
+
+def rebuild_saved_groups(rows, window=None):
+    """
+    Відновлює збережене групування з рядків grouping_results за один прохід.
+    Збережені часові ряди, навантаження та стабільність груп використовуються напряму;
+    лише для рядків без load_data компоненти відновлюються з вікна.
+    
+    Args:
+        rows: Рядки з ключами group_id, service_name, component_type
+            (та, за наявності, load_data, group_load, stability_coefficient),
+            впорядковані за group_id
+        window: WindowMatrix вікна; потрібна лише для рядків без load_data
+        
+    Returns:
+        Список словників з ключами group_id, members, total_load, stability,
+        де members - список кортежів (service_name, component_type, values)
+    """
+    split_cache = SplitCache(window) if window is not None else None
+    groups = []
+    
+    for row in rows:
+        service_name = row["service_name"]
+        component_type = row["component_type"]
+        values = decode_series(row.get("load_data"))
+        
+        if values is None:
+            # Рядок без збереженого ряду: відновлюємо компонент з вікна
+            if split_cache is None or service_name not in window.index:
+                continue
+            values = split_cache.component(window.index[service_name], component_type)
+            if values is None:
+                continue
+        
+        if not groups or groups[-1]["group_id"] != row["group_id"]:
+            groups.append({
+                "group_id": row["group_id"],
+                "members": [],
+                "total_load": decode_series(row.get("group_load")),
+                "stability": row.get("stability_coefficient")
+            })
+        
+        groups[-1]["members"].append((service_name, component_type, values))
+    
+    # Для груп без збережених агрегатів обчислюємо їх з рядів учасників
+    for group in groups:
+        series = [values for _, _, values in group["members"]]
+        if group["total_load"] is None:
+            group["total_load"] = calculate_load_sum(series)
+        if group["stability"] is None:
+            group["stability"] = calculate_stability(series)
+        else:
+            group["stability"] = float(group["stability"])
+    
+    return groups
+
+
+def saved_grouping_result(rows, window):
+    """
+    Відновлює збережене групування як GroupingResult
+    
+    Args:
+        rows: Рядки grouping_results (див. rebuild_saved_groups)
+        window: WindowMatrix вікна; учасники, яких немає у вікні, пропускаються
+        
+    Returns:
+        GroupingResult зі збереженими рядами учасників
+    """
+    groups = []
+    for saved_group in rebuild_saved_groups(rows, window):
+        members = [
+            (window.index[service_name], COMPONENT_KINDS.get(component_type, ORIGINAL), values)
+            for service_name, component_type, values in saved_group["members"]
+            if service_name in window.index
+        ]
+        if members:
+            groups.append(members)
+    
+    return GroupingResult.from_series(groups, window.time_slots)
+
     
 if __name__ == "__main__":
     db_input = DBInput()
-    microservices, service_names = db_input.get_data_for_algorithm('CPU', '2015-05-10', '19:00:00')
-    for i in range(len(microservices)):
-        print(service_names[i], microservices[i])
-    groups, group_services, slot_sums = form_multiple_knapsack_groups(microservices)
-    print_results(groups, group_services, slot_sums)
\ No newline at end of file
+    window = db_input.get_window_matrix('CPU', '2015-05-10', '19:00:00')
+    for name, service in zip(window.service_names, window):
+        print(name, service)
+    print_results(knapsack_grouping(window))
\ No newline at end of file
@@ -0,0 +1,324 @@
+from itertools import chain
+import numpy as np
+
+# Типи компонентів учасника групи (стовпець member_kind)
+ORIGINAL, BASE, PEAK = 0, 1, 2
+COMPONENT_TYPES = ("original", "base", "peak")
+COMPONENT_KINDS = {name: kind for kind, name in enumerate(COMPONENT_TYPES)}
+# Позначки компонентів у назвах учасників для інтерфейсу
+COMPONENT_SUFFIXES = ("", " (базовий)", " (піковий)")
+
+# Зсув базових компонентів у старому форматі індексів (peak кодувався як -idx)
+LEGACY_BASE_OFFSET = 1000
+
+
+def load_cvs(slot_sums):
+    """
+    Коефіцієнти варіації (%) навантаження уздовж останньої осі
+
+    Група з нульовим середнім навантаженням вважається стабільною (як calculate_stability).
+    """
+    slot_sums = np.asarray(slot_sums, dtype=np.float64)
+    mean = slot_sums.mean(axis=-1)
+    std = slot_sums.std(axis=-1)
+    return np.divide(std * 100, mean, out=np.zeros_like(mean), where=mean != 0)
+
+
+def group_statistics(slot_sums):
+    """
+    Статистика всіх груп одним проходом по матриці навантаження
+
+    Args:
+        slot_sums: Двовимірний масив (n_groups, T) навантаження груп за слотами
+
+    Returns:
+        dict: Масиви довжини n_groups - mean, peak, std та cv (%)
+    """
+    slot_sums = np.asarray(slot_sums, dtype=np.float64)
+    if not slot_sums.size:
+        empty = np.zeros(len(slot_sums))
+        return {"mean": empty, "peak": empty.copy(), "std": empty.copy(), "cv": empty.copy()}
+
+    mean = slot_sums.mean(axis=1)
+    std = slot_sums.std(axis=1)
+    return {
+        "mean": mean,
+        "peak": slot_sums.max(axis=1),
+        "std": std,
+        "cv": np.divide(std * 100, mean, out=np.zeros_like(mean), where=mean != 0),
+    }
+
+
+def group_loads(groups):
+    """
+    Навантаження груп за слотами для груп, заданих списками рядів учасників
+
+    Ряди всіх учасників об'єднуються в одну матрицю і сумуються за групами
+    одним np.add.reduceat; порожня група має нульове навантаження.
+
+    Returns:
+        np.ndarray: Масив (n_groups, T)
+    """
+    sizes = np.array([len(group) for group in groups], dtype=np.int64)
+    time_slots = next((len(group[0]) for group in groups if len(group)), 0)
+    loads = np.zeros((len(groups), time_slots), dtype=np.float64)
+    if sizes.any():
+        members = np.array(list(chain.from_iterable(groups)), dtype=np.float64)
+        starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        loads[sizes > 0] = np.add.reduceat(members, starts[sizes > 0], axis=0)
+    return loads
+
+
+def series_matrix(rows):
+    """
+    Часові ряди у вигляді двовимірного масиву (n, T) без копіювання готової матриці
+
+    Порожній набір рядів має форму (0, 0).
+    """
+    matrix = np.asarray(rows, dtype=np.float64)
+    if matrix.ndim != 2:
+        matrix = matrix.reshape(len(matrix), -1) if matrix.size else np.zeros((len(matrix), 0))
+    return matrix
+
+
+def _matrix(rows, time_slots=None):
+    # Двовимірний масив рядів; порожній набір має форму (0, time_slots)
+    matrix = np.asarray(rows, dtype=np.float64)
+    if matrix.ndim != 2:
+        matrix = matrix.reshape(len(matrix), time_slots or 0)
+    return matrix
+
+
+class GroupingResult:
+    """
+    Результат групування у вигляді колонок
+
+    Учасники всіх груп зберігаються підряд, впорядковані за групами:
+    member_row (int32) - рядок часового ряду учасника, member_service (int32) -
+    індекс мікросервісу у вікні, member_kind (uint8) - тип компонента
+    (ORIGINAL, BASE, PEAK), member_group (int32) - номер групи з 0.
+    Ряди оригінальних учасників - рядки values (матриця вікна, без копіювання),
+    базових і пікових - рядки components; ряди повертаються як view.
+    loads - один масив (n_groups, T + 1): навантаження груп за слотами та
+    коефіцієнт варіації в останньому стовпці.
+
+    Для коду, що працює зі старим форматом, є адаптери from_tuple/as_tuple;
+    об'єкт також розпаковується як (groups, group_services, slot_sums).
+    """
+    __slots__ = ("values", "components", "member_row", "member_service", "member_kind", "member_group",
+                 "offsets", "loads", "strategy", "engine")
+
+    def __init__(self, values, components, member_row, member_service, member_kind, member_group,
+                 strategy=None, engine=None):
+        """
+        Args:
+            values: Двовимірний масив (n_services, T) рядів мікросервісів вікна
+            components: Двовимірний масив рядів базових і пікових компонентів
+            member_row: Рядок values (оригінал) або components (базовий, піковий) учасника
+            member_service: Індекс мікросервісу у вікні для кожного учасника
+            member_kind: Тип компонента (ORIGINAL, BASE, PEAK) для кожного учасника
+            member_group: Номер групи для кожного учасника (неспадний, 0..n_groups-1)
+            strategy (str, optional): Назва стратегії, що сформувала групи
+            engine (str, optional): Рушій генерації кандидатів
+        """
+        self.values = _matrix(values)
+        self.components = _matrix(components, self.values.shape[1])
+        self.member_row = np.asarray(member_row, dtype=np.int32)
+        self.member_service = np.asarray(member_service, dtype=np.int32)
+        self.member_kind = np.asarray(member_kind, dtype=np.uint8)
+        self.member_group = np.asarray(member_group, dtype=np.int32)
+        self.strategy = strategy
+        self.engine = engine
+
+        if self.member_group.size and np.any(np.diff(self.member_group) < 0):
+            raise ValueError("Учасники мають бути впорядковані за групами")
+
+        sizes = np.bincount(self.member_group) if self.member_group.size else np.zeros(0, dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(sizes)))
+
+        self.loads = np.empty((len(sizes), self.time_slots + 1), dtype=np.float64)
+        if len(sizes):
+            sums = np.add.reduceat(self.member_matrix(), self.offsets[:-1], axis=0)
+            self.loads[:, :-1] = sums
+            self.loads[:, -1] = load_cvs(sums)
+
+    @classmethod
+    def from_members(cls, values, components, groups, strategy=None, engine=None):
+        """
+        Створює результат зі списку груп
+
+        Args:
+            values: Матриця рядів мікросервісів вікна
+            components: Матриця рядів базових і пікових компонентів
+            groups: Список груп, кожна - список кортежів (row, service_index, kind)
+        """
+        members = [(row, service, kind, group_id)
+                   for group_id, group in enumerate(groups) for row, service, kind in group]
+        columns = list(zip(*members)) if members else [(), (), (), ()]
+        return cls(values, components, *columns, strategy=strategy, engine=engine)
+
+    @classmethod
+    def from_series(cls, groups, time_slots, strategy=None, engine=None):
+        """
+        Створює результат з груп, учасники яких задані власними рядами
+
+        Args:
+            groups: Список груп, кожна - список кортежів (service_index, kind, values)
+            time_slots: Кількість часових слотів (для порожнього результату)
+        """
+        # Кожен учасник отримує власний рядок: оригінали в values, компоненти в components
+        series = ([], [])
+        members = []
+        for group in groups:
+            members.append([])
+            for service, kind, values in group:
+                rows = series[kind != ORIGINAL]
+                members[-1].append((len(rows), service, kind))
+                rows.append(values)
+
+        return cls.from_members(
+            _matrix(series[0], time_slots), _matrix(series[1], time_slots), members,
+            strategy=strategy, engine=engine
+        )
+
+    @classmethod
+    def from_tuple(cls, groups, group_services, slot_sums=None, strategy=None, engine=None):
+        """
+        Адаптер старого формату (groups, group_services, slot_sums)
+
+        Індекси group_services декодуються за старою схемою: idx >= 1000 -
+        базовий компонент мікросервісу idx - 1000, від'ємний - піковий
+        компонент мікросервісу -idx. Пік мікросервісу 0 у цьому форматі не
+        відрізнити від оригіналу. slot_sums перераховуються з рядів.
+        """
+        decoded = []
+        for group, service_indices in zip(groups, group_services):
+            decoded.append([])
+            for values, idx in zip(group, service_indices):
+                if idx >= LEGACY_BASE_OFFSET:
+                    decoded[-1].append((idx - LEGACY_BASE_OFFSET, BASE, values))
+                elif idx < 0:
+                    decoded[-1].append((-idx, PEAK, values))
+                else:
+                    decoded[-1].append((idx, ORIGINAL, values))
+
+        time_slots = next((len(group[0]) for group in groups if len(group)), 0)
+        return cls.from_series(decoded, time_slots, strategy=strategy, engine=engine)
+
+    def as_tuple(self):
+        """
+        Адаптер до старого формату (groups, group_services, slot_sums)
+
+        groups містить view рядів учасників, індекси кодуються за старою схемою
+        (див. from_tuple).
+        """
+        legacy = np.where(
+            self.member_kind == BASE, self.member_service + LEGACY_BASE_OFFSET,
+            np.where(self.member_kind == PEAK, -self.member_service, self.member_service)
+        ).tolist()
+        groups = []
+        group_services = []
+        for group_id in range(len(self)):
+            groups.append(self.group_series(group_id))
+            group_services.append(legacy[self.offsets[group_id]:self.offsets[group_id + 1]])
+        return groups, group_services, self.slot_sums.tolist()
+
+    @property
+    def n_groups(self):
+        return len(self.offsets) - 1
+
+    @property
+    def time_slots(self):
+        return self.values.shape[1]
+
+    @property
+    def slot_sums(self):
+        """
+        Навантаження груп за слотами (n_groups, T), view на loads
+        """
+        return self.loads[:, :-1]
+
+    @property
+    def cvs(self):
+        """
+        Коефіцієнти варіації груп (%), view на loads
+        """
+        return self.loads[:, -1]
+
+    def statistics(self):
+        """
+        Статистика груп (див. group_statistics) та кількість учасників (size)
+        """
+        stats = group_statistics(self.slot_sums)
+        stats["size"] = self.group_sizes
+        return stats
+
+    @property
+    def group_sizes(self):
+        return np.diff(self.offsets)
+
+    def group_slice(self, group_id):
+        return slice(self.offsets[group_id], self.offsets[group_id + 1])
+
+    def member_series(self, position):
+        """
+        Часовий ряд учасника за його позицією (view на рядок values чи components)
+        """
+        source = self.values if self.member_kind[position] == ORIGINAL else self.components
+        return source[self.member_row[position]]
+
+    def member_matrix(self, positions=slice(None)):
+        """
+        Ряди учасників (усіх або заданих позицій) одним масивом (копія)
+        """
+        rows = self.member_row[positions]
+        original = self.member_kind[positions] == ORIGINAL
+        matrix = np.empty((len(rows), self.time_slots), dtype=np.float64)
+        matrix[original] = self.values[rows[original]]
+        matrix[~original] = self.components[rows[~original]]
+        return matrix
+
+    def group_series(self, group_id):
+        """
+        Часові ряди учасників групи (список view)
+        """
+        positions = self.group_slice(group_id)
+        return [self.member_series(position) for position in range(positions.start, positions.stop)]
+
+    def members(self, group_id):
+        """
+        Учасники групи: кортежі (service_index, component_type, values)
+        """
+        positions = self.group_slice(group_id)
+        return [
+            (int(self.member_service[position]), COMPONENT_TYPES[self.member_kind[position]],
+             self.member_series(position))
+            for position in range(positions.start, positions.stop)
+        ]
+
+    def member_labels(self, group_id, service_names):
+        """
+        Назви учасників групи з позначкою базового чи пікового компонента
+        """
+        positions = self.group_slice(group_id)
+        return [
+            service_names[service] + COMPONENT_SUFFIXES[kind]
+            for service, kind in zip(self.member_service[positions], self.member_kind[positions])
+        ]
+
+    def split_services(self):
+        """
+        Індекси мікросервісів, розділених на базовий і піковий компоненти
+        """
+        return np.unique(self.member_service[self.member_kind != ORIGINAL]).tolist()
+
+    def __len__(self):
+        return self.n_groups
+
+    def __iter__(self):
+        # Ітерація за групами, як і len(); старий формат - через as_tuple()
+        return (self.members(group_id) for group_id in range(self.n_groups))
+
+    def __repr__(self):
+        return (f"GroupingResult(groups={self.n_groups}, members={len(self.member_row)}, "
+                f"strategy={self.strategy!r}, engine={self.engine!r})")
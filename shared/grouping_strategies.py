@@ -0,0 +1,216 @@
+import os
+import numpy as np
+from shared.group_finder import EXACT_ENGINES, knapsack_grouping, resolve_engine, select_greedy
+from shared.grouping_result import GroupingResult, load_cvs
+from shared.window_matrix import WindowMatrix
+
+# Стратегія групування за замовчуванням (див. STRATEGIES)
+GROUPING_STRATEGY = os.getenv("GROUPING_STRATEGY", "greedy")
+# Максимальна кількість проходів локального покращення обмінами
+SWAP_ROUNDS = int(os.getenv("GROUPING_SWAP_ROUNDS", 10))
+
+
+class GroupingStrategy:
+    """
+    Стратегія групування: генератор кандидатів, селектор і пост-оптимізатор
+
+    Args:
+        name: Назва в реєстрі STRATEGIES
+        description: Опис для API та інтерфейсу
+        engine: Генератор кандидатів з CANDIDATE_ENGINES; None - GROUPING_ENGINE
+        select: Вибір неперетинних груп з відсортованих кандидатів (див. select_greedy)
+        post_optimise: Функція (GroupingResult, stability_threshold) -> GroupingResult,
+            що покращує готовий результат
+
+    Стратегія з іншим ядром пошуку перевизначає search і повертає GroupingResult.
+    """
+    def __init__(self, name, description, engine=None, select=select_greedy, post_optimise=None):
+        self.name = name
+        self.description = description
+        self.engine = engine
+        self.select = select
+        self.post_optimise = post_optimise
+
+    def search(self, microservices, max_group_size, stability_threshold, engine, progress=None):
+        return knapsack_grouping(
+            microservices, max_group_size=max_group_size, stability_threshold=stability_threshold,
+            engine=engine, select=self.select, progress=progress
+        )
+
+    def run(self, microservices, max_group_size=4, stability_threshold=20.0, engine=None, progress=None):
+        """
+        Формує групи мікросервісів цією стратегією
+
+        Args:
+            microservices: Часові ряди, двовимірний масив або WindowMatrix
+            max_group_size: Максимальна кількість елементів у групі
+            stability_threshold: Поріг для коефіцієнта варіації (%)
+            engine: Рушій, що замінює рушій стратегії (назва або 'auto')
+            progress: Зворотний виклик progress(fraction, message), див. knapsack_grouping
+
+        Returns:
+            GroupingResult
+        """
+        if isinstance(microservices, WindowMatrix):
+            microservices = microservices.values
+
+        engine = resolve_engine(engine or self.engine, microservices, max_group_size, stability_threshold)
+        result = self.search(microservices, max_group_size, stability_threshold, engine, progress)
+        if self.post_optimise is not None:
+            if progress is not None:
+                progress(1.0, "Покращення груп...")
+            result = self.post_optimise(result, stability_threshold)
+
+        result.strategy, result.engine = self.name, engine
+        return result
+
+    def serves_from_cache(self, microservices, max_group_size=4, stability_threshold=20.0):
+        """
+        Чи дає вибір з CandidateCache той самий результат, що й run
+
+        Кеш відтворює жадібний вибір (select_greedy) з точним перебором
+        кандидатів, тому не підходить для стратегій з власним search чи
+        select і для наближеного рушія.
+        """
+        if type(self).search is not GroupingStrategy.search or self.select is not select_greedy:
+            return False
+        engine = resolve_engine(self.engine, microservices, max_group_size, stability_threshold)
+        return engine in EXACT_ENGINES
+
+    def run_cached(self, cache, max_group_size=4, stability_threshold=20.0):
+        """
+        Формує групи з оцінених кандидатів CandidateCache без повторного перебору
+
+        Якщо стратегія не може бути обслужена з кешу (див. serves_from_cache),
+        виконується повний run для рядів кешу, тож результат завжди збігається з run.
+
+        Returns:
+            GroupingResult
+        """
+        if not self.serves_from_cache(cache.values, max_group_size, stability_threshold):
+            return self.run(cache.values, max_group_size=max_group_size, stability_threshold=stability_threshold)
+
+        result = cache.grouping(max_group_size, stability_threshold)
+        if self.post_optimise is not None:
+            result = self.post_optimise(result, stability_threshold)
+
+        result.strategy = self.name
+        return result
+
+    def describe(self):
+        return {
+            "name": self.name,
+            "description": self.description,
+            "engine": self.engine or "default",
+            "post_optimise": getattr(self.post_optimise, "__name__", None),
+        }
+
+
+def improve_by_swaps(result, stability_threshold, max_rounds=None):
+    """
+    Локальне покращення: обмін учасниками між парами груп
+
+    Для кожної пари груп з кількох учасників перебираються всі обміни одного
+    учасника на одного та застосовується той, що найбільше зменшує суму їхніх
+    коефіцієнтів варіації, якщо обидві групи лишаються нижче порогу.
+    Повторюється, доки є покращення (не більше max_rounds проходів).
+
+    Returns:
+        GroupingResult: Новий результат (вихідний не змінюється)
+    """
+    max_rounds = SWAP_ROUNDS if max_rounds is None else max_rounds
+    # Обмін учасників - це обмін позицій у стовпцях, межі груп не змінюються
+    member_row = result.member_row.copy()
+    member_service = result.member_service.copy()
+    member_kind = result.member_kind.copy()
+    series = result.member_matrix()
+    sums = result.slot_sums.copy()
+    cvs = result.cvs.copy()
+    multi = [group_id for group_id, size in enumerate(result.group_sizes) if size > 1]
+
+    for _ in range(max_rounds):
+        improved = False
+        for position, i in enumerate(multi):
+            for j in multi[position + 1:]:
+                first, second = result.group_slice(i), result.group_slice(j)
+                # [a, b, :] - зміна суми групи i після обміну її учасника a на учасника b групи j
+                delta = series[second][None, :, :] - series[first][:, None, :]
+                cv_i = load_cvs(sums[i] + delta)
+                cv_j = load_cvs(sums[j] - delta)
+                total = np.where((cv_i < stability_threshold) & (cv_j < stability_threshold), cv_i + cv_j, np.inf)
+
+                a, b = np.unravel_index(np.argmin(total), total.shape)
+                if total[a, b] >= cvs[i] + cvs[j] - 1e-9:
+                    continue
+
+                cvs[i], cvs[j] = cv_i[a, b], cv_j[a, b]
+                sums[i], sums[j] = sums[i] + delta[a, b], sums[j] - delta[a, b]
+                swapped = [first.start + a, second.start + b]
+                for column in (member_row, member_service, member_kind, series):
+                    column[swapped] = column[swapped[::-1]]
+                improved = True
+        if not improved:
+            break
+
+    return GroupingResult(
+        result.values, result.components, member_row, member_service, member_kind, result.member_group,
+        strategy=result.strategy, engine=result.engine
+    )
+
+
+STRATEGIES = {}
+
+
+def register_strategy(strategy):
+    """
+    Додає стратегію до реєстру (стратегія з тією ж назвою замінюється)
+
+    Returns:
+        GroupingStrategy: Зареєстрована стратегія
+    """
+    STRATEGIES[strategy.name] = strategy
+    return strategy
+
+
+def get_strategy(name=None):
+    """
+    Повертає стратегію за назвою (за замовчуванням GROUPING_STRATEGY)
+
+    Raises:
+        ValueError: Якщо стратегію не зареєстровано
+    """
+    name = name or GROUPING_STRATEGY
+    if name not in STRATEGIES:
+        raise ValueError(f"Невідома стратегія групування: {name}")
+    return STRATEGIES[name]
+
+
+def run_strategy(microservices, strategy=None, max_group_size=4, stability_threshold=20.0, engine=None,
+                 progress=None):
+    """
+    Формує групи стратегією з реєстру
+
+    Returns:
+        GroupingResult
+    """
+    return get_strategy(strategy).run(
+        microservices, max_group_size=max_group_size, stability_threshold=stability_threshold, engine=engine,
+        progress=progress
+    )
+
+
+def describe_strategies():
+    return [strategy.describe() for strategy in STRATEGIES.values()]
+
+
+register_strategy(GroupingStrategy(
+    "greedy", "Жадібний вибір найстабільніших груп за розмірами, розділення піків і другий прохід"
+))
+register_strategy(GroupingStrategy(
+    "greedy-swap", "Жадібний вибір з локальним покращенням обмінами учасників між групами",
+    post_optimise=improve_by_swaps
+))
+register_strategy(GroupingStrategy(
+    "approximate", "Наближений пошук кандидатів (beam) з локальним покращенням обмінами",
+    engine="approximate", post_optimise=improve_by_swaps
+))
@@ -0,0 +1,189 @@
+from time import perf_counter
+import numpy as np
+from shared.group_finder import _stable_combinations, split_microservice_load
+from shared.grouping_result import GroupingResult, ORIGINAL, BASE, PEAK, series_matrix
+from shared.window_matrix import WindowMatrix
+
+
+class CandidateCache:
+    """
+    Оцінені кандидати вікна для повторного вибору груп без перебору
+
+    Комбінації мікросервісів і їхніх базових компонентів розміром до
+    max_group_size перебираються та оцінюються один раз; зберігаються ті,
+    чий коефіцієнт варіації нижче stability_threshold, відсортовані за CV.
+    Групування з будь-якими меншими розміром групи та порогом - це лише
+    жадібний вибір з префіксу цих списків, і результат збігається з
+    knapsack_grouping з рушієм pruned.
+    """
+    def __init__(self, microservices, max_group_size=4, stability_threshold=20.0):
+        """
+        Args:
+            microservices: Часові ряди, двовимірний масив або WindowMatrix
+            max_group_size: Найбільший розмір групи, для якого будуть запити
+            stability_threshold: Найбільший поріг CV (%), для якого будуть запити
+        """
+        if isinstance(microservices, WindowMatrix):
+            microservices = microservices.values
+        values = series_matrix(microservices)
+
+        self.values = values
+        self.max_group_size = max_group_size
+        self.stability_threshold = stability_threshold
+
+        started = perf_counter()
+        # Кожен мікросервіс розділяється один раз: у другому проході може опинитися будь-який
+        splits = [split_microservice_load(row) for row in values]
+        self.base = np.asarray([base for base, _ in splits], dtype=np.float64).reshape(values.shape)
+        self.peak = np.asarray([peak for _, peak in splits], dtype=np.float64).reshape(values.shape)
+        self.has_peak = (self.peak > 0).any(axis=1)
+
+        self.original_candidates = self._score(values)
+        self.base_candidates = self._score(self.base)
+        self.build_ms = (perf_counter() - started) * 1000
+
+    def _score(self, rows):
+        # Розмір групи -> (комбінації, CV), впорядковані за CV (рівні - лексикографічно)
+        candidates = {}
+        for group_size in range(2, min(self.max_group_size, len(rows)) + 1):
+            combos, cvs = _stable_combinations(rows, group_size, self.stability_threshold)
+            order = np.argsort(cvs, kind="stable")
+            candidates[group_size] = (combos[order], cvs[order])
+        return candidates
+
+    def covers(self, max_group_size, stability_threshold):
+        return max_group_size <= self.max_group_size and stability_threshold <= self.stability_threshold
+
+    def _select(self, candidates, available, max_group_size, stability_threshold, size_limit):
+        """
+        Жадібний вибір неперетинних груп за розмірами від 2 до max_group_size
+
+        available - маска доступних рядків, оновлюється на місці.
+        """
+        groups = []
+        for group_size in range(2, min(max_group_size + 1, size_limit + 1)):
+            if np.count_nonzero(available) < group_size:
+                break
+
+            combos, cvs = candidates[group_size]
+            combos = combos[:np.searchsorted(cvs, stability_threshold)]
+            # Після кожного вибору відкидаються кандидати з уже використаними учасниками
+            rows = np.flatnonzero(available[combos].all(axis=1))
+            while rows.size:
+                combo = combos[rows[0]]
+                groups.append(combo)
+                available[combo] = False
+                rows = rows[1:]
+                rows = rows[available[combos[rows]].all(axis=1)]
+
+            if not available.any():
+                break
+        return groups
+
+    def grouping(self, max_group_size=4, stability_threshold=20.0):
+        """
+        Формує групи з кешованих кандидатів (див. knapsack_grouping)
+
+        Returns:
+            GroupingResult
+
+        Raises:
+            ValueError: Якщо параметри виходять за межі, для яких побудовано кеш
+        """
+        if not self.covers(max_group_size, stability_threshold):
+            raise ValueError(
+                f"Кеш кандидатів побудовано для розміру групи до {self.max_group_size} "
+                f"і порогу до {self.stability_threshold}%"
+            )
+
+        n = len(self.values)
+        available = np.ones(n, dtype=bool)
+        members = [
+            [(idx, idx, ORIGINAL) for idx in combo.tolist()]
+            for combo in self._select(self.original_candidates, available, max_group_size, stability_threshold, n)
+        ]
+
+        # Незгруповані мікросервіси: базові компоненти - другий прохід, пікові - окремі групи
+        unassigned = np.flatnonzero(available)
+        peaks = unassigned[self.has_peak[unassigned]]
+        components = np.concatenate((self.base[unassigned], self.peak[peaks]))
+
+        # Позиція базового компонента в components збігається з позицією мікросервісу в unassigned
+        used_base = np.zeros(len(unassigned), dtype=bool)
+        for combo in self._select(
+            self.base_candidates, available.copy(), max_group_size, stability_threshold, len(unassigned)
+        ):
+            positions = np.searchsorted(unassigned, combo)
+            members.append([(position, int(unassigned[position]), BASE) for position in positions.tolist()])
+            used_base[positions] = True
+
+        members += [[(position, int(unassigned[position]), BASE)] for position in np.flatnonzero(~used_base).tolist()]
+        members += [[(len(unassigned) + i, int(idx), PEAK)] for i, idx in enumerate(peaks.tolist())]
+
+        return GroupingResult.from_members(
+            self.values, components, members, strategy="greedy", engine="cache"
+        )
+
+
+def summarize_grouping(result):
+    """
+    Підсумок групування для порівняння налаштувань
+
+    Returns:
+        dict: groups, split_services та avg_cv - середній CV груп з кількох учасників
+    """
+    multi = result.cvs[result.group_sizes > 1]
+    return {
+        "groups": len(result),
+        "split_services": len(result.split_services()),
+        "avg_cv": float(multi.mean()) if multi.size else 0.0,
+    }
+
+
+def pareto_front(rows, keys=("groups", "split_services", "avg_cv")):
+    """
+    Позначає рядки, які не домінуються іншими за всіма ключами (менше - краще)
+
+    Returns:
+        list: Ті самі рядки з ключем pareto
+    """
+    scores = np.array([[row[key] for key in keys] for row in rows], dtype=np.float64).reshape(len(rows), len(keys))
+    for i, row in enumerate(rows):
+        dominated = (scores <= scores[i]).all(axis=1) & (scores < scores[i]).any(axis=1)
+        row["pareto"] = not dominated.any()
+    return rows
+
+
+def sweep_grouping(microservices, max_group_sizes, stability_thresholds, cache=None):
+    """
+    Групування для сітки налаштувань з одним перебором комбінацій
+
+    Args:
+        microservices: Часові ряди, двовимірний масив або WindowMatrix
+        max_group_sizes: Розміри груп для порівняння
+        stability_thresholds: Пороги CV (%) для порівняння
+        cache: Готовий CandidateCache, що покриває всі налаштування (необов'язково)
+
+    Returns:
+        dict: enumeration_ms - час побудови кешу (0 для готового), rows - для
+        кожної пари (max_group_size, stability_threshold) підсумок
+        summarize_grouping, час вибору runtime_ms та ознака pareto
+    """
+    max_group_sizes = sorted(set(max_group_sizes))
+    stability_thresholds = sorted(set(stability_thresholds))
+    enumeration_ms = 0.0
+    if cache is None or not cache.covers(max_group_sizes[-1], stability_thresholds[-1]):
+        cache = CandidateCache(microservices, max_group_sizes[-1], stability_thresholds[-1])
+        enumeration_ms = cache.build_ms
+
+    rows = []
+    for max_group_size in max_group_sizes:
+        for stability_threshold in stability_thresholds:
+            started = perf_counter()
+            result = cache.grouping(max_group_size, stability_threshold)
+            row = {"max_group_size": max_group_size, "stability_threshold": stability_threshold}
+            row.update(summarize_grouping(result))
+            row["runtime_ms"] = (perf_counter() - started) * 1000
+            rows.append(row)
+
+    return {"enumeration_ms": enumeration_ms, "rows": pareto_front(rows)}
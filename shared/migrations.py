@@ -0,0 +1,534 @@
+import argparse
+import datetime
+import sys
+from shared.db_input import (
+    WINDOW_QUERY, RAW_WINDOW_QUERY, RAW_WINDOWS_QUERY, WINDOW_FINGERPRINT_QUERY, RAW_FINGERPRINT_QUERY,
+    WINDOW_SHAPE_QUERY, LATEST_RUN_QUERY, GROUPING_RUNS_QUERY, GROUPING_ROWS_QUERY, LEGACY_GROUPING_ROWS_QUERY,
+    algorithm_data_query, raw_metrics_query, window_catalog_query
+)
+from shared.db_output import DBOutput, RUN_VERSION_QUERY, WINDOW_RUNS_QUERY, LEGACY_RESULTS_DELETE
+from shared.storage import is_sqlite
+
+# Схема бази даних у поточному вигляді. Для нової БД таблиці створюються одразу
+# з усіма стовпцями; для наявних розгортань відсутні стовпці додає міграція 2.
+TABLES = {
+    "raw_metrics": """
+    CREATE TABLE IF NOT EXISTS raw_metrics (
+        id BIGINT AUTO_INCREMENT NOT NULL,
+        service_name VARCHAR(255) NOT NULL,
+        metric_type VARCHAR(16) NOT NULL,
+        date DATE NOT NULL,
+        time TIME NOT NULL,
+        value LONGTEXT NOT NULL,
+        PRIMARY KEY (id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    "processed_metrics": """
+    CREATE TABLE IF NOT EXISTS processed_metrics (
+        id BIGINT AUTO_INCREMENT NOT NULL,
+        service_name VARCHAR(255) NOT NULL,
+        metric_type VARCHAR(16) NOT NULL,
+        date DATE NOT NULL,
+        time TIME NOT NULL,
+        value LONGTEXT NOT NULL,
+        normalization_type VARCHAR(32) NOT NULL DEFAULT 'percentage',
+        PRIMARY KEY (id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    "grouping_runs": """
+    CREATE TABLE IF NOT EXISTS grouping_runs (
+        run_id BIGINT AUTO_INCREMENT NOT NULL,
+        metric_type VARCHAR(16) NOT NULL,
+        date DATE NOT NULL,
+        time TIME NOT NULL,
+        version INT NOT NULL DEFAULT 1,
+        max_group_size INT NULL,
+        stability_threshold DOUBLE NULL,
+        num_groups INT NOT NULL,
+        num_services INT NOT NULL,
+        num_records INT NULL,
+        grouping_ms DOUBLE NULL,
+        save_ms DOUBLE NULL,
+        fingerprint VARCHAR(64) NULL,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (run_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    "grouping_results": """
+    CREATE TABLE IF NOT EXISTS grouping_results (
+        id BIGINT AUTO_INCREMENT NOT NULL,
+        run_id BIGINT NULL,
+        group_id INT NOT NULL,
+        service_name VARCHAR(255) NOT NULL,
+        date DATE NOT NULL,
+        time TIME NOT NULL,
+        metric_type VARCHAR(16) NOT NULL,
+        component_type VARCHAR(16) NOT NULL,
+        load_data LONGTEXT NULL,
+        group_load LONGTEXT NULL,
+        stability_coefficient DOUBLE NULL,
+        PRIMARY KEY (id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    "metric_windows": """
+    CREATE TABLE IF NOT EXISTS metric_windows (
+        metric_type VARCHAR(16) NOT NULL,
+        date DATE NOT NULL,
+        time TIME NOT NULL,
+        has_raw TINYINT(1) NOT NULL DEFAULT 0,
+        has_processed TINYINT(1) NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (metric_type, date, time)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+}
+
+# Стовпці, що з'явились після першої версії таблиць
+ADDED_COLUMNS = [
+    ("grouping_results", "run_id", "BIGINT NULL AFTER id"),
+    ("grouping_results", "load_data", "LONGTEXT NULL"),
+    ("grouping_results", "group_load", "LONGTEXT NULL"),
+    ("grouping_results", "stability_coefficient", "DOUBLE NULL"),
+    ("grouping_runs", "version", "INT NOT NULL DEFAULT 1 AFTER time"),
+]
+
+# Складені індекси під фільтри (вікно) та сортування гарячих запитів
+INDEXES = [
+    ("raw_metrics", "idx_raw_window", ("metric_type", "date", "time", "service_name"), False),
+    ("processed_metrics", "idx_processed_window", ("metric_type", "date", "time", "service_name"), False),
+    ("grouping_results", "idx_results_window", ("date", "time", "metric_type", "group_id"), False),
+    ("grouping_results", "uq_results_run_member", ("run_id", "group_id", "service_name", "component_type"), True),
+    ("grouping_runs", "uq_runs_window_version", ("metric_type", "date", "time", "version"), True),
+    ("grouping_runs", "idx_runs_listing", ("date", "time", "version"), False),
+    ("metric_windows", "idx_windows_date", ("date", "time"), False),
+    ("metric_windows", "idx_windows_updated", ("updated_at",), False),
+]
+
+# Унікальний ряд мікросервісу у вікні (міграція 5); заміняє idx_processed_window
+PROCESSED_SERIES_KEY = ("processed_metrics", "uq_processed_series", ("metric_type", "date", "time", "service_name"), True)
+
+# Таблиці, які можна розбити на щомісячні секції за датою
+PARTITIONED_TABLES = ("raw_metrics", "processed_metrics")
+
+# Запити DBInput/DBOutput, плани яких перевіряє команда check
+WINDOW_PARAMS = ("CPU", "2000-01-01", "00:00:00")
+CHECKED_QUERIES = [
+    ("DBInput.get_window_matrix", WINDOW_QUERY, WINDOW_PARAMS),
+    ("DBInput.get_window_fingerprint", WINDOW_FINGERPRINT_QUERY, WINDOW_PARAMS),
+    ("DBInput.get_window_shape", WINDOW_SHAPE_QUERY.format(table="processed_metrics"), WINDOW_PARAMS),
+    ("DBInput.get_window_shape (raw)", WINDOW_SHAPE_QUERY.format(table="raw_metrics"), WINDOW_PARAMS),
+    ("DBInput.get_raw_data_for_algorithm", RAW_WINDOW_QUERY, WINDOW_PARAMS),
+    ("DBInput.get_normalized_window", RAW_FINGERPRINT_QUERY, WINDOW_PARAMS),
+    ("DBInput.get_raw_windows", RAW_WINDOWS_QUERY.format(metric_types="%s, %s, %s"),
+     ("CPU", "RAM", "CHANNEL") + WINDOW_PARAMS[1:]),
+    ("DBInput.get_latest_run_id", LATEST_RUN_QUERY, WINDOW_PARAMS),
+    ("DBInput.get_grouping_runs", GROUPING_RUNS_QUERY, (100, 0)),
+    ("DBInput.get_grouping_rows", GROUPING_ROWS_QUERY, (0,)),
+    ("DBInput.get_grouping_rows (legacy)", LEGACY_GROUPING_ROWS_QUERY, WINDOW_PARAMS[1:] + WINDOW_PARAMS[:1]),
+    ("DBInput.get_data_for_algorithm", *algorithm_data_query(*WINDOW_PARAMS)),
+    ("DBInput.get_all_raw_metrics", *raw_metrics_query("CPU", "service", "2000-01-01", "00:00:00")),
+    ("DBInput.get_window_catalog (date)", *window_catalog_query("CPU", "2000-01-01")),
+    ("DBInput.get_window_catalog (updated_since)", *window_catalog_query(updated_since="2000-01-01 00:00:00")),
+    ("DBOutput.save_grouping_results", RUN_VERSION_QUERY, WINDOW_PARAMS),
+    ("DBOutput._purge_grouping_versions", WINDOW_RUNS_QUERY, WINDOW_PARAMS),
+    ("DBOutput._purge_grouping_versions (legacy)", LEGACY_RESULTS_DELETE, WINDOW_PARAMS),
+    ("DBOutput._purge_grouping_versions (results)", "DELETE FROM grouping_results WHERE run_id IN (%s)", (0,)),
+    ("DBOutput._purge_grouping_versions (runs)", "DELETE FROM grouping_runs WHERE run_id IN (%s)", (0,)),
+]
+
+# Запити, що не входять до CHECKED_QUERIES, і причина
+EXEMPT_QUERIES = [
+    ("DBInput.get_window_catalog (без фільтрів)",
+     "повне читання невеликого каталогу вікон, кешується на WINDOW_CATALOG_TTL"),
+    ("DBInput.get_all_raw_metrics (без фільтрів)", "повний перегляд сирих метрик за запитом користувача"),
+    ("DBOutput.rebuild_window_catalog", "разова перебудова каталогу з повних таблиць метрик"),
+    ("DBOutput INSERT / upsert", "запис за первинним або унікальним ключем, план читання не використовується"),
+]
+
+
+def _column_exists(cursor, table, column):
+    query = """
+    SELECT COUNT(*) AS found
+    FROM information_schema.columns
+    WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    """
+    cursor.execute(query, (table, column))
+    return cursor.fetchone()["found"] > 0
+
+
+def _index_exists(cursor, table, index):
+    query = """
+    SELECT COUNT(*) AS found
+    FROM information_schema.statistics
+    WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """
+    cursor.execute(query, (table, index))
+    return cursor.fetchone()["found"] > 0
+
+
+def _create_tables(cursor):
+    for ddl in TABLES.values():
+        cursor.execute(ddl)
+
+
+def _add_columns(cursor):
+    for table, column, definition in ADDED_COLUMNS:
+        if not _column_exists(cursor, table, column):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _add_indexes(cursor):
+    for table, index, columns, unique in INDEXES:
+        if not _index_exists(cursor, table, index):
+            kind = "UNIQUE INDEX" if unique else "INDEX"
+            cursor.execute(f"ALTER TABLE {table} ADD {kind} {index} ({', '.join(columns)})")
+
+
+def dedupe_processed_metrics(cursor):
+    """
+    Видаляє дублікати рядів processed_metrics, залишаючи для кожного
+    (мікросервіс, метрика, дата, час) останній записаний рядок
+
+    Returns:
+        int: Кількість видалених рядків
+    """
+    cursor.execute("""
+    DELETE older
+    FROM processed_metrics older
+    JOIN processed_metrics newer
+      ON newer.metric_type = older.metric_type
+     AND newer.date = older.date
+     AND newer.time = older.time
+     AND newer.service_name = older.service_name
+     AND newer.id > older.id
+    """)
+    return cursor.rowcount
+
+
+def _unique_processed_series(cursor):
+    dedupe_processed_metrics(cursor)
+    table, index, columns, _ = PROCESSED_SERIES_KEY
+    if not _index_exists(cursor, table, index):
+        cursor.execute(f"ALTER TABLE {table} ADD UNIQUE INDEX {index} ({', '.join(columns)})")
+    # Унікальний ключ має той самий префікс, тож окремий індекс вікна зайвий
+    if _index_exists(cursor, "processed_metrics", "idx_processed_window"):
+        cursor.execute("ALTER TABLE processed_metrics DROP INDEX idx_processed_window")
+
+
+def _backfill_window_catalog(cursor):
+    for table, flag in (("raw_metrics", "has_raw"), ("processed_metrics", "has_processed")):
+        cursor.execute(f"""
+        INSERT INTO metric_windows (metric_type, date, time, {flag})
+        SELECT DISTINCT metric_type, date, time, 1 FROM {table}
+        ON DUPLICATE KEY UPDATE {flag} = 1
+        """)
+
+
+def backfill_legacy_runs(cursor):
+    """
+    Створює заголовки запусків для груп, збережених до появи grouping_runs
+
+    Для кожного вікна з рядками grouping_results без run_id додається один
+    запуск (версія 1, або на одну меншу за найстарішу наявну версію вікна),
+    і рядки прив'язуються до нього. Параметри групування таких запусків
+    невідомі й залишаються NULL.
+
+    Returns:
+        int: Кількість прив'язаних рядків grouping_results
+    """
+    cursor.execute("""
+    INSERT INTO grouping_runs (metric_type, date, time, version, num_groups, num_services, num_records)
+    SELECT legacy.metric_type, legacy.date, legacy.time, COALESCE(runs.first_version - 1, 1),
+           legacy.num_groups, legacy.num_services, legacy.num_records
+    FROM (
+        SELECT metric_type, date, time, COUNT(DISTINCT group_id) AS num_groups,
+               COUNT(DISTINCT service_name) AS num_services, COUNT(*) AS num_records
+        FROM grouping_results
+        WHERE run_id IS NULL
+        GROUP BY metric_type, date, time
+    ) legacy
+    LEFT JOIN (
+        SELECT metric_type, date, time, MIN(version) AS first_version
+        FROM grouping_runs
+        GROUP BY metric_type, date, time
+    ) runs ON runs.metric_type = legacy.metric_type AND runs.date = legacy.date AND runs.time = legacy.time
+    """)
+    # Щойно доданий запуск - найстаріша версія вікна
+    cursor.execute("""
+    UPDATE grouping_results
+    SET run_id = (
+        SELECT runs.run_id
+        FROM grouping_runs runs
+        WHERE runs.metric_type = grouping_results.metric_type
+          AND runs.date = grouping_results.date
+          AND runs.time = grouping_results.time
+        ORDER BY runs.version
+        LIMIT 1
+    )
+    WHERE run_id IS NULL
+    """)
+    return cursor.rowcount
+
+
+# Впорядкований список міграцій: (версія, опис, функція над курсором).
+# Кожна функція ідемпотентна, тому перерваний upgrade можна просто повторити.
+MIGRATIONS = [
+    (1, "Базові таблиці метрик, запусків групування та каталогу вікон", _create_tables),
+    (2, "Стовпці рядів груп, run_id та версій запусків", _add_columns),
+    (3, "Складені індекси та обмеження унікальності", _add_indexes),
+    (4, "Заповнення каталогу metric_windows з наявних даних", _backfill_window_catalog),
+    (5, "Унікальний ряд processed_metrics на (мікросервіс, метрика, дата, час)", _unique_processed_series),
+    (6, "Запуски grouping_runs для груп, збережених без run_id", backfill_legacy_runs),
+]
+
+
+def sqlite_schema():
+    """
+    Схема вбудованого SQLite (DB_BACKEND=sqlite) одразу в стані після всіх міграцій
+
+    Returns:
+        list: Ідемпотентні DDL-інструкції (діалект MySQL переписує shared.storage)
+    """
+    indexes = [entry for entry in INDEXES if entry[1] != "idx_processed_window"] + [PROCESSED_SERIES_KEY]
+    statements = list(TABLES.values())
+    for table, index, columns, unique in indexes:
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        statements.append(f"CREATE {kind} IF NOT EXISTS {index} ON {table} ({', '.join(columns)})")
+    return statements
+
+
+def month_partitions(start, end):
+    """
+    Формує межі щомісячних секцій
+
+    Args:
+        start (str): Перший місяць у форматі 'YYYY-MM'
+        end (str): Останній місяць у форматі 'YYYY-MM'
+
+    Returns:
+        list: Пари (ім'я секції, перша дата наступного місяця)
+    """
+    year, month = (int(part) for part in start.split("-"))
+    end_year, end_month = (int(part) for part in end.split("-"))
+
+    partitions = []
+    while (year, month) <= (end_year, end_month):
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        partitions.append((f"p{year:04d}{month:02d}", datetime.date(next_year, next_month, 1).isoformat()))
+        year, month = next_year, next_month
+
+    return partitions
+
+
+def partition_statements(table, start, end, existing=()):
+    """
+    Формує DDL для розбиття таблиці на щомісячні секції за датою
+
+    MySQL вимагає, щоб кожен унікальний ключ містив стовпець секціонування,
+    тому первинний ключ розширюється до (id, date).
+
+    Args:
+        table (str): Таблиця з PARTITIONED_TABLES
+        start (str): Перший місяць 'YYYY-MM'
+        end (str): Останній місяць 'YYYY-MM'
+        existing: Імена вже наявних секцій (порожньо для несекціонованої таблиці)
+
+    Returns:
+        list: SQL-інструкції
+    """
+    if table not in PARTITIONED_TABLES:
+        raise ValueError(f"Таблиця {table} не підтримує секціонування за датою")
+
+    existing = set(existing)
+    partitions = [(name, bound) for name, bound in month_partitions(start, end) if name not in existing]
+    definitions = [f"PARTITION {name} VALUES LESS THAN ('{bound}')" for name, bound in partitions]
+
+    if not existing:
+        definitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+        return [
+            f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id, date)",
+            f"ALTER TABLE {table} PARTITION BY RANGE COLUMNS(date) ({', '.join(definitions)})",
+        ]
+
+    if not definitions:
+        return []
+
+    # Нові місяці відокремлюються від секції pmax
+    definitions.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    return [f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO ({', '.join(definitions)})"]
+
+
+def full_scan_tables(plan_rows):
+    """
+    Повертає таблиці, які план виконання читає повним скануванням (type = ALL)
+    """
+    return [row.get("table") for row in plan_rows if row.get("type") == "ALL"]
+
+
+class Migrator:
+    """
+    Застосування міграцій схеми та перевірка планів виконання запитів
+    """
+    def __init__(self, db_output=None):
+        self.db_output = db_output or DBOutput()
+        self.cursor = self.db_output.cursor
+
+    def _ensure_version_table(self):
+        self.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT NOT NULL,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (version)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """)
+
+    def applied_versions(self):
+        """
+        Returns:
+            set: Версії вже застосованих міграцій
+        """
+        self._ensure_version_table()
+        self.cursor.execute("SELECT version FROM schema_migrations")
+        return {row["version"] for row in self.cursor.fetchall()}
+
+    def upgrade(self):
+        """
+        Застосовує всі ще не застосовані міграції по черзі
+
+        Returns:
+            list: Версії застосованих міграцій
+        """
+        applied = self.applied_versions()
+        done = []
+
+        for version, description, migrate in MIGRATIONS:
+            if version in applied:
+                continue
+            print(f"Міграція {version}: {description}")
+            # Вбудована БД створюється одразу з кінцевою схемою (sqlite_schema)
+            if not is_sqlite():
+                migrate(self.cursor)
+            self.cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (version, description)
+            )
+            self.db_output.connection.commit()
+            done.append(version)
+
+        return done
+
+    def status(self):
+        """
+        Returns:
+            list: Кортежі (версія, опис, застосована)
+        """
+        applied = self.applied_versions()
+        return [(version, description, version in applied) for version, description, _ in MIGRATIONS]
+
+    def partition(self, table, start, end):
+        """
+        Розбиває таблицю на щомісячні секції або додає нові місяці
+
+        Returns:
+            int: Кількість виконаних інструкцій
+        """
+        self.cursor.execute("""
+        SELECT partition_name
+        FROM information_schema.partitions
+        WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+        """, (table,))
+        existing = [row["partition_name"] for row in self.cursor.fetchall()]
+
+        statements = partition_statements(table, start, end, existing)
+        for statement in statements:
+            self.cursor.execute(statement)
+        return len(statements)
+
+    def dedupe(self, optimize=False):
+        """
+        Видаляє дублікати processed_metrics і, за потреби, стискає таблицю
+
+        Returns:
+            int: Кількість видалених рядків
+        """
+        removed = dedupe_processed_metrics(self.cursor)
+        self.db_output.connection.commit()
+        if optimize:
+            self.cursor.execute("OPTIMIZE TABLE processed_metrics")
+            self.cursor.fetchall()
+        return removed
+
+    def check(self):
+        """
+        Виконує EXPLAIN для кожного запиту з CHECKED_QUERIES
+
+        Returns:
+            list: Пари (назва запиту, таблиці з повним скануванням) для проблемних запитів
+        """
+        failures = []
+        for name, query, params in CHECKED_QUERIES:
+            self.cursor.execute("EXPLAIN " + query, params)
+            scanned = full_scan_tables(self.cursor.fetchall())
+            if scanned:
+                failures.append((name, scanned))
+        return failures
+
+    def close(self):
+        self.db_output.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Міграції схеми бази даних")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("upgrade", help="Застосувати всі нові міграції")
+    subparsers.add_parser("status", help="Показати стан міграцій")
+    subparsers.add_parser("check", help="Перевірити плани виконання запитів DBInput/DBOutput")
+
+    dedupe_parser = subparsers.add_parser("dedupe", help="Видалити дублікати рядів processed_metrics")
+    dedupe_parser.add_argument("--optimize", action="store_true", help="Стиснути таблицю після видалення")
+
+    partition_parser = subparsers.add_parser("partition", help="Щомісячні секції таблиці за датою")
+    partition_parser.add_argument("table", choices=PARTITIONED_TABLES)
+    partition_parser.add_argument("--from", dest="start", required=True, help="Перший місяць YYYY-MM")
+    partition_parser.add_argument("--to", dest="end", required=True, help="Останній місяць YYYY-MM")
+
+    args = parser.parse_args(argv)
+    if is_sqlite() and args.command in ("partition", "dedupe", "check"):
+        # Вбудована БД не має секцій і дублікатів, а плани виконання перевіряються для MySQL
+        print(f"Команда {args.command} підтримується лише для DB_BACKEND=mysql")
+        return 1
+
+    migrator = Migrator()
+
+    try:
+        if args.command == "upgrade":
+            done = migrator.upgrade()
+            print(f"Застосовано міграцій: {len(done)}")
+        elif args.command == "status":
+            for version, description, applied in migrator.status():
+                print(f"{'+' if applied else ' '} {version}: {description}")
+        elif args.command == "partition":
+            count = migrator.partition(args.table, args.start, args.end)
+            print(f"Виконано інструкцій: {count}")
+        elif args.command == "dedupe":
+            removed = migrator.dedupe(args.optimize)
+            print(f"Видалено дублікатів: {removed}")
+        elif args.command == "check":
+            failures = migrator.check()
+            for name, tables in failures:
+                print(f"Повне сканування: {name} ({', '.join(str(t) for t in tables)})")
+            if failures:
+                return 1
+            print(f"Усі {len(CHECKED_QUERIES)} запитів використовують індекси")
+            for name, reason in EXEMPT_QUERIES:
+                print(f"Не перевіряється: {name} - {reason}")
+    finally:
+        migrator.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
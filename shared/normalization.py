@@ -0,0 +1,84 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from shared.constants import STANDARD_CONFIG
+
+# Кількість нормалізованих вікон, що зберігаються в пам'яті процесу
+NORMALIZED_CACHE_SIZE = int(os.getenv('NORMALIZED_CACHE_SIZE', 32))
+
+_memo_lock = threading.Lock()
+_memo = OrderedDict()
+
+
+def normalize_to_percentage(values, metric_type, clip=True, decimals=2):
+    """
+    Нормалізує навантаження відносно стандартної конфігурації сервера
+
+    Працює з цілою матрицею вікна (n_services, T) або з одним рядом за одну
+    векторизовану операцію.
+
+    Args:
+        values: Масив або список значень (1-D чи 2-D)
+        metric_type (str): Тип метрики ('CPU', 'RAM', 'CHANNEL')
+        clip (bool): Обмежити результат діапазоном 0-100
+        decimals (int): Кількість знаків після коми
+
+    Returns:
+        numpy.ndarray: Значення у відсотках тієї ж форми, що й вхідні
+    """
+    if metric_type not in STANDARD_CONFIG:
+        raise ValueError(f"Непідтримуваний тип метрики: {metric_type}")
+
+    percentages = np.asarray(values, dtype=np.float64) / STANDARD_CONFIG[metric_type]["value"]
+    percentages *= 100
+    if clip:
+        np.clip(percentages, 0, 100, out=percentages)
+    return np.round(percentages, decimals, out=percentages)
+
+
+def peak_percentage(values, metric_type):
+    """
+    Пікове використання ресурсу у відсотках від стандартної конфігурації
+
+    Args:
+        values: Масив значень вікна
+        metric_type (str): Тип метрики
+
+    Returns:
+        float: Відсоток для максимального значення (0.0 для порожнього вікна)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return 0.0
+    return float(values.max() / STANDARD_CONFIG[metric_type]["value"] * 100)
+
+
+def get_memoized_window(key):
+    """
+    Повертає нормалізоване вікно з пам'яті процесу або None
+    """
+    with _memo_lock:
+        window = _memo.get(key)
+        if window is not None:
+            _memo.move_to_end(key)
+        return window
+
+
+def memoize_window(key, window):
+    """
+    Запам'ятовує нормалізоване вікно, витісняючи найдавніше використане
+    """
+    with _memo_lock:
+        _memo[key] = window
+        _memo.move_to_end(key)
+        while len(_memo) > NORMALIZED_CACHE_SIZE:
+            _memo.popitem(last=False)
+
+
+def invalidate_normalized_windows():
+    """
+    Скидає всі нормалізовані вікна (викликається після запису сирих даних)
+    """
+    with _memo_lock:
+        _memo.clear()
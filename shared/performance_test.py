@@ -1,8 +1,14 @@
+import json
+import sys
 import time
 import random
 import numpy as np
 import matplotlib.pyplot as plt
-from group_finder import form_multiple_knapsack_groups, calculate_stability
+from group_finder import (
+    form_multiple_knapsack_groups, calculate_stability, engine_work,
+    CANDIDATE_ENGINES, GROUPING_CALIBRATION, DEFAULT_COST_MODEL, parallel_workers
+)
+from shared.grouping_strategies import STRATEGIES, run_strategy
 
 def generate_random_microservice(time_slots, pattern_type=None):
     """
@@ -75,7 +81,7 @@ def generate_microservices(num_services, time_slots, pattern_distribution=None):
     return microservices
 
 def run_performance_test(num_services_list, time_slots, pattern_distribution=None, num_runs=3,
-                          stability_threshold=50.0, max_group_size=3):
+                          stability_threshold=50.0, max_group_size=3, strategy=None):
     """
     Запускає тест продуктивності для різної кількості мікросервісів.
     
@@ -86,6 +92,7 @@ def run_performance_test(num_services_list, time_slots, pattern_distribution=Non
         stability_threshold: Поріг стабільності
         pattern_distribution: Розподіл типів патернів
         num_runs: Кількість запусків для кожної конфігурації
+        strategy: Назва стратегії групування (за замовчуванням GROUPING_STRATEGY)
         
     Returns:
         Словник з результатами тестів
@@ -103,6 +110,7 @@ def run_performance_test(num_services_list, time_slots, pattern_distribution=Non
     print(f"Кількість таймслотів: {time_slots}")
     print(f"Максимальний розмір групи: {max_group_size}")
     print(f"Поріг стабільності: {stability_threshold}%")
+    print(f"Стратегія: {strategy or 'за замовчуванням'}")
     print(f"Розподіл патернів: {pattern_distribution}")
     print(f"Кількість запусків для кожної конфігурації: {num_runs}")
     
@@ -124,11 +132,12 @@ def run_performance_test(num_services_list, time_slots, pattern_distribution=Non
             
             # Вимірюємо час виконання
             start_time = time.time()
-            groups, group_services, slot_sums = form_multiple_knapsack_groups(
+            groups, group_services, slot_sums = run_strategy(
                 microservices,
+                strategy,
                 max_group_size=max_group_size,
                 stability_threshold=stability_threshold
-            )
+            ).as_tuple()
             end_time = time.time()
             
             # Обчислюємо метрики
@@ -222,7 +231,121 @@ def plot_results(results):
     plt.savefig('performance_results.png')
     plt.show()
 
+def compare_strategies(num_services_list, time_slots, strategies=None, pattern_distribution=None, num_runs=3,
+                       stability_threshold=50.0, max_group_size=3):
+    """
+    Порівнює стратегії групування на однакових згенерованих вікнах.
+    
+    Args:
+        num_services_list: Список кількостей мікросервісів для тестування
+        time_slots: Кількість таймслотів
+        strategies: Назви стратегій (за замовчуванням усі зареєстровані)
+        pattern_distribution: Розподіл типів патернів
+        num_runs: Кількість вікон для кожної кількості мікросервісів
+        stability_threshold: Поріг стабільності
+        max_group_size: Максимальний розмір групи
+        
+    Returns:
+        Словник {стратегія: {'num_services', 'execution_time', 'num_groups', 'avg_stability'}}
+    """
+    strategies = list(strategies or STRATEGIES)
+    results = {
+        name: {'num_services': [], 'execution_time': [], 'num_groups': [], 'avg_stability': []}
+        for name in strategies
+    }
+    
+    print(f"\n=== ПОРІВНЯННЯ СТРАТЕГІЙ ===")
+    for num_services in num_services_list:
+        windows = [generate_microservices(num_services, time_slots, pattern_distribution) for _ in range(num_runs)]
+        print(f"\n{num_services} мікросервісів:")
+        
+        for name in strategies:
+            run_times, run_num_groups, run_stabilities = [], [], []
+            for microservices in windows:
+                start_time = time.perf_counter()
+                result = run_strategy(
+                    microservices, name, max_group_size=max_group_size, stability_threshold=stability_threshold
+                )
+                run_times.append(time.perf_counter() - start_time)
+                run_num_groups.append(len(result))
+                stabilities = result.cvs[result.group_sizes > 1]
+                run_stabilities.append(float(stabilities.mean()) if len(stabilities) else 0)
+            
+            entry = results[name]
+            entry['num_services'].append(num_services)
+            entry['execution_time'].append(sum(run_times) / num_runs)
+            entry['num_groups'].append(sum(run_num_groups) / num_runs)
+            entry['avg_stability'].append(sum(run_stabilities) / num_runs)
+            print(f"  {name}: {entry['execution_time'][-1]:.3f} с, {entry['num_groups'][-1]:.1f} груп, "
+                  f"середня стабільність {entry['avg_stability'][-1]:.2f}%")
+    
+    return results
+
+def calibrate_cost_model(configs=None, path=GROUPING_CALIBRATION, num_runs=2, stability_threshold=50.0):
+    """
+    Вимірює кожен рушій групування на згенерованих вікнах і підбирає коефіцієнти
+    моделі вартості (нс на комбінацію, нс на операцію додавання, накладні витрати)
+    методом найменших квадратів.
+    
+    Args:
+        configs: Список (кількість мікросервісів, розмір групи, кількість таймслотів)
+        path: Файл, у який записуються коефіцієнти (читає group_finder.load_cost_model)
+        num_runs: Кількість запусків для кожної конфігурації
+        stability_threshold: Поріг стабільності
+        
+    Returns:
+        Словник з коефіцієнтами моделі
+    """
+    if configs is None:
+        configs = [(n, k, t) for n in (8, 16, 24, 32) for k in (2, 3) for t in (24, 96)]
+    
+    model = json.loads(json.dumps(DEFAULT_COST_MODEL))
+    engines = [engine for engine in CANDIDATE_ENGINES if engine != "parallel" or parallel_workers() > 1]
+    
+    print(f"\n=== КАЛІБРУВАННЯ МОДЕЛІ ВАРТОСТІ ===")
+    for engine in engines:
+        # Прогрівальний запуск без вимірювання: паралельний рушій створює пул процесів один раз
+        form_multiple_knapsack_groups(generate_microservices(8, 24), max_group_size=2, engine=engine)
+        features, timings = [], []
+        for num_services, max_group_size, time_slots in configs:
+            for _ in range(num_runs):
+                microservices = generate_microservices(num_services, time_slots)
+                start_time = time.perf_counter()
+                form_multiple_knapsack_groups(
+                    microservices, max_group_size=max_group_size,
+                    stability_threshold=stability_threshold, engine=engine
+                )
+                timings.append((time.perf_counter() - start_time) * 1000)
+                combos, units = engine_work(engine, num_services, max_group_size, time_slots)
+                features.append((combos / 1e6, units / 1e6, 1.0))
+        
+        coefficients, *_ = np.linalg.lstsq(np.array(features), np.array(timings), rcond=None)
+        per_combination, per_unit, overhead = (max(0.0, float(value)) for value in coefficients)
+        model["ns_per_combination"][engine] = round(per_combination, 3)
+        model["ns_per_unit"][engine] = round(per_unit, 3)
+        model["overhead_ms"][engine] = round(overhead, 3)
+        print(f"  {engine}: {per_combination:.1f} нс/комбінацію, {per_unit:.3f} нс/додавання, {overhead:.2f} мс")
+    
+    if "parallel" not in engines:
+        # Без кількох процесорів паралельний рушій працює як pruned
+        for key in ("ns_per_combination", "ns_per_unit"):
+            model[key]["parallel"] = model[key]["pruned"]
+    
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(model, f, indent=2)
+    print(f"Коефіцієнти збережено у {path}")
+    
+    return model
+
 if __name__ == "__main__":
+    if "--calibrate" in sys.argv:
+        calibrate_cost_model()
+        sys.exit(0)
+    if "--compare-strategies" in sys.argv:
+        compare_strategies([10, 25, 50], 24)
+        sys.exit(0)
+    
+
     # Налаштування тесту
     num_services_list = [5, 10, 25, 50, 100]
     time_slots = 24
@@ -0,0 +1,226 @@
+import datetime
+import json
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# Завантаження змінних середовища з .env файлу
+load_dotenv()
+
+# Сховище даних: 'mysql' (сервер MySQL) або 'sqlite' (вбудована БД у файлі)
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql').lower()
+# Файл вбудованої БД для DB_BACKEND=sqlite (':memory:' - БД у пам'яті з'єднання)
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'diploma.sqlite3')
+
+_schema_lock = threading.Lock()
+_schema_ready = set()
+
+
+def is_sqlite():
+    return DB_BACKEND == 'sqlite'
+
+
+def connect():
+    """
+    Відкриває з'єднання з налаштованим сховищем
+
+    Обидва варіанти мають однаковий інтерфейс для DBInput/DBOutput:
+    cursor(dictionary=True), start_transaction(), commit(), rollback(), close().
+    """
+    if is_sqlite():
+        return SQLiteConnection(SQLITE_PATH)
+
+    import mysql.connector
+    return mysql.connector.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        user=os.getenv('DB_USER', 'root'),
+        password=os.getenv('DB_PASSWORD', 'root'),
+        database=os.getenv('DB_NAME', 'diploma'),
+        port=int(os.getenv('DB_PORT', 3306))
+    )
+
+
+@contextmanager
+def read_snapshot(connection):
+    """
+    Кілька читань з одного знімка БД (наприклад, відбиток вікна та його ряди)
+
+    Попередня неявна транзакція з'єднання завершується, тож знімок містить
+    актуальні дані, а записи інших процесів між читаннями в нього не потрапляють.
+    """
+    connection.commit()
+    connection.start_transaction(consistent_snapshot=True)
+    try:
+        yield
+    finally:
+        connection.commit()
+
+
+# --- Вбудований SQLite ---
+
+def _format_time(value):
+    total_seconds = int(value.total_seconds())
+    hours, remainder = divmod(total_seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def _convert_date(value):
+    try:
+        return datetime.date.fromisoformat(value.decode())
+    except ValueError:
+        return value.decode()
+
+
+def _convert_time(value):
+    # Як і mysql.connector, стовпець TIME повертається як timedelta
+    try:
+        hours, minutes, seconds = (int(part) for part in value.decode().split(":"))
+        return datetime.timedelta(hours=hours, minutes=minutes, seconds=seconds)
+    except ValueError:
+        return value.decode()
+
+
+def _convert_timestamp(value):
+    try:
+        return datetime.datetime.fromisoformat(value.decode())
+    except ValueError:
+        return value.decode()
+
+
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(" ", "seconds"))
+sqlite3.register_adapter(datetime.timedelta, _format_time)
+sqlite3.register_converter("DATE", _convert_date)
+sqlite3.register_converter("TIME", _convert_time)
+sqlite3.register_converter("TIMESTAMP", _convert_timestamp)
+
+_VALUES_REF = re.compile(r"VALUES\((\w+)\)")
+_ON_DUPLICATE = re.compile(r"ON DUPLICATE KEY UPDATE", re.IGNORECASE)
+_FOR_UPDATE = re.compile(r"\s+FOR UPDATE\s*$", re.IGNORECASE)
+
+
+def sqlite_sql(query):
+    """
+    Переписує діалект MySQL, який використовують запити проєкту, для SQLite
+
+    Returns:
+        tuple: (запит для SQLite, чи потрібне блокування на запис (FOR UPDATE))
+    """
+    query, locks = _FOR_UPDATE.subn("", query)
+    query = query.replace("%s", "?")
+
+    # DDL: автоінкрементний ключ стає псевдонімом rowid, опції InnoDB відкидаються
+    query = query.replace("BIGINT AUTO_INCREMENT", "INTEGER")
+    query = query.replace(" ON UPDATE CURRENT_TIMESTAMP", "")
+    query = query.replace(" ENGINE=InnoDB DEFAULT CHARSET=utf8mb4", "")
+
+    if _ON_DUPLICATE.search(query):
+        # INSERT ... SELECT потребує WHERE перед ON CONFLICT, інакше ON читається як умова з'єднання
+        if "SELECT" in query.upper() and "WHERE" not in query.upper():
+            query = _ON_DUPLICATE.sub("WHERE 1 ON DUPLICATE KEY UPDATE", query)
+        query = _ON_DUPLICATE.sub("ON CONFLICT DO UPDATE SET", query)
+        query = _VALUES_REF.sub(r"excluded.\1", query)
+
+    return query, bool(locks)
+
+
+def _dict_row(cursor, row):
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteCursor:
+    """
+    Курсор зі словниковими рядками, що приймає запити у діалекті MySQL
+    """
+    def __init__(self, connection):
+        self._connection = connection
+        self._cursor = connection.cursor()
+
+    def execute(self, query, params=()):
+        query, locks = sqlite_sql(query)
+        if locks and not self._connection.in_transaction:
+            # Аналог SELECT ... FOR UPDATE: транзакція одразу бере блокування на запис
+            self._connection.execute("BEGIN IMMEDIATE")
+        self._cursor.execute(query, tuple(params or ()))
+        return self
+
+    def executemany(self, query, seq_of_params):
+        query, _ = sqlite_sql(query)
+        self._cursor.executemany(query, [tuple(params) for params in seq_of_params])
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """
+    З'єднання з вбудованою БД з інтерфейсом mysql.connector, який використовує проєкт
+
+    Схема (таблиці та індекси shared.migrations) створюється при першому
+    з'єднанні з файлом.
+    """
+    def __init__(self, path):
+        self._connection = sqlite3.connect(
+            path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False, timeout=30
+        )
+        self._connection.row_factory = _dict_row
+        self._connection.create_function("CRC32", 1, lambda value: zlib.crc32(str(value).encode()), deterministic=True)
+        self._connection.create_function("CONCAT", -1, lambda *parts: "".join(str(part) for part in parts), deterministic=True)
+        self._connection.create_function("JSON_LENGTH", 1, lambda value: len(json.loads(value)), deterministic=True)
+        if path != ":memory:":
+            # WAL дозволяє читачам не чекати на запис
+            self._connection.execute("PRAGMA journal_mode=WAL")
+        self._ensure_schema(path)
+
+    def _ensure_schema(self, path):
+        from shared.migrations import sqlite_schema
+
+        with _schema_lock:
+            if path in _schema_ready and path != ":memory:":
+                return
+            cursor = self.cursor()
+            for statement in sqlite_schema():
+                cursor.execute(statement)
+            self.commit()
+            _schema_ready.add(path)
+
+    def cursor(self, dictionary=True):
+        return SQLiteCursor(self._connection)
+
+    def start_transaction(self, consistent_snapshot=False):
+        # Відкладена транзакція: у режимі WAL знімок фіксується першим читанням
+        if not self._connection.in_transaction:
+            self._connection.execute("BEGIN")
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
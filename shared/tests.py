@@ -1,6 +1,31 @@
 import unittest
-from group_finder import calculate_stability, form_multiple_knapsack_groups
+import group_finder
+from group_finder import (
+    calculate_stability, form_multiple_knapsack_groups, grouping_cost, rebuild_saved_groups, split_microservice_load,
+    generate_stable_groups, CANDIDATE_ENGINES, choose_engine, knapsack_grouping, saved_grouping_result,
+    GroupingCancelled
+)
+from shared.grouping_result import GroupingResult, ORIGINAL, BASE, PEAK, group_statistics, group_loads
+from shared.grouping_strategies import (
+    GroupingStrategy, STRATEGIES, get_strategy, register_strategy, run_strategy, improve_by_swaps
+)
+from shared.grouping_sweep import CandidateCache, sweep_grouping, pareto_front
+from shared.window_matrix import WindowMatrix
+from shared.chart_rendering import CHARTS, render_chart
+from shared.window_store import WindowStore
+from shared.window_catalog import build_available_options, WindowIndex, CATALOG_REFRESH_OVERLAP
+from shared.migrations import CHECKED_QUERIES, partition_statements, full_scan_tables, backfill_legacy_runs
+from shared.normalization import normalize_to_percentage, invalidate_normalized_windows
+from shared.db_input import DBInput
+from shared.db_output import DBOutput
+from shared import storage
+import datetime
 import itertools
+import os
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+import tempfile
+import numpy as np
 
 class TestMicroserviceGrouping(unittest.TestCase):
     def test_calculate_stability(self):
@@ -348,5 +373,567 @@ class TestMicroserviceGrouping(unittest.TestCase):
             all_services.update(original_indices)
         self.assertEqual(all_services, set(range(len(services_cv21))))
 
+    def test_window_matrix_input(self):
+        # Матриця вікна має давати той самий результат, що й список списків
+        microservices = [
+            [1, 10, 1, 10],
+            [10, 1, 10, 1],
+            [2, 2, 2, 2],
+            [3, 3, 3, 3],
+            [1, 1, 1, 20]
+        ]
+        names = ["svc_a", "svc_b", "svc_c", "svc_d", "svc_e"]
+        window = WindowMatrix(microservices, names, "CPU", "2015-05-10", "19:00:00")
+
+        self.assertEqual(window.shape, (5, 4))
+        self.assertEqual(window.index["svc_c"], 2)
+        self.assertEqual(window.row("svc_e").tolist(), [1, 1, 1, 20])
+
+        _, expected_services, expected_sums = form_multiple_knapsack_groups(microservices, max_group_size=2)
+        _, group_services, slot_sums = form_multiple_knapsack_groups(window, max_group_size=2)
+        self.assertEqual(group_services, expected_services)
+        self.assertEqual(slot_sums, expected_sums)
+
+        # Рядки матриці не копіюються
+        groups, _, _ = form_multiple_knapsack_groups(window, max_group_size=2)
+        self.assertTrue(np.shares_memory(groups[0][0], window.values))
+
+    def test_empty_window(self):
+        # Порожнє вікно дає порожній результат у будь-якому форматі
+        self.assertEqual(form_multiple_knapsack_groups([]), ([], [], []))
+        result = knapsack_grouping(np.zeros((0, 5)))
+        self.assertEqual(len(result), 0)
+        self.assertEqual(result.slot_sums.shape, (0, 5))
+
+    def test_grouping_result_columns(self):
+        # Тип компонента зберігається окремим стовпцем: пік сервісу 0 і сервіси з індексом >= 1000
+        # не плутаються з оригіналами та базовими компонентами
+        microservices = np.ones((1002, 4))
+        microservices[0] = [1, 1, 1, 20]
+        microservices[1001] = [1, 1, 1, 20]
+        microservices[1:1001] = [10, 10, 10, 10]
+
+        result = knapsack_grouping(microservices, max_group_size=1)
+        kinds = lambda service: sorted(result.member_kind[result.member_service == service].tolist())
+        self.assertEqual(kinds(0), [BASE, PEAK])
+        self.assertEqual(kinds(1001), [BASE, PEAK])
+        self.assertIn(1001, result.split_services())
+        for group_id in range(len(result)):
+            np.testing.assert_allclose(result.slot_sums[group_id], np.sum(result.group_series(group_id), axis=0))
+
+        # Ітерація йде за групами, так само як len()
+        groups = list(result)
+        self.assertEqual(len(groups), len(result))
+        self.assertEqual([service for service, _, _ in groups[0]], result.member_service[result.group_slice(0)].tolist())
+
+        # Агрегати - view одного масиву loads
+        self.assertTrue(np.shares_memory(result.slot_sums, result.loads))
+        self.assertTrue(np.shares_memory(result.cvs, result.loads))
+
+        # Старий формат відтворюється адаптерами
+        groups, group_services, slot_sums = form_multiple_knapsack_groups([[1, 10, 1, 10], [10, 1, 10, 1], [1, 1, 1, 20]], 2)
+        legacy = GroupingResult.from_tuple(groups, group_services)
+        self.assertEqual(legacy.as_tuple()[1:], (group_services, slot_sums))
+        self.assertEqual(legacy.member_labels(len(legacy) - 1, ["svc_a", "svc_b", "svc_c"]), ["svc_c (піковий)"])
+
+        # Збережене групування відновлюється в той самий формат
+        window = WindowMatrix([[1, 10, 1, 10], [10, 1, 10, 1]], ["svc_a", "svc_b"], "CPU", "2015-05-10", "19:00:00")
+        saved = saved_grouping_result([
+            {"group_id": 1, "service_name": "svc_a", "component_type": "original"},
+            {"group_id": 1, "service_name": "svc_b", "component_type": "original"},
+            {"group_id": 2, "service_name": "svc_missing", "component_type": "original"},
+        ], window)
+        self.assertEqual(len(saved), 1)
+        self.assertEqual(saved.slot_sums.tolist(), [[11, 11, 11, 11]])
+        self.assertEqual(saved.cvs.tolist(), [0.0])
+
+    def test_group_statistics(self):
+        # Статистика всіх груп одним проходом збігається з покроковим обчисленням
+        rng = np.random.default_rng(5)
+        groups = [rng.uniform(0, 10, size=(size, 6)).tolist() for size in (1, 3, 2)] + [[], [[0.0] * 6]]
+
+        loads = group_loads(groups)
+        stats = group_statistics(loads)
+
+        self.assertEqual(loads.shape, (5, 6))
+        for i, group in enumerate(groups[:3]):
+            np.testing.assert_allclose(loads[i], np.sum(group, axis=0))
+            self.assertAlmostEqual(stats["cv"][i], calculate_stability(group))
+            self.assertAlmostEqual(stats["peak"][i], max(np.sum(group, axis=0)))
+        self.assertEqual(stats["cv"][3:].tolist(), [0.0, 0.0])
+        self.assertEqual(len(group_statistics(np.zeros((0, 6)))["mean"]), 0)
+
+        result = knapsack_grouping(np.array(groups[1] + groups[2]), max_group_size=2)
+        np.testing.assert_allclose(result.statistics()["cv"], result.cvs)
+        self.assertEqual(result.statistics()["size"].sum(), len(result.member_row))
+
+    def test_window_store_roundtrip(self):
+        # Вікно читається зі сховища без копіювання, застарілий відбиток ігнорується
+        window = WindowMatrix([[1, 2, 3], [4, 5, 6]], ["svc_a", "svc_b"], "RAM", "2015-05-10", "19:00:00")
+
+        with tempfile.TemporaryDirectory() as root_dir:
+            store = WindowStore(root_dir)
+            self.assertIsNone(store.load("RAM", "2015-05-10", "19:00:00"))
+
+            store.save(window, "2:42")
+            cached = store.load("RAM", "2015-05-10", "19:00:00", "2:42")
+            self.assertEqual(cached.service_names, ["svc_a", "svc_b"])
+            self.assertEqual(cached.values.tolist(), window.values.tolist())
+            self.assertIsInstance(cached.values.base, np.memmap)
+
+            self.assertIsNone(store.load("RAM", "2015-05-10", "19:00:00", "3:17"))
+            self.assertIn(WindowStore.window_key("RAM", "2015-05-10", "19:00:00"), store.read_index())
+            del cached
+
+    def test_window_store_concurrent_saves(self):
+        # Паралельні записи різних вікон не втрачають записів індексу
+        windows = [WindowMatrix([[i, i + 1]], ["svc_a"], "CPU", "2024-01-01", f"{i:02d}:00:00") for i in range(16)]
+
+        with tempfile.TemporaryDirectory() as root_dir:
+            store = WindowStore(root_dir)
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(lambda window: store.save(window, "1:0"), windows))
+            index = store.read_index()
+
+        self.assertEqual(sorted(index), sorted(WindowStore.window_key("CPU", "2024-01-01", w.time) for w in windows))
+        self.assertEqual(index[WindowStore.window_key("CPU", "2024-01-01", "03:00:00")]["shape"], [1, 2])
+
+    def test_rebuild_saved_groups(self):
+        # Відновлення групування з рядків одного запиту
+        window = WindowMatrix([[1, 10, 1, 10], [10, 1, 10, 1], [1, 1, 1, 20]],
+                              ["svc_a", "svc_b", "svc_c"], "CPU", "2015-05-10", "19:00:00")
+        rows = [
+            {"group_id": 1, "service_name": "svc_a", "component_type": "original"},
+            {"group_id": 1, "service_name": "svc_b", "component_type": "original"},
+            {"group_id": 2, "service_name": "svc_c", "component_type": "base"},
+            {"group_id": 2, "service_name": "svc_missing", "component_type": "original"},
+            {"group_id": 3, "service_name": "svc_c", "component_type": "peak"},
+        ]
+
+        groups = rebuild_saved_groups(rows, window)
+        base, peak = split_microservice_load([1, 1, 1, 20])
+
+        self.assertEqual([group["group_id"] for group in groups], [1, 2, 3])
+        self.assertEqual([name for name, _, _ in groups[0]["members"]], ["svc_a", "svc_b"])
+        self.assertEqual(groups[0]["total_load"], [11, 11, 11, 11])
+        self.assertEqual(groups[0]["stability"], 0.0)
+        self.assertEqual(groups[1]["members"], [("svc_c", "base", base)])
+        self.assertEqual(groups[2]["members"], [("svc_c", "peak", peak)])
+
+    def test_rebuild_saved_groups_from_stored_series(self):
+        # Збережені ряди та агрегати читаються без вікна і без перерахунку
+        rows = [
+            {"group_id": 1, "service_name": "svc_a", "component_type": "base",
+             "load_data": "[1,2]", "group_load": "[4,4]", "stability_coefficient": 0.0},
+            {"group_id": 1, "service_name": "svc_b", "component_type": "original",
+             "load_data": "[3,2]", "group_load": "[4,4]", "stability_coefficient": 0.0},
+        ]
+
+        groups = rebuild_saved_groups(rows)
+
+        self.assertEqual(len(groups), 1)
+        self.assertEqual(groups[0]["members"], [("svc_a", "base", [1, 2]), ("svc_b", "original", [3, 2])])
+        self.assertEqual(groups[0]["total_load"], [4, 4])
+        self.assertEqual(groups[0]["stability"], 0.0)
+
+    def test_build_available_options(self):
+        # Часи дати беруться з сирих даних, а за їх відсутності - з оброблених
+        rows = [
+            {"metric_type": "CPU", "date": datetime.date(2024, 1, 2), "time": datetime.timedelta(hours=10),
+             "has_raw": 1, "has_processed": 1},
+            {"metric_type": "RAM", "date": datetime.date(2024, 1, 2), "time": datetime.timedelta(hours=9),
+             "has_raw": 1, "has_processed": 0},
+            {"metric_type": "CPU", "date": datetime.date(2024, 1, 1), "time": datetime.timedelta(hours=8, minutes=30),
+             "has_raw": 0, "has_processed": 1},
+        ]
+
+        options = build_available_options(rows)
+
+        self.assertEqual(options["dates"], ["2024-01-01", "2024-01-02"])
+        self.assertEqual(options["times"]["2024-01-01"], ["08:30:00"])
+        self.assertEqual(options["times"]["2024-01-02"], ["09:00:00", "10:00:00"])
+        self.assertEqual(options["metric_types"], ["CPU", "RAM", "CHANNEL"])
+
+    def test_window_index_incremental_refresh(self):
+        # Перше читання - повний каталог, далі - лише вікна, змінені після останнього updated_at
+        updated = datetime.datetime(2024, 1, 3, 12, 0, 0)
+        batches = [
+            [{"metric_type": "CPU", "date": datetime.date(2024, 1, 2), "time": datetime.timedelta(hours=10),
+              "has_raw": 1, "has_processed": 1, "updated_at": updated},
+             {"metric_type": "RAM", "date": datetime.date(2024, 1, 1), "time": datetime.timedelta(hours=9),
+              "has_raw": 1, "has_processed": 0, "updated_at": updated}],
+            [{"metric_type": "CPU", "date": datetime.date(2024, 1, 2), "time": datetime.timedelta(hours=10),
+              "has_raw": 1, "has_processed": 1, "updated_at": updated},
+             {"metric_type": "RAM", "date": datetime.date(2024, 1, 1), "time": datetime.timedelta(hours=9),
+              "has_raw": 1, "has_processed": 1, "updated_at": updated + datetime.timedelta(minutes=5)}],
+        ]
+        requested = []
+
+        class FakeInput:
+            def get_window_catalog(self, metric_type=None, date=None, updated_since=None):
+                requested.append(updated_since)
+                return batches[len(requested) - 1]
+
+        index = WindowIndex()
+        self.assertFalse(index.loaded)
+        self.assertEqual(index.refresh(FakeInput()), 1)
+        self.assertEqual(index.dates("CPU"), ["2024-01-02"])
+        self.assertEqual(index.dates("RAM"), [])
+
+        # Повторно прочитане вікно не рахується зміною
+        self.assertEqual(index.refresh(FakeInput()), 1)
+        self.assertEqual(requested, [None, updated - CATALOG_REFRESH_OVERLAP])
+        self.assertEqual(index.times("RAM", "2024-01-01"), ["09:00:00"])
+        self.assertEqual(index.times("CPU", "2024-01-02"), ["10:00:00"])
+        self.assertEqual(index.updated_at, updated + datetime.timedelta(minutes=5))
+
+    def test_render_chart(self):
+        # Кожен графік реєстру будується в PNG без pyplot і з часом побудови
+        series = np.array([[1.0, 2.0, 3.0], [3.0, 2.0, 1.0]])
+        data = {
+            "stability": {"cv_values": np.array([0.0, 12.5])},
+            "group_load": {"slot_sums": series, "title": "Групи"},
+            "load_distribution": {"group_id": 1, "series": series, "labels": ["a", "b (базовий)"], "stability": 0.0},
+            "microservices": {"series": series, "labels": ["a", "b"], "title": "Мікросервіси"},
+            "base_peak": {"base": series[0], "peak": series[1], "service_name": "a"},
+        }
+        self.assertEqual(set(data), set(CHARTS))
+        for kind, chart_data in data.items():
+            png, render_ms = render_chart(kind, **chart_data)
+            self.assertTrue(png.startswith(b"\x89PNG"), kind)
+            self.assertGreater(render_ms, 0)
+
+    def test_partition_statements(self):
+        # Перше секціонування розширює первинний ключ і додає секцію pmax
+        statements = partition_statements("processed_metrics", "2024-11", "2025-01")
+        self.assertEqual(statements[0], "ALTER TABLE processed_metrics DROP PRIMARY KEY, ADD PRIMARY KEY (id, date)")
+        self.assertIn("PARTITION p202412 VALUES LESS THAN ('2025-01-01')", statements[1])
+        self.assertIn("PARTITION p202501 VALUES LESS THAN ('2025-02-01')", statements[1])
+        self.assertTrue(statements[1].endswith("PARTITION pmax VALUES LESS THAN (MAXVALUE))"))
+
+        # Для секціонованої таблиці додаються лише нові місяці
+        statements = partition_statements("processed_metrics", "2024-12", "2025-02",
+                                          existing=["p202412", "p202501", "pmax"])
+        self.assertEqual(len(statements), 1)
+        self.assertIn("REORGANIZE PARTITION pmax INTO (PARTITION p202502", statements[0])
+        self.assertEqual(partition_statements("raw_metrics", "2024-12", "2024-12", existing=["p202412"]), [])
+
+        with self.assertRaises(ValueError):
+            partition_statements("grouping_results", "2024-01", "2024-02")
+
+    def test_checked_queries_params(self):
+        # Кожен перевірюваний запит має параметри для всіх плейсхолдерів
+        for name, query, params in CHECKED_QUERIES:
+            self.assertEqual(query.count("%s"), len(params), name)
+        checked = {name.split(" (")[0] for name, _, _ in CHECKED_QUERIES}
+        self.assertTrue({"DBInput.get_data_for_algorithm", "DBInput.get_all_raw_metrics",
+                         "DBInput.get_window_catalog"} <= checked)
+
+    def test_full_scan_tables(self):
+        plan = [{"table": "grouping_runs", "type": "ref"}, {"table": "processed_metrics", "type": "ALL"}]
+        self.assertEqual(full_scan_tables(plan), ["processed_metrics"])
+
+    def test_normalize_to_percentage_matrix(self):
+        # Матриця нормалізується так само, як кожен ряд окремо
+        raw = np.array([[0, 1250, 2500, 5000], [25, -10, 1, 2499]], dtype=np.float64)
+
+        clipped = normalize_to_percentage(raw, "CPU")
+        unclipped = normalize_to_percentage(raw, "CPU", clip=False)
+
+        self.assertEqual(clipped.tolist(), [[0.0, 50.0, 100.0, 100.0], [1.0, 0.0, 0.04, 99.96]])
+        self.assertEqual(unclipped[0].tolist(), [round(v / 2500 * 100, 2) for v in raw[0]])
+        with self.assertRaises(ValueError):
+            normalize_to_percentage(raw, "GPU")
+
+    def test_normalized_window_is_memoized(self):
+        # Вікно обчислюється з сирих рядів один раз і далі читається з пам'яті,
+        # поки не зміниться відбиток сирих рядів (зокрема після запису іншим процесом)
+        class FakeCursor:
+            def __init__(self):
+                self.queries = 0
+                self.checksum = 1
+
+            def execute(self, query, params):
+                self.queries += 1
+
+            def fetchone(self):
+                return {"rows_count": 2, "checksum": self.checksum}
+
+            def fetchall(self):
+                return [{"service_name": "svc_a", "value": "[1250, 5000]"},
+                        {"service_name": "svc_b", "value": "[25, 0]"}]
+
+        db_input = DBInput.__new__(DBInput)
+        db_input.connection = storage.SQLiteConnection(":memory:")
+        db_input.cursor = FakeCursor()
+        invalidate_normalized_windows()
+
+        window = db_input.get_normalized_window("CPU", "2024-01-01", "10:00:00")
+        again = db_input.get_normalized_window("CPU", "2024-01-01", "10:00:00")
+
+        self.assertIs(window, again)
+        self.assertEqual(window.fingerprint, "2:1")
+        self.assertEqual(db_input.cursor.queries, 3)
+        self.assertEqual(window.service_names, ["svc_a", "svc_b"])
+        self.assertEqual(window.values.tolist(), [[50.0, 100.0], [1.0, 0.0]])
+
+        db_input.cursor.checksum = 2
+        self.assertIsNot(db_input.get_normalized_window("CPU", "2024-01-01", "10:00:00"), window)
+        self.assertEqual(db_input.cursor.queries, 5)
+
+        invalidate_normalized_windows()
+        db_input.get_normalized_window("CPU", "2024-01-01", "10:00:00")
+        self.assertEqual(db_input.cursor.queries, 7)
+
+    def test_grouping_cost(self):
+        # C(5,2)*2*10 + C(5,3)*3*10: розмір групи обмежений кількістю мікросервісів
+        self.assertEqual(grouping_cost(5, 3, 10), 10 * 2 * 10 + 10 * 3 * 10)
+        self.assertEqual(grouping_cost(3, 8, 4), grouping_cost(3, 3, 4))
+        self.assertEqual(grouping_cost(1, 4, 10), 0)
+        self.assertGreater(grouping_cost(40, 5, 288), 100 * grouping_cost(40, 3, 288))
+
+    def test_candidate_engines_match_exhaustive(self):
+        # Точні рушії дають ті самі кандидати в тому самому порядку, наближений - їх підмножину
+        rng = np.random.default_rng(7)
+        microservices = rng.integers(1, 20, size=(14, 12)).astype(float)
+        available = list(range(14))
+
+        for group_size in (2, 3):
+            expected = generate_stable_groups(available, microservices, group_size, 25.0)
+            expected_indices = [indices for _, indices, _ in expected]
+            for engine, options in (("pruned", {}), ("parallel", {"workers": 2})):
+                candidates = CANDIDATE_ENGINES[engine](available, microservices, group_size, 25.0, **options)
+                self.assertEqual([indices for _, indices, _ in candidates], expected_indices)
+                for (_, _, cv), (_, _, expected_cv) in zip(candidates, expected):
+                    self.assertAlmostEqual(cv, expected_cv)
+
+            # Паралельний рушій використовує один пул процесів для всіх розмірів груп
+            pool = group_finder._parallel_pool
+            self.assertIsNotNone(pool)
+            CANDIDATE_ENGINES["parallel"](available, microservices, group_size, 25.0, workers=2)
+            self.assertIs(group_finder._parallel_pool, pool)
+
+            approximate = CANDIDATE_ENGINES["approximate"](available, microservices, group_size, 25.0)
+            self.assertTrue({tuple(i) for _, i, _ in approximate} <= {tuple(i) for i in expected_indices})
+            self.assertEqual([cv for _, _, cv in approximate], sorted(cv for _, _, cv in approximate))
+
+        self.assertEqual(
+            form_multiple_knapsack_groups(microservices, 3, 25.0, engine="pruned")[1],
+            form_multiple_knapsack_groups(microservices, 3, 25.0, engine="exhaustive")[1]
+        )
+
+    def test_choose_engine(self):
+        # Малі вікна - точний перебір; величезні за малого бюджету часу - наближений рушій
+        self.assertIn(choose_engine(8, 3, 24, target_ms=1000)[0], ("exhaustive", "pruned"))
+        engine, estimates = choose_engine(300, 5, 288, target_ms=1000)
+        self.assertEqual(engine, "approximate")
+        self.assertLess(estimates["approximate"]["runtime_ms"], estimates["pruned"]["runtime_ms"])
+
+    def test_grouping_strategies(self):
+        rng = np.random.default_rng(11)
+        microservices = rng.uniform(1, 10, size=(10, 12)).tolist()
+
+        # Стратегія за замовчуванням відтворює form_multiple_knapsack_groups
+        result = run_strategy(microservices, "greedy", max_group_size=3, stability_threshold=25.0, engine="exhaustive")
+        groups, group_services, slot_sums = result.as_tuple()
+        _, expected_services, expected_sums = form_multiple_knapsack_groups(
+            microservices, 3, 25.0, engine="exhaustive"
+        )
+        self.assertEqual((result.strategy, result.engine), ("greedy", "exhaustive"))
+        self.assertEqual(group_services, expected_services)
+        self.assertEqual(slot_sums, expected_sums)
+
+        # Обміни не погіршують сумарну стабільність і зберігають склад учасників
+        swapped = improve_by_swaps(result, 25.0)
+        total = lambda groups: sum(calculate_stability(group) for group in groups if len(group) > 1)
+        swapped_groups, swapped_services, swapped_sums = swapped.as_tuple()
+        self.assertLessEqual(total(swapped_groups), total(groups) + 1e-9)
+        self.assertEqual(sorted(i for s in swapped_services for i in s), sorted(i for s in group_services for i in s))
+        for group, sums in zip(swapped_groups, swapped_sums):
+            np.testing.assert_allclose(np.sum(group, axis=0), sums)
+            if len(group) > 1:
+                self.assertLess(calculate_stability(group), 25.0)
+
+        # Нова стратегія додається до реєстру без змін у модулі групування
+        register_strategy(GroupingStrategy("no-groups", "Без груп", select=lambda candidates, used: []))
+        try:
+            separate = run_strategy(microservices, "no-groups", 3, 25.0)
+            self.assertEqual(separate.strategy, "no-groups")
+            self.assertTrue(all(separate.group_sizes == 1))
+        finally:
+            del STRATEGIES["no-groups"]
+
+        with self.assertRaises(ValueError):
+            get_strategy("unknown")
+
+    def test_grouping_progress_and_cancel(self):
+        # Хід групування повідомляється перед кожним перебором, виняток у зворотному виклику перериває його
+        microservices = np.random.default_rng(23).uniform(1, 10, size=(9, 8))
+        events = []
+        result = run_strategy(microservices, "greedy", 3, 20.0, progress=lambda *event: events.append(event))
+
+        fractions = [fraction for fraction, _ in events]
+        self.assertEqual(fractions, sorted(fractions))
+        self.assertEqual(fractions[-1], 1.0)
+        self.assertEqual(result.as_tuple()[1], form_multiple_knapsack_groups(microservices, 3, 20.0)[1])
+
+        def cancel(fraction, message):
+            if fraction > 0:
+                raise GroupingCancelled()
+
+        with self.assertRaises(GroupingCancelled):
+            knapsack_grouping(microservices, 3, 20.0, progress=cancel)
+
+    def test_candidate_cache_sweep(self):
+        # Повторний вибір з кешу кандидатів збігається з повним групуванням для кожного налаштування
+        rng = np.random.default_rng(17)
+        microservices = rng.uniform(1, 10, size=(14, 12))
+        cache = CandidateCache(microservices, 4, 30.0)
+
+        for max_group_size, stability_threshold in itertools.product((2, 3, 4), (5.0, 15.0, 30.0)):
+            expected = knapsack_grouping(microservices, max_group_size, stability_threshold, engine="pruned")
+            result = cache.grouping(max_group_size, stability_threshold)
+            self.assertEqual(result.as_tuple()[1], expected.as_tuple()[1])
+            np.testing.assert_allclose(result.loads, expected.loads)
+
+        with self.assertRaises(ValueError):
+            cache.grouping(5, 20.0)
+
+        # Стратегія з кешу застосовує свою пост-оптимізацію
+        swapped = get_strategy("greedy-swap").run_cached(cache, 3, 15.0)
+        self.assertEqual(swapped.strategy, "greedy-swap")
+        self.assertEqual(swapped.as_tuple()[1], improve_by_swaps(cache.grouping(3, 15.0), 15.0).as_tuple()[1])
+
+        sweep = sweep_grouping(microservices, [3, 2], [15.0, 5.0], cache=cache)
+        self.assertEqual(sweep["enumeration_ms"], 0.0)
+        self.assertEqual([(row["max_group_size"], row["stability_threshold"]) for row in sweep["rows"]],
+                         [(2, 5.0), (2, 15.0), (3, 5.0), (3, 15.0)])
+        self.assertTrue(any(row["pareto"] for row in sweep["rows"]))
+
+        rows = pareto_front([{"groups": 3, "split_services": 1, "avg_cv": 10.0},
+                             {"groups": 4, "split_services": 1, "avg_cv": 12.0},
+                             {"groups": 5, "split_services": 0, "avg_cv": 12.0}])
+        self.assertEqual([row["pareto"] for row in rows], [True, False, True])
+
+        # Порожнє вікно не ламає перебір налаштувань
+        empty = sweep_grouping([], [2, 3], [20.0])
+        self.assertEqual([row["groups"] for row in empty["rows"]], [0, 0])
+
+    def test_run_cached_matches_run(self):
+        # Для кожної зареєстрованої стратегії живе оновлення дає ті самі групи, що й запуск
+        rng = np.random.default_rng(23)
+        microservices = rng.uniform(1, 10, size=(12, 10))
+        cache = CandidateCache(microservices, 4, 30.0)
+
+        for name, strategy in STRATEGIES.items():
+            for max_group_size, stability_threshold in ((3, 15.0), (4, 30.0)):
+                expected = strategy.run(microservices, max_group_size, stability_threshold)
+                result = strategy.run_cached(cache, max_group_size, stability_threshold)
+                self.assertEqual(result.strategy, name)
+                self.assertEqual(result.as_tuple()[1], expected.as_tuple()[1], name)
+                np.testing.assert_allclose(result.loads, expected.loads)
+
+        self.assertTrue(get_strategy("greedy").serves_from_cache(microservices, 4, 30.0))
+        self.assertFalse(get_strategy("approximate").serves_from_cache(microservices, 4, 30.0))
+
+    def test_sqlite_backend_round_trip(self):
+        # Ті самі DBInput/DBOutput і запити працюють з вбудованою БД без сервера MySQL
+        with tempfile.TemporaryDirectory() as root:
+            backend, path = storage.DB_BACKEND, storage.SQLITE_PATH
+            storage.DB_BACKEND, storage.SQLITE_PATH = "sqlite", f"{root}/diploma.sqlite3"
+            try:
+                db_output = DBOutput()
+                db_output.store_processed = True
+                db_output.batch_save_processed_data([
+                    ("svc_a", "CPU", "2024-01-01", "10:00:00", [10.0, 20.0]),
+                    ("svc_b", "CPU", "2024-01-01", "10:00:00", [30.0, 40.0]),
+                ])
+                # Повторний запис ряду замінює його (upsert за унікальним ключем)
+                db_output.batch_save_processed_data([("svc_a", "CPU", "2024-01-01", "10:00:00", [15.0, 25.0])])
+                for _ in range(2):
+                    db_output.save_grouping_results(
+                        GroupingResult.from_tuple([[[15.0, 25.0], [30.0, 40.0]]], [[0, 1]]), ["svc_a", "svc_b"],
+                        "CPU", "2024-01-01", "10:00:00", keep_versions=1
+                    )
+                db_output.close()
+
+                db_input = DBInput()
+                db_input.window_store = None
+                db_input.normalize_on_read = False
+                window = db_input.get_window_matrix("CPU", "2024-01-01", "10:00:00")
+                runs = db_input.get_grouping_runs()
+                rows = db_input.get_grouping_rows("CPU", "2024-01-01", "10:00:00")
+                catalog = db_input.get_window_catalog("CPU")
+                fingerprint = db_input.get_window_fingerprint("CPU", "2024-01-01", "10:00:00")
+                db_input.close()
+            finally:
+                storage.DB_BACKEND, storage.SQLITE_PATH = backend, path
+
+        self.assertEqual(window.service_names, ["svc_a", "svc_b"])
+        self.assertEqual(window.values.tolist(), [[15.0, 25.0], [30.0, 40.0]])
+        self.assertEqual([(run["version"], run["date"], run["time"]) for run in runs],
+                         [(2, datetime.date(2024, 1, 1), datetime.timedelta(hours=10))])
+        self.assertEqual([row["service_name"] for row in rows], ["svc_a", "svc_b"])
+        self.assertEqual([bool(row["has_processed"]) for row in catalog], [True])
+        self.assertTrue(fingerprint.startswith("2:"))
+        # Відбиток прочитано разом з рядами вікна, окремий запит після групування не потрібен
+        self.assertEqual(window.fingerprint, fingerprint)
+
+    def test_unstored_processed_windows_read_from_raw(self):
+        # Із STORE_PROCESSED=0 застарілі ряди processed_metrics не віддаються
+        with tempfile.TemporaryDirectory() as root:
+            backend, path = storage.DB_BACKEND, storage.SQLITE_PATH
+            storage.DB_BACKEND, storage.SQLITE_PATH = "sqlite", f"{root}/diploma.sqlite3"
+            try:
+                db_output = DBOutput()
+                db_output.store_processed = True
+                db_output.batch_save_processed_data([("svc_a", "CPU", "2024-01-01", "10:00:00", [1.0, 2.0])])
+                db_output.batch_save_raw_data([("svc_a", "CPU", "2024-01-01", "10:00:00", [1250, 2500])])
+                db_output.close()
+
+                invalidate_normalized_windows()
+                with mock.patch.dict(os.environ, {"STORE_PROCESSED": "0", "WINDOW_STORE_DIR": ""}):
+                    db_input = DBInput()
+                window = db_input.get_window_matrix("CPU", "2024-01-01", "10:00:00")
+                db_input.close()
+            finally:
+                storage.DB_BACKEND, storage.SQLITE_PATH = backend, path
+                invalidate_normalized_windows()
+
+        self.assertEqual(window.values.tolist(), [[50.0, 100.0]])
+
+    def test_backfill_legacy_runs(self):
+        # Групи, збережені без run_id, отримують запуск і знову видні у списку збережених групувань
+        with tempfile.TemporaryDirectory() as root:
+            backend, path = storage.DB_BACKEND, storage.SQLITE_PATH
+            storage.DB_BACKEND, storage.SQLITE_PATH = "sqlite", f"{root}/diploma.sqlite3"
+            try:
+                db_output = DBOutput()
+                db_output.cursor.executemany(
+                    "INSERT INTO grouping_results (group_id, service_name, date, time, metric_type, component_type) "
+                    "VALUES (%s, %s, %s, %s, %s, %s)",
+                    [(1, "svc_a", "2024-01-01", "10:00:00", "CPU", "original"),
+                     (1, "svc_b", "2024-01-01", "10:00:00", "CPU", "original"),
+                     (2, "svc_c", "2024-01-01", "10:00:00", "CPU", "base")]
+                )
+                linked = backfill_legacy_runs(db_output.cursor)
+                db_output.connection.commit()
+                # Повторне застосування нічого не змінює
+                backfill_legacy_runs(db_output.cursor)
+                db_output.connection.commit()
+                db_output.close()
+
+                db_input = DBInput()
+                runs = db_input.get_grouping_runs()
+                rows = db_input.get_grouping_rows(run_id=runs[0]["run_id"])
+                db_input.close()
+            finally:
+                storage.DB_BACKEND, storage.SQLITE_PATH = backend, path
+
+        self.assertEqual(linked, 3)
+        self.assertEqual([(run["version"], run["num_groups"], run["num_services"], run["num_records"]) for run in runs],
+                         [(1, 2, 3, 3)])
+        self.assertEqual([row["service_name"] for row in rows], ["svc_a", "svc_b", "svc_c"])
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
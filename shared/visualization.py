@@ -2,6 +2,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 from typing import List, Tuple, Dict, Any
 import json
+from shared.grouping_result import group_statistics, group_loads
 
 class Visualizer:
     """
@@ -56,15 +57,7 @@ class Visualizer:
         """
         plt.figure(figsize=self.figsize)
         
-        for i, group in enumerate(groups):
-            # Обчислення загального навантаження групи
-            time_slots = len(group[0]) if group else 0
-            total_load = [0] * time_slots
-            
-            for service in group:
-                for t in range(time_slots):
-                    total_load[t] += service[t]
-            
+        for i, total_load in enumerate(group_loads(groups)):
             # Побудова графіка для групи
             plt.plot(total_load, label=f"Група {i+1}", marker='o', linestyle='-', markersize=4)
         
@@ -85,25 +78,9 @@ class Visualizer:
         """
         plt.figure(figsize=self.figsize)
         
-        cv_values = []
-        group_labels = []
-        
-        for i, group in enumerate(groups):
-            # Обчислення загального навантаження групи
-            time_slots = len(group[0]) if group else 0
-            total_load = [0] * time_slots
-            
-            for service in group:
-                for t in range(time_slots):
-                    total_load[t] += service[t]
-            
-            # Обчислення коефіцієнта варіації
-            mean = np.mean(total_load)
-            std_dev = np.std(total_load)
-            cv = (std_dev / mean) * 100 if mean > 0 else float('inf')
-            
-            cv_values.append(cv if cv != float('inf') else 100)  # Обмеження для візуалізації
-            group_labels.append(f"Група {i+1}")
+        # Коефіцієнти варіації всіх груп одним проходом
+        cv_values = group_statistics(group_loads(groups))["cv"].tolist()
+        group_labels = [f"Група {i+1}" for i in range(len(cv_values))]
         
         # Побудова графіка
         plt.bar(group_labels, cv_values)
@@ -143,35 +120,19 @@ class Visualizer:
             plt.tight_layout()
             plt.show()
     
-    def visualize_group_statistics(self, groups: List[List[List[float]]], 
-                                 group_services: List[List[int]],
-                                 service_names: List[str]) -> None:
+    def visualize_group_statistics(self, result, service_names: List[str]) -> None:
         """
         Візуалізація статистики по групах
         
         Args:
-            groups: Список груп, де кожна група містить часові ряди мікросервісів
-            group_services: Список індексів мікросервісів у кожній групі
+            result: GroupingResult з результатом групування
             service_names: Список назв мікросервісів
         """
-        # Підготовка даних для візуалізації
-        group_sizes = [len(group) for group in group_services]
-        
-        # Обчислення середнього навантаження для кожної групи
-        mean_loads = []
-        peak_loads = []
-        
-        for group in groups:
-            # Обчислення загального навантаження групи
-            time_slots = len(group[0]) if group else 0
-            total_load = [0] * time_slots
-            
-            for service in group:
-                for t in range(time_slots):
-                    total_load[t] += service[t]
-            
-            mean_loads.append(np.mean(total_load))
-            peak_loads.append(max(total_load))
+        # Статистика всіх груп одним проходом
+        stats = result.statistics()
+        group_sizes = stats["size"].tolist()
+        mean_loads = stats["mean"].tolist()
+        peak_loads = stats["peak"].tolist()
         
         # Створення фігури з декількома підграфіками
         fig, axs = plt.subplots(3, 1, figsize=(12, 12))
@@ -209,28 +170,14 @@ class Visualizer:
             print(f"  Середнє навантаження: {mean:.2f}")
             print(f"  Пікове навантаження: {peak:.2f}")
             
-            # Отримання списку мікросервісів у групі з урахуванням базових та пікових компонентів
-            services_in_group = []
-            for idx in group_services[i]:
-                if idx >= 1000:  # Базовий компонент
-                    real_idx = idx - 1000
-                    if 0 <= real_idx < len(service_names):
-                        services_in_group.append(f"{service_names[real_idx]} (базовий)")
-                elif idx < 0:  # Піковий компонент
-                    real_idx = -idx
-                    if 0 <= real_idx < len(service_names):
-                        services_in_group.append(f"{service_names[real_idx]} (піковий)")
-                else:  # Звичайний мікросервіс
-                    if 0 <= idx < len(service_names):
-                        services_in_group.append(service_names[idx])
-            
-            print(f"  Мікросервіси: {services_in_group}")
+            # Мікросервіси групи з позначкою базових та пікових компонентів
+            print(f"  Мікросервіси: {result.member_labels(i, service_names)}")
             print("-" * 50)
 
 # Приклад використання:
 if __name__ == "__main__":
     from db_input import DBInput
-    from group_finder import form_multiple_knapsack_groups
+    from group_finder import knapsack_grouping
     
     # Отримання даних з бази даних
     db_input = DBInput()
@@ -244,7 +191,8 @@ if __name__ == "__main__":
     print(f"Отримано дані для {len(microservices)} мікросервісів")
     
     # Формування груп
-    groups, group_services, slot_sums = form_multiple_knapsack_groups(microservices, max_group_size=4)
+    result = knapsack_grouping(microservices, max_group_size=4)
+    groups, group_services, slot_sums = result.as_tuple()
     
     # Створення візуалізатора
     visualizer = Visualizer()
@@ -259,4 +207,4 @@ if __name__ == "__main__":
     visualizer.visualize_stability_comparison(groups)
     
     # Візуалізація статистики по групах
-    visualizer.visualize_group_statistics(groups, group_services, service_names) 
\ No newline at end of file
+    visualizer.visualize_group_statistics(result, service_names) 
\ No newline at end of file
@@ -0,0 +1,197 @@
+import datetime
+import os
+import threading
+import time as time_module
+from shared.db_input import DBInput, format_db_time
+
+# Максимальний вік кешу каталогу в секундах: записи з інших процесів
+# (десктопний застосунок, скрипти імпорту) стають видимими не пізніше цього терміну
+CATALOG_TTL = float(os.getenv('WINDOW_CATALOG_TTL', 60))
+
+METRIC_TYPES = ["CPU", "RAM", "CHANNEL"]
+
+# Перекриття інкрементального оновлення WindowIndex: updated_at зберігається з
+# точністю до секунди, тому вікна, змінені в ту саму секунду, читаються повторно
+CATALOG_REFRESH_OVERLAP = datetime.timedelta(seconds=1)
+
+_lock = threading.Lock()
+_cache = {"options": None, "loaded_at": 0.0, "generation": 0}
+
+
+def invalidate_window_catalog():
+    """
+    Скидає кеш каталогу вікон (викликається після кожного запису метрик)
+    """
+    with _lock:
+        _cache["options"] = None
+        _cache["loaded_at"] = 0.0
+        _cache["generation"] += 1
+
+
+def build_available_options(rows):
+    """
+    Формує набір доступних опцій з рядків каталогу metric_windows
+
+    Для кожної дати повертаються часи з сирими даними; якщо сирих даних за
+    дату немає, - часи з обробленими даними.
+
+    Args:
+        rows: Рядки каталогу з полями metric_type, date, time, has_raw, has_processed
+
+    Returns:
+        dict: {"dates": [...], "times": {date: [...]}, "metric_types": [...]}
+    """
+    raw_times = {}
+    processed_times = {}
+
+    for row in rows:
+        date_str = row["date"].strftime("%Y-%m-%d") if hasattr(row["date"], "strftime") else str(row["date"])
+        time_str = format_db_time(row["time"])
+        if row["has_raw"]:
+            raw_times.setdefault(date_str, set()).add(time_str)
+        if row["has_processed"]:
+            processed_times.setdefault(date_str, set()).add(time_str)
+
+    dates = sorted(set(raw_times) | set(processed_times))
+    times = {
+        date: sorted(raw_times.get(date) or processed_times.get(date) or [])
+        for date in dates
+    }
+
+    return {"dates": dates, "times": times, "metric_types": list(METRIC_TYPES)}
+
+
+def cached_options():
+    """
+    Повертає актуальний кеш опцій і покоління кешу
+
+    Returns:
+        tuple: (options або None, generation) - generation передається в
+            cache_options, щоб не закешувати дані, прочитані до нового запису
+    """
+    with _lock:
+        options = _cache["options"]
+        if options is not None and time_module.monotonic() - _cache["loaded_at"] < CATALOG_TTL:
+            return options, _cache["generation"]
+        return None, _cache["generation"]
+
+
+def cache_options(rows, generation):
+    """
+    Будує опції з рядків каталогу та кешує їх, якщо з моменту читання не було записів
+
+    Returns:
+        dict: Див. build_available_options
+    """
+    options = build_available_options(rows)
+
+    # Результат, прочитаний до запису, що відбувся під час читання, не кешується
+    with _lock:
+        if _cache["generation"] == generation:
+            _cache["options"] = options
+            _cache["loaded_at"] = time_module.monotonic()
+
+    return options
+
+
+def get_available_options(db_input=None):
+    """
+    Повертає доступні опції з кешу або одним запитом до каталогу
+
+    Args:
+        db_input (DBInput, optional): Підключення для читання каталогу при промаху
+            кешу. Якщо не задано, тимчасове підключення відкривається лише при промаху
+
+    Returns:
+        dict: Див. build_available_options
+    """
+    options, generation = cached_options()
+    if options is not None:
+        return options
+
+    if db_input is None:
+        db_input = DBInput()
+        try:
+            rows = db_input.get_window_catalog()
+        finally:
+            db_input.close()
+    else:
+        rows = db_input.get_window_catalog()
+
+    return cache_options(rows, generation)
+
+
+class WindowIndex:
+    """
+    Каталог вікон з обробленими даними в пам'яті процесу
+
+    Повний каталог читається одним запитом, далі - лише вікна, змінені після
+    останнього прочитаного updated_at (вікна з каталогу не видаляються, тому
+    злиття за ключем (метрика, дата, час) точне). Читання дат і часів не
+    звертається до бази даних; оновлення і читання можуть виконуватися в
+    різних потоках.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Тип метрики -> дата -> множина часів з обробленими даними
+        self._times = {}
+        self.updated_at = None
+
+    @property
+    def loaded(self):
+        return self.updated_at is not None
+
+    def merge(self, rows):
+        """
+        Додає до індексу рядки каталогу metric_windows
+
+        Returns:
+            int: Кількість вікон, що з'явилися в індексі або зникли з нього
+        """
+        changed = 0
+        with self._lock:
+            for row in rows:
+                date_str = row["date"].strftime("%Y-%m-%d") if hasattr(row["date"], "strftime") else str(row["date"])
+                times = self._times.setdefault(row["metric_type"], {}).setdefault(date_str, set())
+                time_str = format_db_time(row["time"])
+                if row["has_processed"] and time_str not in times:
+                    times.add(time_str)
+                    changed += 1
+                elif not row["has_processed"] and time_str in times:
+                    times.discard(time_str)
+                    changed += 1
+
+                updated_at = row.get("updated_at")
+                if updated_at is not None and (self.updated_at is None or updated_at > self.updated_at):
+                    self.updated_at = updated_at
+
+            if self.updated_at is None:
+                # Порожній каталог теж вважається завантаженим
+                self.updated_at = datetime.datetime.min
+        return changed
+
+    def refresh(self, db_input):
+        """
+        Повне (перше) або інкрементальне читання каталогу
+
+        Returns:
+            int: Див. merge
+        """
+        updated_since = None
+        if self.updated_at is not None and self.updated_at > datetime.datetime.min:
+            updated_since = self.updated_at - CATALOG_REFRESH_OVERLAP
+        return self.merge(db_input.get_window_catalog(updated_since=updated_since))
+
+    def dates(self, metric_type):
+        """
+        Дати з обробленими даними для типу метрики
+        """
+        with self._lock:
+            return sorted(date for date, times in self._times.get(metric_type, {}).items() if times)
+
+    def times(self, metric_type, date):
+        """
+        Часи вікон з обробленими даними для типу метрики і дати
+        """
+        with self._lock:
+            return sorted(self._times.get(metric_type, {}).get(date, ()))
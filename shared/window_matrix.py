@@ -0,0 +1,121 @@
+import numpy as np
+
+
+class WindowMatrix:
+    """
+    Щільна матриця навантаження мікросервісів для одного вікна (метрика, дата, час)
+
+    Рядок матриці відповідає мікросервісу, стовпець - часовому слоту.
+    Об'єкт поводиться як послідовність рядків, тому його можна передавати
+    напряму в алгоритм групування замість списку списків.
+    """
+    __slots__ = ("values", "service_names", "index", "metric_type", "date", "time", "fingerprint")
+
+    def __init__(self, values, service_names, metric_type=None, date=None, time=None, fingerprint=None):
+        """
+        Ініціалізація матриці вікна
+
+        Args:
+            values: Двовимірний масив (n_services, T) або список часових рядів
+            service_names: Список назв мікросервісів у порядку рядків
+            metric_type (str, optional): Тип метрики ('CPU', 'RAM', 'CHANNEL')
+            date (str, optional): Дата у форматі 'YYYY-MM-DD'
+            time (str, optional): Час у форматі 'HH:MM:SS'
+            fingerprint (str, optional): Відбиток рядів БД, з яких прочитано вікно
+        """
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        if values.ndim == 1 and values.size == 0:
+            values = values.reshape(0, 0)
+        if values.ndim != 2:
+            raise ValueError("Матриця вікна має бути двовимірною (n_services, T)")
+        if values.shape[0] != len(service_names):
+            raise ValueError("Кількість рядків не збігається з кількістю назв мікросервісів")
+
+        self.values = values
+        self.service_names = list(service_names)
+        self.index = {name: i for i, name in enumerate(self.service_names)}
+        self.metric_type = metric_type
+        self.date = date
+        self.time = time
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def from_rows(cls, rows, metric_type=None, date=None, time=None, fingerprint=None):
+        """
+        Створює матрицю з пар (назва мікросервісу, часовий ряд)
+
+        Args:
+            rows: Ітерабельний об'єкт пар (service_name, values)
+            metric_type (str, optional): Тип метрики
+            date (str, optional): Дата вікна
+            time (str, optional): Час вікна
+            fingerprint (str, optional): Відбиток рядів БД
+
+        Returns:
+            WindowMatrix: Матриця вікна
+        """
+        names = []
+        series = []
+        for name, values in rows:
+            names.append(name)
+            series.append(values)
+
+        if not series:
+            return cls(np.empty((0, 0)), [], metric_type, date, time, fingerprint)
+
+        lengths = {len(values) for values in series}
+        if len(lengths) != 1:
+            raise ValueError(f"Часові ряди вікна мають різну довжину: {sorted(lengths)}")
+
+        return cls(np.array(series, dtype=np.float64), names, metric_type, date, time, fingerprint)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def time_slots(self):
+        """
+        Кількість часових слотів у вікні
+        """
+        return self.values.shape[1]
+
+    def row(self, service_name):
+        """
+        Повертає часовий ряд мікросервісу за назвою (view без копіювання)
+
+        Args:
+            service_name (str): Назва мікросервісу
+
+        Returns:
+            numpy.ndarray: Рядок матриці
+        """
+        return self.values[self.index[service_name]]
+
+    def to_lists(self):
+        """
+        Перетворює матрицю у формат (microservices, service_names) зі списків
+
+        Returns:
+            tuple: (microservices, service_names)
+        """
+        return self.values.tolist(), list(self.service_names)
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    def __getitem__(self, idx):
+        return self.values[idx]
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __contains__(self, service_name):
+        return service_name in self.index
+
+    def __bool__(self):
+        return self.values.shape[0] > 0
+
+    def __repr__(self):
+        return (f"WindowMatrix(metric_type={self.metric_type!r}, date={self.date!r}, "
+                f"time={self.time!r}, shape={self.values.shape})")
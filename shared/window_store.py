@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import tempfile
+import numpy as np
+from dotenv import load_dotenv
+from shared.window_matrix import WindowMatrix
+
+# Завантаження змінних середовища з .env файлу
+load_dotenv()
+
+
+class WindowStore:
+    """
+    Локальне колонкове сховище оброблених вікон
+
+    Кожне вікно (метрика, дата, час) зберігається окремим блоком .npy, який
+    читається через memory-map без копіювання, та файлом метаданих з назвами
+    мікросервісів і відбитком (fingerprint) даних у БД. Перелік збережених
+    вікон складається з цих файлів метаданих, тому паралельні записи різних
+    вікон (кількома процесами бекенду) не змагаються за спільний файл індексу.
+    """
+    # Спільний індекс попередніх версій сховища; при переліку вікон пропускається
+    LEGACY_INDEX_FILE = "index.json"
+
+    def __init__(self, root_dir):
+        """
+        Ініціалізація сховища
+
+        Args:
+            root_dir (str): Каталог для зберігання блоків вікон
+        """
+        self.root_dir = root_dir
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Створює сховище з каталогу WINDOW_STORE_DIR
+
+        Returns:
+            WindowStore або None, якщо змінна середовища не задана
+        """
+        root_dir = os.getenv('WINDOW_STORE_DIR')
+        if not root_dir:
+            return None
+        return cls(root_dir)
+
+    @staticmethod
+    def window_key(metric_type, date, time):
+        """
+        Формує ім'я блоку для вікна, придатне для файлової системи
+        """
+        return f"{metric_type}_{date}_{str(time).replace(':', '')}"
+
+    def _path(self, key, suffix):
+        return os.path.join(self.root_dir, key + suffix)
+
+    def _write_atomic(self, path, write):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, metric_type, date, time, fingerprint=None):
+        """
+        Читає вікно зі сховища
+
+        Args:
+            metric_type (str): Тип метрики
+            date (str): Дата у форматі 'YYYY-MM-DD'
+            time (str): Час у форматі 'HH:MM:SS'
+            fingerprint (str, optional): Поточний відбиток даних у БД.
+                Якщо не збігається зі збереженим, блок вважається застарілим
+
+        Returns:
+            WindowMatrix з memory-mapped масивом або None
+        """
+        key = self.window_key(metric_type, date, time)
+        meta_path = self._path(key, ".json")
+        if not os.path.exists(meta_path):
+            return None
+
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if fingerprint is not None and meta.get("fingerprint") != fingerprint:
+                return None
+            values = np.load(self._path(key, ".npy"), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+        return WindowMatrix(values, meta["service_names"], metric_type, date, time, meta.get("fingerprint"))
+
+    def save(self, window, fingerprint):
+        """
+        Зберігає вікно у сховище (блок даних і файл метаданих вікна)
+
+        Args:
+            window (WindowMatrix): Матриця вікна з метаданими
+            fingerprint (str): Відбиток даних вікна у БД
+        """
+        key = self.window_key(window.metric_type, window.date, window.time)
+        meta = {
+            "metric_type": window.metric_type,
+            "date": str(window.date),
+            "time": str(window.time),
+            "shape": list(window.shape),
+            "fingerprint": fingerprint,
+            "service_names": window.service_names
+        }
+
+        # Спочатку блок даних, потім метадані: метадані без блоку ніколи не з'являться
+        self._write_atomic(self._path(key, ".npy"), lambda f: np.save(f, window.values))
+        self._write_atomic(self._path(key, ".json"),
+                           lambda f: f.write(json.dumps(meta, ensure_ascii=False).encode("utf-8")))
+
+    def read_index(self):
+        """
+        Повертає індекс збережених вікон, зібраний з файлів метаданих
+
+        Returns:
+            dict: Ключ вікна -> метадані (метрика, дата, час, розмір, відбиток)
+        """
+        index = {}
+        for name in os.listdir(self.root_dir):
+            if not name.endswith(".json") or name == self.LEGACY_INDEX_FILE:
+                continue
+            try:
+                with open(os.path.join(self.root_dir, name), "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            index[name[:-len(".json")]] = {k: meta.get(k) for k in ("metric_type", "date", "time", "shape", "fingerprint")}
+        return index
+
+
+def export_windows(metric_type=None):
+    """
+    Масове заповнення сховища всіма обробленими вікнами з БД
+
+    Args:
+        metric_type (str, optional): Обмеження одним типом метрики
+
+    Returns:
+        int: Кількість вікон у сховищі після експорту
+    """
+    from shared.db_input import DBInput, format_db_time
+
+    db_input = DBInput()
+    if db_input.window_store is None:
+        db_input.close()
+        raise RuntimeError("Змінна середовища WINDOW_STORE_DIR не задана")
+
+    query = "SELECT DISTINCT metric_type, date, time FROM processed_metrics"
+    params = []
+    if metric_type:
+        query += " WHERE metric_type = %s"
+        params.append(metric_type)
+
+    db_input.cursor.execute(query, params)
+    windows = db_input.cursor.fetchall()
+
+    exported = 0
+    for row in windows:
+        date_str = row["date"].strftime("%Y-%m-%d") if hasattr(row["date"], "strftime") else str(row["date"])
+        window = db_input.get_window_matrix(row["metric_type"], date_str, format_db_time(row["time"]))
+        if window:
+            exported += 1
+            print(f"Експортовано {window.metric_type} {window.date} {window.time}: {window.shape}")
+
+    db_input.close()
+    return exported
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Локальне сховище оброблених вікон")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Заповнити сховище всіма вікнами з БД")
+    export_parser.add_argument("--metric", choices=["CPU", "RAM", "CHANNEL"], help="Тип метрики")
+
+    subparsers.add_parser("list", help="Показати вміст індексу сховища")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        count = export_windows(args.metric)
+        print(f"Сховище містить {count} актуальних вікон")
+    elif args.command == "list":
+        store = WindowStore.from_env()
+        if store is None:
+            raise SystemExit("Змінна середовища WINDOW_STORE_DIR не задана")
+        for key, meta in sorted(store.read_index().items()):
+            print(f"{key}: {meta['shape']} {meta['fingerprint']}")